@@ -0,0 +1,154 @@
+class No:
+    def __init__(self, chave: tuple[int, int], valor: int | float) -> None:
+        self.chave: tuple[int, int] = chave
+        self.valor: int | float = valor
+        self.esquerda: No | None = None
+        self.direita: No | None = None
+        self.altura: int = 1
+
+
+class Arvore:
+    """
+    Implementação recursiva original da árvore AVL, mantida como referência
+    para comparar com o núcleo iterativo de estrutura2.Arvore
+    """
+
+    def __init__(self) -> None:
+        self.raiz: No | None = None
+        self.tamanho: int = 0
+
+    def _altura(self, no: No | None) -> int:
+        if no is None:
+            return 0
+        return no.altura
+
+    def _balanceamento(self, no: No | None) -> int:
+        if no is None:
+            return 0
+        return self._altura(no.esquerda) - self._altura(no.direita)
+
+    def _atualizar_altura(self, no: No | None) -> None:
+        if no is not None:
+            no.altura = 1 + max(self._altura(no.esquerda), self._altura(no.direita))
+
+    def _rotacao_direita(self, y: No) -> No:
+        x: No = y.esquerda  # type: ignore
+        B: No | None = x.direita
+        x.direita = y
+        y.esquerda = B
+        self._atualizar_altura(y)
+        self._atualizar_altura(x)
+        return x
+
+    def _rotacao_esquerda(self, x: No) -> No:
+        y: No = x.direita  # type: ignore
+        B: No | None = y.esquerda
+        y.esquerda = x
+        x.direita = B
+        self._atualizar_altura(x)
+        self._atualizar_altura(y)
+        return y
+
+    def _balancear(self, no: No) -> No:
+        self._atualizar_altura(no)
+        bal: int = self._balanceamento(no)
+
+        if bal > 1 and self._balanceamento(no.esquerda) >= 0:
+            return self._rotacao_direita(no)
+
+        if bal < -1 and self._balanceamento(no.direita) <= 0:
+            return self._rotacao_esquerda(no)
+
+        if bal > 1 and self._balanceamento(no.esquerda) < 0:
+            no.esquerda = self._rotacao_esquerda(no.esquerda)  # type: ignore
+            return self._rotacao_direita(no)
+
+        if bal < -1 and self._balanceamento(no.direita) > 0:
+            no.direita = self._rotacao_direita(no.direita)  # type: ignore
+            return self._rotacao_esquerda(no)
+
+        return no
+
+    def _inserir_recursivo(
+        self, no: No | None, chave: tuple[int, int], valor: int | float
+    ) -> No:
+        if no is None:
+            self.tamanho += 1
+            return No(chave, valor)
+
+        if chave < no.chave:
+            no.esquerda = self._inserir_recursivo(no.esquerda, chave, valor)
+        elif chave > no.chave:
+            no.direita = self._inserir_recursivo(no.direita, chave, valor)
+        else:
+            no.valor = valor
+            return no
+
+        return self._balancear(no)
+
+    def inserir(self, chave: tuple[int, int], valor: int | float) -> None:
+        self.raiz = self._inserir_recursivo(self.raiz, chave, valor)
+
+    def _buscar_recursivo(self, no: No | None, chave: tuple[int, int]) -> No | None:
+        if no is None:
+            return None
+
+        if chave < no.chave:
+            return self._buscar_recursivo(no.esquerda, chave)
+        elif chave > no.chave:
+            return self._buscar_recursivo(no.direita, chave)
+        else:
+            return no
+
+    def buscar(self, chave: tuple[int, int]) -> int | float | None:
+        no: No | None = self._buscar_recursivo(self.raiz, chave)
+        return no.valor if no else None
+
+    def contem(self, chave: tuple[int, int]) -> bool:
+        return self._buscar_recursivo(self.raiz, chave) is not None
+
+    def _no_minimo(self, no: No) -> No:
+        atual: No = no
+        while atual.esquerda is not None:
+            atual = atual.esquerda
+        return atual
+
+    def _remover_recursivo(self, no: No | None, chave: tuple[int, int]) -> No | None:
+        if no is None:
+            return no
+
+        if chave < no.chave:
+            no.esquerda = self._remover_recursivo(no.esquerda, chave)
+        elif chave > no.chave:
+            no.direita = self._remover_recursivo(no.direita, chave)
+        else:
+            self.tamanho -= 1
+
+            if no.esquerda is None:
+                return no.direita
+            elif no.direita is None:
+                return no.esquerda
+
+            sucessor: No = self._no_minimo(no.direita)
+            no.chave = sucessor.chave
+            no.valor = sucessor.valor
+            # A chamada abaixo desconta o sucessor de novo; compensamos aqui
+            self.tamanho += 1
+            no.direita = self._remover_recursivo(no.direita, sucessor.chave)
+
+        return self._balancear(no)
+
+    def remover(self, chave: tuple[int, int]) -> None:
+        self.raiz = self._remover_recursivo(self.raiz, chave)
+
+    def _iterar_inordem(self, no: No | None):
+        if no is not None:
+            yield from self._iterar_inordem(no.esquerda)
+            yield (no.chave, no.valor)
+            yield from self._iterar_inordem(no.direita)
+
+    def items(self):
+        return self._iterar_inordem(self.raiz)
+
+    def __len__(self) -> int:
+        return self.tamanho
@@ -1,9 +1,29 @@
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
 import random
+import statistics
+import subprocess
 import sys
+import tempfile
 import time
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele não há linha de base densa
+    np = None
 
 from estrutura1 import MatrizEsparsaHash
 from estrutura2 import MatrizEsparsaArvore
+from estrutura3 import MatrizEsparsaCSR
+from formato_mtx import escrever_mtx, ler_mtx
+from matriz_adaptativa import MatrizAdaptativa
+from memoria import memoria_alocada, pico_memoria, tamanho_profundo
+from multiplicacao_externa import matmul_out_of_core
 
 
 def criar_matriz_aleatoria(n, m, dados_esparsos):
@@ -24,21 +44,117 @@ def criar_matriz_aleatoria(n, m, dados_esparsos):
     return matriz
 
 
-def gerar_dados_esparsos(n, m, percentual_esparsidade):
+DISTRIBUICOES = ("uniforme", "potencia", "banda")
+
+
+def _posicoes_distintas(gerador, n, m, k, sortear):
+    """
+    Chama sortear(gerador, quantidade) -> (linhas, colunas) até juntar k
+    posições distintas, descartando repetidas de forma vetorizada
+    """
+    escolhidas = np.empty(0, dtype=np.int64)
+    while len(escolhidas) < k:
+        faltam = k - len(escolhidas)
+        linhas, colunas = sortear(gerador, 2 * faltam + 16)
+        candidatas = linhas * m + colunas
+        # Ordena e descarta vizinhos iguais; quais ficam é sorteado de novo
+        # pela permutação
+        escolhidas = np.sort(np.concatenate([escolhidas, candidatas]))
+        escolhidas = escolhidas[np.r_[True, escolhidas[1:] != escolhidas[:-1]]]
+        if len(escolhidas) > k:
+            escolhidas = gerador.permutation(escolhidas)[:k]
+    return gerador.permutation(escolhidas)
+
+
+def gerar_dados_vetorizado(n, m, k, gerador, distribuicao="uniforme", alfa=1.5):
+    """
+    Sorteia k posições distintas com NumPy e valores inteiros de 1 a 9.
+    - uniforme: subconjunto uniforme de k das n * m posições
+    - potencia: grau das linhas segue uma lei de potência (expoente 'alfa'),
+      com colunas uniformes
+    - banda: posições com |i - j| <= largura, sendo a largura a menor que
+      comporta 2k posições
+    em O(k log k)
+    """
+    if distribuicao == "uniforme":
+
+        def sortear(gerador, quantidade):
+            return gerador.integers(0, n, quantidade), gerador.integers(0, m, quantidade)
+
+        posicoes = _posicoes_distintas(gerador, n, m, k, sortear)
+    elif distribuicao == "potencia":
+        # Linhas "populares" sorteadas ao acaso, com peso 1 / posto^alfa
+        pesos = 1.0 / np.arange(1, n + 1) ** alfa
+        pesos = gerador.permutation(pesos / pesos.sum())
+        # Nenhuma linha deve esperar mais que metade de m elementos, senão o
+        # sorteio das últimas colunas livres dela não terminaria
+        pesos = np.minimum(pesos, m / max(2 * k, 1))
+        pesos /= pesos.sum()
+
+        def sortear(gerador, quantidade):
+            linhas = gerador.choice(n, size=quantidade, p=pesos)
+            return linhas, gerador.integers(0, m, quantidade)
+
+        posicoes = _posicoes_distintas(gerador, n, m, k, sortear)
+    elif distribuicao == "banda":
+        largura = min(max(n, m), -(-k // max(n, 1)))
+
+        def sortear(gerador, quantidade):
+            linhas = gerador.integers(0, n, quantidade)
+            colunas = linhas + gerador.integers(-largura, largura + 1, quantidade)
+            validas = (colunas >= 0) & (colunas < m)
+            return linhas[validas], colunas[validas]
+
+        posicoes = _posicoes_distintas(gerador, n, m, k, sortear)
+    else:
+        raise ValueError(f"Distribuição '{distribuicao}' desconhecida")
+
+    valores = gerador.integers(1, 10, k)
+    return list(
+        zip((posicoes // m).tolist(), (posicoes % m).tolist(), valores.tolist())
+    )
+
+
+def gerar_dados_esparsos(
+    n, m, percentual_esparsidade, rng=random, distribuicao="uniforme"
+):
+    """
+    Gera as triplas (i, j, valor) de uma matriz com o percentual de não nulos
+    pedido. Com NumPy, o sorteio é vetorizado (gerar_dados_vetorizado) e a
+    semente vem de 'rng', então cada ponto continua reprodutível; sem NumPy,
+    só a distribuição uniforme está disponível
+    """
     total_posicoes = n * m
     k = int(total_posicoes * (percentual_esparsidade / 100.0))
+    if np is not None:
+        gerador = np.random.default_rng(rng.getrandbits(64))
+        return gerar_dados_vetorizado(n, m, k, gerador, distribuicao)
+    if distribuicao != "uniforme":
+        raise ValueError(f"A distribuição '{distribuicao}' requer NumPy")
+
     dados = []
     posicoes_usadas = set()
     while len(dados) < k:
-        i = random.randint(0, n - 1)
-        j = random.randint(0, m - 1)
+        i = rng.randint(0, n - 1)
+        j = rng.randint(0, m - 1)
         if (i, j) not in posicoes_usadas:
             posicoes_usadas.add((i, j))
-            valor = random.randint(1, 9)  # Usando inteiros de 1 a 9
+            valor = rng.randint(1, 9)  # Usando inteiros de 1 a 9
             dados.append((i, j, valor))
     return dados
 
 
+def criar_matriz_numpy(n, m, dados_esparsos):
+    """
+    Cria a matriz densa como arranjo NumPy float64, para que o produto use BLAS
+    """
+    matriz = np.zeros((n, m))
+    if dados_esparsos:
+        linhas, colunas, valores = zip(*dados_esparsos)
+        matriz[list(linhas), list(colunas)] = valores
+    return matriz
+
+
 def imprimir_matriz_tradicional(matriz):
     print("Representação Tradicional (Bidimensional):")
     for linha in matriz:
@@ -46,17 +162,24 @@ def imprimir_matriz_tradicional(matriz):
 
 
 def converter_estrutura_hash(n, m, dados):
-    matriz_hash = MatrizEsparsaHash(n, m)
-    for i, j, valor in dados:
-        matriz_hash[i, j] = valor
-    return matriz_hash
+    return MatrizEsparsaHash.from_triplets(n, m, dados)
+
+
+def converter_estrutura_hash_inteira(n, m, dados):
+    return MatrizEsparsaHash.from_triplets(n, m, dados, chaves_inteiras=True)
+
+
+def converter_estrutura_hash_tipada(n, m, dados):
+    # Os dados gerados são inteiros; um escalar float passa o arranjo para 'd'
+    return MatrizEsparsaHash.from_triplets(n, m, dados, tipo_valores="q")
 
 
 def converter_estrutura_arvore(n, m, dados):
-    matriz_arvore = MatrizEsparsaArvore(n, m)
-    for i, j, valor in dados:
-        matriz_arvore[i, j] = valor
-    return matriz_arvore
+    return MatrizEsparsaArvore.from_triplets(n, m, dados)
+
+
+def converter_estrutura_arvore_b_mais(n, m, dados):
+    return MatrizEsparsaArvore.from_triplets(n, m, dados, arvore="bmais")
 
 
 def soma_matriz_tradicional(A, B, n, m):
@@ -96,124 +219,557 @@ def mult_escalar_tradicional(A, n, m, escalar):
     return C
 
 
-def rodar_benchmarks():
-    ESCALAR_TESTE = 5.0  # Escalar que usaremos para o teste
-    NOME_ARQUIVO = "resultados_benchmark.csv"
+OPERACOES = ("soma", "mult", "mult_escalar", "mult_disco")
+# mult_disco só roda quando pedida em --operacoes
+OPERACOES_PADRAO = ("soma", "mult", "mult_escalar")
 
-    f = open(NOME_ARQUIVO, "w")
 
-    # Define o cabeçalho para o CSV e para o console
-    header = (
-        "estrutura,i,n,esparsidade,k,tempo_soma,tempo_mult,tempo_mult_escalar,memoria"
+def mult_em_disco(A, B):
+    """
+    A @ B com o resultado gravado em blocos num diretório temporário, que é
+    apagado ao final
+    """
+    with matmul_out_of_core(A, B) as C:
+        return C.k()
+
+
+_OPERACOES_ESPARSAS = {
+    "soma": lambda A, B, n, escalar: A + B,
+    "mult": lambda A, B, n, escalar: A @ B,
+    "mult_escalar": lambda A, B, n, escalar: A * escalar,
+    "mult_disco": lambda A, B, n, escalar: mult_em_disco(A, B),
+}
+
+# Cada estrutura: como construí-la a partir das triplas, como executar cada
+# operação e até qual n ela é viável
+ESTRUTURAS = {
+    "Hash": {
+        "construir": converter_estrutura_hash,
+        "operacoes": _OPERACOES_ESPARSAS,
+        "n_maximo": None,
+    },
+    # Posições codificadas como um inteiro i * m + j
+    "HashInteira": {
+        "construir": converter_estrutura_hash_inteira,
+        "operacoes": _OPERACOES_ESPARSAS,
+        "n_maximo": None,
+    },
+    # Posições inteiras e valores num arranjo tipado
+    "HashTipada": {
+        "construir": converter_estrutura_hash_tipada,
+        "operacoes": _OPERACOES_ESPARSAS,
+        "n_maximo": None,
+    },
+    "Arvore": {
+        "construir": converter_estrutura_arvore,
+        "operacoes": _OPERACOES_ESPARSAS,
+        "n_maximo": None,
+    },
+    # A mesma matriz sobre a árvore B+ em vez da AVL
+    "ArvoreBMais": {
+        "construir": converter_estrutura_arvore_b_mais,
+        "operacoes": _OPERACOES_ESPARSAS,
+        "n_maximo": None,
+    },
+    "CSR": {
+        "construir": lambda n, m, dados: MatrizEsparsaCSR.de_hash(
+            converter_estrutura_hash(n, m, dados)
+        ),
+        "operacoes": _OPERACOES_ESPARSAS,
+        "n_maximo": None,
+    },
+    "Adaptativa": {
+        "construir": lambda n, m, dados: MatrizAdaptativa.de_matriz(
+            converter_estrutura_hash(n, m, dados)
+        ),
+        # Sem mult_disco: matmul_out_of_core só aceita Hash, AVL e CSR
+        "operacoes": {
+            nome: operacao
+            for nome, operacao in _OPERACOES_ESPARSAS.items()
+            if nome != "mult_disco"
+        },
+        "n_maximo": None,
+    },
+    # Linha de base densa realista: arranjos float64 e BLAS para o produto
+    # (n = 10**4 já ocupa 800 MB por matriz)
+    "NumPy": {
+        "construir": lambda n, m, dados: criar_matriz_numpy(n, m, dados),
+        "operacoes": {
+            "soma": lambda A, B, n, escalar: A + B,
+            "mult": lambda A, B, n, escalar: A @ B,
+            "mult_escalar": lambda A, B, n, escalar: A * escalar,
+        },
+        "n_maximo": 10**4,
+    },
+    "Tradicional": {
+        "construir": criar_matriz_aleatoria,
+        "operacoes": {
+            "soma": lambda A, B, n, escalar: soma_matriz_tradicional(A, B, n, n),
+            "mult": lambda A, B, n, escalar: mult_matriz_tradicional(A, B, n, n, n),
+            "mult_escalar": lambda A, B, n, escalar: mult_escalar_tradicional(
+                A, n, n, escalar
+            ),
+        },
+        "n_maximo": 1000,
+        "acessar": lambda A, i, j: A[i][j],
+    },
+}
+
+# Quantas posições não nulas sorteadas medem a latência de acesso
+AMOSTRAS_ACESSO = 10000
+
+COLUNAS = [
+    "estrutura",
+    "backend",
+    "i",
+    "n",
+    "esparsidade",
+    "k",
+    "repeticoes",
+    "memoria",
+    "memoria_tracemalloc",
+    "bytes_por_nnz",
+    "tempo_acesso_ns",
+] + [
+    f"{prefixo}_{operacao}{sufixo}"
+    for operacao in OPERACOES
+    for prefixo, sufixo in (
+        ("tempo", "_min"),
+        ("tempo", "_mediana"),
+        ("tempo", "_q1"),
+        ("tempo", "_q3"),
+        ("tempo", "_iqr"),
+        ("pico", ""),
     )
+]
 
-    print(f"Salvando resultados em {NOME_ARQUIVO}\n")
+COLUNAS_INTEIRAS = ("i", "n", "k", "repeticoes", "memoria", "memoria_tracemalloc")
 
-    for i in range(2, 7):  # i=2 até 6
-        n = 10**i
-
-        # Define as esparsidades
-        if i < 4:
-            percentuais = [1, 5, 10, 20]
-        else:
-            percentuais = [(1 / 10 ** (i + 2)), (1 / 10 ** (i + 1)), (1 / 10**i)]
 
-        for p in percentuais:
-            dados_A = gerar_dados_esparsos(n, n, p)
-            dados_B = gerar_dados_esparsos(n, n, p)
-            k_A = len(dados_A)  # Número de elementos não nulos
-
-            # ========================================
-            # Teste: Estrutura HASH
-            # ========================================
-            matriz_hash_A = converter_estrutura_hash(n, n, dados_A)
-            matriz_hash_B = converter_estrutura_hash(n, n, dados_B)
+def esparsidades_padrao(i):
+    """
+    Esparsidades (%) usadas para n = 10**i quando a suíte não define outras
+    """
+    if i < 4:
+        return [1, 5, 10, 20]
+    return [(1 / 10 ** (i + 2)), (1 / 10 ** (i + 1)), (1 / 10**i)]
 
-            memoria_hash = sys.getsizeof(matriz_hash_A.data)
-
-            inicio = time.perf_counter()
-            matriz_hash_C = matriz_hash_A + matriz_hash_B
-            tempo_soma_hash = time.perf_counter() - inicio
 
+def cronometrar(funcao, aquecimento, repeticoes):
+    """
+    Executa 'aquecimento' rodadas descartadas e depois mede 'repeticoes'
+    rodadas, com o coletor de lixo desligado durante cada medição
+    """
+    for _ in range(aquecimento):
+        funcao()
+
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        gc.disable()
+        try:
             inicio = time.perf_counter()
-            matriz_hash_D = matriz_hash_A @ matriz_hash_B
-            tempo_mult_hash = time.perf_counter() - inicio
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+        finally:
+            gc.enable()
+    return tempos
 
-            inicio = time.perf_counter()
-            matriz_hash_E = matriz_hash_A * ESCALAR_TESTE
-            tempo_mult_escalar_hash = time.perf_counter() - inicio
 
-            # Formata a linha de dados como string CSV
-            linha_hash = f"Hash,{i},{n},{p:.10f},{k_A},{tempo_soma_hash:.10f},{tempo_mult_hash:.10f},{tempo_mult_escalar_hash:.10f},{memoria_hash}"
-            print(linha_hash)  # Imprime no console
-            f.write(linha_hash + "\n")  # Salva no arquivo
+def resumir_tempos(tempos):
+    """
+    Retorna mínimo, mediana, quartis e intervalo interquartil dos tempos
+    """
+    if len(tempos) > 1:
+        q1, _, q3 = statistics.quantiles(tempos, n=4, method="inclusive")
+    else:
+        q1 = q3 = tempos[0]
+    return {
+        "min": min(tempos),
+        "mediana": statistics.median(tempos),
+        "q1": q1,
+        "q3": q3,
+        "iqr": q3 - q1,
+    }
+
+
+def metadados_ambiente(configuracao):
+    """
+    Descreve a máquina, o interpretador e a suíte para que os resultados
+    possam ser reproduzidos e comparados
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+
+    try:
+        import numpy
+
+        versao_numpy = numpy.__version__
+    except ImportError:
+        versao_numpy = ""
+
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "implementacao": platform.python_implementation(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": versao_numpy,
+        "commit": commit,
+        "configuracao": configuracao,
+    }
+
+
+def medir_acesso(A, acessar, dados, args):
+    """
+    Latência média, em ns, de ler uma posição não nula de A, sobre até
+    AMOSTRAS_ACESSO posições sorteadas dos dados (mínimo entre as repetições)
+    """
+    amostra = dados
+    if len(dados) > AMOSTRAS_ACESSO:
+        amostra = random.Random(args.semente).sample(dados, AMOSTRAS_ACESSO)
+    posicoes = [(i, j) for i, j, _ in amostra]
 
-            # ========================================
-            # Teste: Estrutura ÁRVORE AVL
-            # ========================================
- 
-            matriz_arvore_A = converter_estrutura_arvore(n, n, dados_A)
-            matriz_arvore_B = converter_estrutura_arvore(n, n, dados_B)
+    def ler_todas():
+        for i, j in posicoes:
+            acessar(A, i, j)
 
-            # Calcula memória aproximada da árvore
-            memoria_arvore = sys.getsizeof(matriz_arvore_A.data)
+    tempos = cronometrar(ler_todas, args.aquecimento, args.repeticoes)
+    return min(tempos) / len(posicoes) * 1e9
 
-            inicio = time.perf_counter()
-            matriz_arvore_C = matriz_arvore_A + matriz_arvore_B
-            tempo_soma_arvore = time.perf_counter() - inicio
 
-            inicio = time.perf_counter()
-            matriz_arvore_D = matriz_arvore_A @ matriz_arvore_B
-            tempo_mult_arvore = time.perf_counter() - inicio
+def medir_estrutura(nome, n, dados_A, dados_B, args):
+    """
+    Constrói A e B na estrutura 'nome', mede a memória de A e cronometra cada
+    operação pedida
+    """
+    estrutura = ESTRUTURAS[nome]
+    construir = estrutura["construir"]
+
+    if args.sem_memoria:
+        A = construir(n, n, dados_A)
+        memoria_tracemalloc = None
+    else:
+        A, memoria_tracemalloc = memoria_alocada(construir, n, n, dados_A)
+    B = construir(n, n, dados_B)
+
+    linha = {
+        "repeticoes": args.repeticoes,
+        # Bytes retidos de verdade, percorrendo todo o grafo de objetos
+        "memoria": tamanho_profundo(A),
+        "memoria_tracemalloc": memoria_tracemalloc,
+    }
+    if dados_A:
+        linha["bytes_por_nnz"] = linha["memoria"] / len(dados_A)
+        acessar = estrutura.get("acessar", lambda A, i, j: A[i, j])
+        linha["tempo_acesso_ns"] = medir_acesso(A, acessar, dados_A, args)
+
+    for operacao in args.operacoes:
+        if operacao not in estrutura["operacoes"]:
+            continue
+        funcao = estrutura["operacoes"][operacao]
+        tempos = cronometrar(
+            lambda: funcao(A, B, n, args.escalar), args.aquecimento, args.repeticoes
+        )
+        for estatistica, valor in resumir_tempos(tempos).items():
+            linha[f"tempo_{operacao}_{estatistica}"] = valor
+
+        # O pico é medido numa execução separada, já que o tracemalloc deixa
+        # as alocações lentas
+        if not args.sem_memoria:
+            linha[f"pico_{operacao}"] = pico_memoria(funcao, A, B, n, args.escalar)
+
+    if isinstance(A, MatrizAdaptativa):
+        # Backend em que a fachada terminou depois das operações medidas
+        linha["backend"] = A.backend
+    return linha
+
+
+def rodar_benchmarks(args):
+    linhas = []
+    for i in args.expoentes:
+        n = 10**i
+        percentuais = args.esparsidades or esparsidades_padrao(i)
 
-            inicio = time.perf_counter()
-            matriz_arvore_E = matriz_arvore_A * ESCALAR_TESTE
-            tempo_mult_escalar_arvore = time.perf_counter() - inicio
-
-            # Formata a linha de dados como string CSV
-            linha_arvore = f"Arvore,{i},{n},{p:.10f},{k_A},{tempo_soma_arvore:.10f},{tempo_mult_arvore:.10f},{tempo_mult_escalar_arvore:.10f},{memoria_arvore}"
-            print(linha_arvore)  # Imprime no console
-            f.write(linha_arvore + "\n")  # Salva no arquivo
-
-            # ========================================
-            # Teste: Matriz Tradicional (Bidimensional)
-            # ========================================
-            if i < 4:
-                matriz_tradicional_A = criar_matriz_aleatoria(n, n, dados_A)
-                matriz_tradicional_B = criar_matriz_aleatoria(n, n, dados_B)
-
-                memoria_tradicional = sys.getsizeof(matriz_tradicional_A)
-
-                inicio = time.perf_counter()
-                matriz_tradicional_C = soma_matriz_tradicional(
-                    matriz_tradicional_A, matriz_tradicional_B, n, n
+        for p in percentuais:
+            # Cada ponto tem sua própria semente: mudar a suíte não muda os dados
+            rng = random.Random(f"{args.semente}:{n}:{p}")
+            dados_A = gerar_dados_esparsos(n, n, p, rng, args.distribuicao)
+            dados_B = gerar_dados_esparsos(n, n, p, rng, args.distribuicao)
+
+            for nome in args.estruturas:
+                n_maximo = ESTRUTURAS[nome]["n_maximo"]
+                if n_maximo is not None and n > n_maximo:
+                    continue
+                if nome == "NumPy" and np is None:
+                    continue
+
+                linha = {
+                    "estrutura": nome,
+                    "i": i,
+                    "n": n,
+                    "esparsidade": p,
+                    "k": len(dados_A),
+                }
+                linha.update(medir_estrutura(nome, n, dados_A, dados_B, args))
+                linhas.append(linha)
+
+                resumo = " ".join(
+                    f"{operacao}={linha[f'tempo_{operacao}_mediana']:.6f}s"
+                    for operacao in args.operacoes
+                    if f"tempo_{operacao}_mediana" in linha
                 )
-                tempo_soma_tradicional = time.perf_counter() - inicio
-
-                inicio = time.perf_counter()
-                matriz_tradicional_D = mult_matriz_tradicional(
-                    matriz_tradicional_A, matriz_tradicional_B, n, n, n
+                backend = f" backend={linha['backend']}" if linha.get("backend") else ""
+                print(
+                    f"{nome},n={n},p={p:.10f},k={len(dados_A)}: "
+                    f"{resumo} memoria={linha['memoria']}"
+                    f" bytes/nnz={linha.get('bytes_por_nnz', 0):.1f}"
+                    f" acesso={linha.get('tempo_acesso_ns', 0):.0f}ns{backend}"
                 )
-                tempo_mult_tradicional = time.perf_counter() - inicio
+    return linhas
+
 
-                inicio = time.perf_counter()
-                matriz_tradicional_E = mult_escalar_tradicional(
-                    matriz_tradicional_A, n, n, ESCALAR_TESTE
+def medir_vazao_mtx(args):
+    """
+    Mede quantos MB/s de texto Matrix Market são lidos e convertidos em cada
+    estrutura, para os mesmos tamanhos e esparsidades da suíte
+    """
+    estruturas = {"Hash": MatrizEsparsaHash, "Arvore": MatrizEsparsaArvore}
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "matriz.mtx")
+        for i in args.expoentes:
+            n = 10**i
+            for p in args.esparsidades or esparsidades_padrao(i):
+                rng = random.Random(f"{args.semente}:{n}:{p}")
+                A = converter_estrutura_hash(
+                    n, n, gerar_dados_esparsos(n, n, p, rng, args.distribuicao)
                 )
-                tempo_mult_escalar_tradicional = time.perf_counter() - inicio
+                escrever_mtx(A, caminho)
+                megabytes = os.path.getsize(caminho) / 1e6
+
+                for nome, estrutura in estruturas.items():
+                    if nome not in args.estruturas:
+                        continue
+                    tempos = cronometrar(
+                        lambda: ler_mtx(caminho, estrutura),
+                        args.aquecimento,
+                        args.repeticoes,
+                    )
+                    mediana = resumir_tempos(tempos)["mediana"]
+                    print(
+                        f"{nome},n={n},p={p:.10f},k={len(A.data)}: {megabytes:.2f} MB "
+                        f"em {mediana:.4f}s = {megabytes / mediana:.2f} MB/s"
+                    )
+
+
+def salvar_resultados(caminho, metadados, linhas):
+    """
+    Salva em JSON (.json) ou em CSV com cabeçalho; no CSV os metadados vão em
+    linhas de comentário iniciadas por '#'
+    """
+    if caminho.endswith(".json"):
+        with open(caminho, "w") as f:
+            json.dump({"metadados": metadados, "resultados": linhas}, f, indent=2)
+        return
+
+    with open(caminho, "w", newline="") as f:
+        for chave, valor in metadados.items():
+            f.write(f"# {chave}={json.dumps(valor)}\n")
+        escritor = csv.DictWriter(f, fieldnames=COLUNAS)
+        escritor.writeheader()
+        for linha in linhas:
+            escritor.writerow(
+                {
+                    coluna: f"{valor:.10f}" if isinstance(valor, float) else valor
+                    for coluna, valor in linha.items()
+                }
+            )
+
+
+def carregar_resultados(caminho):
+    """
+    Lê um arquivo gerado por salvar_resultados e retorna (metadados, linhas),
+    com os campos numéricos convertidos e os vazios como None
+    """
+    if caminho.endswith(".json"):
+        with open(caminho) as f:
+            conteudo = json.load(f)
+        return conteudo["metadados"], conteudo["resultados"]
+
+    metadados = {}
+    with open(caminho, newline="") as f:
+        conteudo = []
+        for texto in f:
+            if texto.startswith("#"):
+                chave, _, valor = texto[1:].strip().partition("=")
+                metadados[chave] = json.loads(valor)
+            else:
+                conteudo.append(texto)
+
+    linhas = []
+    for linha in csv.DictReader(conteudo):
+        for coluna, valor in linha.items():
+            if coluna in ("estrutura", "backend"):
+                linha[coluna] = valor or None
+                continue
+            if valor == "":
+                linha[coluna] = None
+            elif coluna in COLUNAS_INTEIRAS or coluna.startswith("pico_"):
+                linha[coluna] = int(valor)
+            else:
+                linha[coluna] = float(valor)
+        linhas.append(linha)
+    return metadados, linhas
+
+
+def comparar_resultados(caminho_antigo, caminho_novo, limiar):
+    """
+    Compara a mediana de cada operação entre dois arquivos de resultados e
+    retorna a lista de regressões (novo mais lento que antigo * (1 + limiar))
+    """
+    _, antigos = carregar_resultados(caminho_antigo)
+    _, novos = carregar_resultados(caminho_novo)
+
+    def chave(linha):
+        return (linha["estrutura"], linha["n"], round(linha["esparsidade"], 10))
+
+    indice = {chave(linha): linha for linha in antigos}
+    regressoes = []
+    for linha in novos:
+        antiga = indice.get(chave(linha))
+        if antiga is None:
+            continue
+        for operacao in OPERACOES:
+            coluna = f"tempo_{operacao}_mediana"
+            tempo_antigo, tempo_novo = antiga.get(coluna), linha.get(coluna)
+            if not tempo_antigo or tempo_novo is None:
+                continue
+
+            # Só é regressão se, além de passar do limiar, o melhor tempo novo
+            # ficar acima do terceiro quartil antigo (fora do ruído medido)
+            q3_antigo = antiga.get(f"tempo_{operacao}_q3") or tempo_antigo
+            min_novo = linha.get(f"tempo_{operacao}_min") or tempo_novo
+            razao = tempo_novo / tempo_antigo
+            if razao > 1 + limiar and min_novo > q3_antigo:
+                situacao = "REGRESSAO"
+                regressoes.append((chave(linha), operacao, razao))
+            elif razao < 1 / (1 + limiar):
+                situacao = "melhora"
+            else:
+                situacao = "ok"
+            estrutura, n, p = chave(linha)
+            print(
+                f"{situacao:>9} {estrutura},n={n},p={p:.10f},{operacao}: "
+                f"{tempo_antigo:.6f}s -> {tempo_novo:.6f}s ({razao:.2f}x)"
+            )
+    return regressoes
+
+
+def ler_argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark das estruturas de matrizes esparsas"
+    )
+    parser.add_argument(
+        "--expoentes",
+        type=int,
+        nargs="+",
+        default=[2, 3, 4, 5, 6],
+        help="tamanhos n = 10**i a medir",
+    )
+    parser.add_argument(
+        "--esparsidades",
+        type=float,
+        nargs="+",
+        default=None,
+        help="percentuais de não nulos (padrão: depende de n)",
+    )
+    parser.add_argument(
+        "--operacoes",
+        nargs="+",
+        choices=OPERACOES,
+        default=list(OPERACOES_PADRAO),
+        help="mult_disco grava C em disco por blocos (matmul_out_of_core)",
+    )
+    parser.add_argument(
+        "--estruturas", nargs="+", choices=list(ESTRUTURAS), default=list(ESTRUTURAS)
+    )
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--aquecimento", type=int, default=1)
+    parser.add_argument("--semente", type=int, default=458)
+    parser.add_argument(
+        "--distribuicao",
+        choices=DISTRIBUICOES,
+        default="uniforme",
+        help="como as posições não nulas são sorteadas",
+    )
+    parser.add_argument("--escalar", type=float, default=5.0)
+    parser.add_argument(
+        "--sem-memoria",
+        action="store_true",
+        help="não roda as medições de tracemalloc",
+    )
+    parser.add_argument(
+        "--saida",
+        default=None,
+        help="arquivo .csv ou .json (padrão: resultados_benchmark_<data>.csv)",
+    )
+    parser.add_argument(
+        "--comparar",
+        nargs=2,
+        metavar=("ANTIGO", "NOVO"),
+        help="compara dois arquivos de resultados em vez de rodar",
+    )
+    parser.add_argument(
+        "--vazao-mtx",
+        action="store_true",
+        help="mede a vazão de leitura de arquivos Matrix Market em vez de rodar",
+    )
+    parser.add_argument(
+        "--limiar",
+        type=float,
+        default=0.10,
+        help="aumento relativo da mediana considerado regressão",
+    )
+    return parser.parse_args(argv)
+
 
-                # Formata a linha de dados como string CSV
-                linha_tradicional = f"Tradicional,{i},{n},{p:.10f},{k_A},{tempo_soma_tradicional:.10f},{tempo_mult_tradicional:.10f},{tempo_mult_escalar_tradicional:.10f},{memoria_tradicional}"
-                print(linha_tradicional)  # Imprime no console
-                f.write(linha_tradicional + "\n")  # Salva no arquivo
+def main(argv=None):
+    args = ler_argumentos(argv)
 
-    f.close()  # Fecha o arquivo
-    print(f"\nBenchmarks concluídos. Resultados salvos em '{NOME_ARQUIVO}'")
+    if args.comparar:
+        regressoes = comparar_resultados(*args.comparar, args.limiar)
+        print(f"\n{len(regressoes)} regressão(ões) acima de {args.limiar:.0%}")
+        return 1 if regressoes else 0
 
+    if args.vazao_mtx:
+        medir_vazao_mtx(args)
+        return 0
+
+    # Nunca sobrescreve resultados anteriores sem que isso seja pedido
+    saida = args.saida or datetime.now().strftime(
+        "resultados_benchmark_%Y%m%d-%H%M%S.csv"
+    )
+    configuracao = {
+        chave: valor
+        for chave, valor in vars(args).items()
+        if chave not in ("saida", "comparar", "limiar")
+    }
+    metadados = metadados_ambiente(configuracao)
 
-def main():
-    rodar_benchmarks()
+    print(f"Salvando resultados em {saida}\n")
+    linhas = rodar_benchmarks(args)
+    salvar_resultados(saida, metadados, linhas)
+    print(f"\nBenchmarks concluídos. Resultados salvos em '{saida}'")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,50 @@
+class CacheDerivado:
+    """
+    Contador de modificações de um armazenamento e os artefatos derivados dele
+    (visões por linha, coordenadas em arranjos...), memoizados contra esse
+    contador. Uma matriz, suas transpostas e seus snapshots compartilham 'data'
+    enquanto nenhum deles escreve e, por isso, compartilham também o mesmo
+    CacheDerivado, que conta quantas matrizes vivas o usam
+    """
+
+    __slots__ = ("versao", "_artefatos", "usuarios")
+
+    def __init__(self, versao: int = 0) -> None:
+        self.versao: int = versao
+        self._artefatos: dict = {}
+        # Matrizes que compartilham o armazenamento (cópia na escrita se > 1)
+        self.usuarios: int = 1
+
+    def invalidar(self) -> None:
+        """
+        Registra uma modificação: avança a versão e descarta os artefatos, que
+        não valem mais para o armazenamento novo
+        em O(1) amortizado
+        """
+        self.versao += 1
+        if self._artefatos:
+            self._artefatos.clear()
+
+    def obter(self, chave, construir):
+        """
+        Retorna o artefato da chave, chamando construir() só se ele ainda não
+        foi montado desde a última modificação. Os artefatos são compartilhados
+        e não devem ser alterados por quem os recebe
+        """
+        if chave in self._artefatos:
+            return self._artefatos[chave]
+        artefato = construir()
+        self._artefatos[chave] = artefato
+        return artefato
+
+    def separar(self) -> "CacheDerivado":
+        """
+        Cache novo e vazio para quem deixa de compartilhar o armazenamento; a
+        versão continua de onde estava
+        em O(1)
+        """
+        self.usuarios -= 1
+        return CacheDerivado(self.versao)
+
+    def __len__(self) -> int:
+        return len(self._artefatos)
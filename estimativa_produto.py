@@ -0,0 +1,129 @@
+import random
+from array import array
+
+from estrutura3 import MatrizEsparsaCSR
+from multiplicacao_paralela import _linhas_logicas
+
+# Quantas linhas de A a estimativa examina de fato
+AMOSTRAS = 256
+
+
+def _colunas_por_linha(B) -> dict:
+    """
+    Colunas de cada linha lógica de B, sem os valores
+    em O(kb) esperado
+    """
+    return {k: [j for j, _ in linha] for k, linha in _linhas_logicas(B).items()}
+
+
+def _nnz_linha(linha_A: list, colunas_B: dict) -> int:
+    """
+    Número de colunas distintas alcançadas pela linha de A (fase simbólica)
+    em O(produtos parciais da linha)
+    """
+    vistos: set = set()
+    for k, _ in linha_A:
+        vistos.update(colunas_B.get(k, ()))
+    return len(vistos)
+
+
+def nnz_por_linha(A, B) -> dict:
+    """
+    Fase simbólica de C = A @ B: retorna {i: nnz da linha i de C} para as
+    linhas não vazias, sem fazer nenhuma conta com os valores. É exato para a
+    estrutura de C; cancelamentos numéricos (somas que dão zero exatamente)
+    só podem deixar C menor
+    em O(ka + kb + produtos parciais)
+    """
+    if A.m != B.n:
+        raise ValueError("Dimensões incompatíveis para multiplicação")
+
+    colunas_B = _colunas_por_linha(B)
+    resultado: dict = {}
+    for i, linha in _linhas_logicas(A).items():
+        nnz = _nnz_linha(linha, colunas_B)
+        if nnz:
+            resultado[i] = nnz
+    return resultado
+
+
+def estimate_matmul_nnz(A, B, amostras: int = AMOSTRAS, semente: int = 0) -> int:
+    """
+    Estima o nnz de C = A @ B sem calcular C: conta os produtos parciais de
+    cada linha de A (barato, só tamanhos de linhas de B), roda a fase
+    simbólica exata em 'amostras' linhas sorteadas e escala a razão
+    nnz / produtos observada na amostra para o total. Com poucas linhas, o
+    resultado é o nnz simbólico exato
+    em O(ka + kb + produtos parciais das linhas amostradas)
+    """
+    if A.m != B.n:
+        raise ValueError("Dimensões incompatíveis para multiplicação")
+
+    linhas_A = _linhas_logicas(A)
+    colunas_B = _colunas_por_linha(B)
+    produtos = {
+        i: sum(len(colunas_B.get(k, ())) for k, _ in linha)
+        for i, linha in linhas_A.items()
+    }
+    total_produtos = sum(produtos.values())
+
+    if len(linhas_A) <= amostras:
+        return sum(_nnz_linha(linha, colunas_B) for linha in linhas_A.values())
+
+    sorteadas = random.Random(semente).sample(sorted(linhas_A), amostras)
+    nnz_amostra = sum(_nnz_linha(linhas_A[i], colunas_B) for i in sorteadas)
+    produtos_amostra = sum(produtos[i] for i in sorteadas)
+
+    if produtos_amostra:
+        # Estimador de razão: linhas com mais produtos pesam mais
+        estimativa = total_produtos * nnz_amostra / produtos_amostra
+    else:
+        estimativa = len(linhas_A) * nnz_amostra / amostras
+    # C nunca tem mais elementos que produtos parciais nem que posições
+    return min(round(estimativa), total_produtos, A.n * B.m)
+
+
+def matmul_duas_fases(A, B, nnz_linhas: dict | None = None) -> MatrizEsparsaCSR:
+    """
+    Retorna C = A @ B como MatrizEsparsaCSR em duas fases: a simbólica
+    (nnz_por_linha, ou o resultado já calculado em 'nnz_linhas') dá o tamanho
+    exato dos arranjos de C, que são alocados uma única vez; a numérica só os
+    preenche. Os valores são acumulados na mesma ordem do __matmul__ serial
+    de A
+    em O(ka + kb + produtos parciais + n)
+    """
+    if A.m != B.n:
+        raise ValueError("Dimensões incompatíveis para multiplicação")
+    if nnz_linhas is None:
+        nnz_linhas = nnz_por_linha(A, B)
+
+    total = sum(nnz_linhas.values())
+    indptr = array("q", [0]) * (A.n + 1)
+    indices = array("q", [0]) * total
+    valores: list = [0] * total
+
+    linhas_A = _linhas_logicas(A)
+    linhas_B = _linhas_logicas(B)
+    p = 0
+    acumulador: dict = {}
+    for i in range(A.n):
+        linha = linhas_A.get(i)
+        if linha is not None:
+            for k, valor_a in linha:
+                for j, valor_b in linhas_B.get(k, ()):
+                    acumulador[j] = acumulador.get(j, 0) + valor_a * valor_b
+
+            for j in sorted(acumulador):
+                valor = acumulador[j]
+                if valor != 0:
+                    indices[p] = j
+                    valores[p] = valor
+                    p += 1
+            acumulador.clear()
+        indptr[i + 1] = p
+
+    if p < total:
+        # Cancelamentos numéricos deixam sobra no fim dos arranjos
+        del indices[p:]
+        del valores[p:]
+    return MatrizEsparsaCSR._de_arranjos(A.n, B.m, indptr, indices, valores)
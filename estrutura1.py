@@ -1,9 +1,410 @@
+from array import array
+from itertools import chain
+
+from cache_derivado import CacheDerivado
+from produto_denso import VisaoLinhas, multiplicar_denso
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele usamos só o caminho em Python puro
+    np = None
+
+
+def _arranjo_numerico(valores):
+    """
+    Converte os valores para um arranjo NumPy apenas se forem todos int ou todos
+    float, para que as contas vetorizadas deem exatamente o mesmo resultado que
+    as contas em Python. Retorna None caso contrário, inclusive para inteiros
+    que não cabem em int64
+    """
+    tipos = set(map(type, valores))
+    if tipos == {int}:
+        if not valores:
+            return None
+        try:
+            return np.array(valores, dtype=np.int64)
+        except OverflowError:
+            return None
+    if tipos == {float}:
+        return np.array(valores, dtype=np.float64)
+    return None
+
+
+def _somar_segmentos(valores, inicios, tamanhos):
+    """
+    Soma cada segmento valores[inicio:inicio + tamanho] da esquerda para a
+    direita (mesma ordem do laço em Python, então floats dão o mesmo resultado),
+    vetorizando entre segmentos
+    em O(total + maior segmento)
+    """
+    if valores.dtype.kind == "i":
+        return np.add.reduceat(valores, inicios)
+
+    ordem = np.argsort(-tamanhos, kind="stable")
+    inicios_ord = inicios[ordem]
+    tamanhos_neg = -tamanhos[ordem]
+    soma = valores[inicios_ord].copy()
+    for r in range(1, int(-tamanhos_neg[0]) if len(soma) else 0):
+        # Segmentos ordenados por tamanho: os que têm mais de r termos vêm primeiro
+        ativos = int(np.searchsorted(tamanhos_neg, -r, side="left"))
+        soma[:ativos] += valores[inicios_ord[:ativos] + r]
+
+    resultado = np.empty_like(soma)
+    resultado[ordem] = soma
+    return resultado
+
+
+def _arranjo_tipado(tipo, valores):
+    """
+    Arranjo 'q' ou 'd' com os valores; inteiros que não cabem em 64 bits ou
+    valores não inteiros num 'q' passam para 'd'
+    """
+    try:
+        return array(tipo, valores)
+    except (TypeError, OverflowError):
+        return array("d", valores)
+
+
+class DicionarioCompacto:
+    """
+    Armazenamento compacto da MatrizEsparsaHash: cada posição física (i, j)
+    vira um único inteiro i * colunas + j, sem uma tupla por elemento. Com
+    'tipo' ('q' ou 'd') os valores ficam num arranjo tipado e o dicionário
+    guarda só a posição de cada um. Oferece a mesma interface de dicionário com
+    chaves (i, j) que o resto do código usa, além do acesso direto pelo código
+    """
+
+    __slots__ = ("colunas", "codigos", "valores", "livres")
+
+    def __init__(self, colunas, tipo=None):
+        self.colunas = colunas
+        # código -> valor, ou código -> posição em self.valores
+        self.codigos = {}
+        self.valores = array(tipo) if tipo else None
+        # Posições de self.valores liberadas por remoções
+        self.livres = []
+
+    @classmethod
+    def de_codigos(cls, colunas, codigos, valores, tipo=None):
+        """
+        Monta o armazenamento a partir de listas paralelas de códigos
+        (distintos) e valores
+        em O(k)
+        """
+        compacto = cls(colunas)
+        if tipo is None:
+            compacto.codigos = dict(zip(codigos, valores))
+        else:
+            compacto.valores = _arranjo_tipado(tipo, valores)
+            compacto.codigos = dict(zip(codigos, range(len(codigos))))
+        return compacto
+
+    @classmethod
+    def de_arranjos(cls, colunas, codigos, valores, tipo=None):
+        """
+        Como de_codigos, mas a partir de arranjos NumPy: com 'tipo', os
+        valores são copiados em bloco para o arranjo tipado, sem passar por
+        objetos Python ('q' passa para 'd' se os valores não forem inteiros)
+        em O(k)
+        """
+        if tipo is None:
+            return cls.de_codigos(colunas, codigos.tolist(), valores.tolist())
+
+        if tipo == "q" and valores.dtype.kind != "i":
+            tipo = "d"
+        compacto = cls(colunas, tipo)
+        compacto.valores.frombytes(
+            valores.astype(np.int64 if tipo == "q" else np.float64).tobytes()
+        )
+        compacto.codigos = dict(zip(codigos.tolist(), range(len(codigos))))
+        return compacto
+
+    @property
+    def tipo(self):
+        return self.valores.typecode if self.valores is not None else None
+
+    def obter(self, codigo, padrao=None):
+        posicao = self.codigos.get(codigo)
+        if posicao is None:
+            return padrao
+        if self.valores is None:
+            return posicao
+        return self.valores[posicao]
+
+    def definir(self, codigo, valor):
+        if self.valores is None:
+            self.codigos[codigo] = valor
+            return
+
+        if self.valores.typecode == "q" and not (
+            isinstance(valor, int) and -(2**63) <= valor < 2**63
+        ):
+            self.valores = array("d", self.valores)
+        posicao = self.codigos.get(codigo)
+        if posicao is not None:
+            self.valores[posicao] = valor
+        elif self.livres:
+            posicao = self.livres.pop()
+            self.valores[posicao] = valor
+            self.codigos[codigo] = posicao
+        else:
+            self.codigos[codigo] = len(self.valores)
+            self.valores.append(valor)
+
+    def remover(self, codigo):
+        posicao = self.codigos.pop(codigo)
+        if self.valores is not None:
+            self.livres.append(posicao)
+
+    def itens_codigos(self):
+        """
+        Percorre (código, valor) sem decodificar as posições
+        """
+        if self.valores is None:
+            return iter(self.codigos.items())
+        valores = self.valores
+        return ((codigo, valores[posicao]) for codigo, posicao in self.codigos.items())
+
+    def somado(self, outro):
+        """
+        Novo armazenamento com a soma deste e de outro, que deve usar a mesma
+        codificação; somas nulas são descartadas
+        em O(k + ko)
+        """
+        soma = dict(self.itens_codigos())
+        for codigo, valor in outro.itens_codigos():
+            novo = soma.get(codigo, 0) + valor
+            if novo != 0:
+                soma[codigo] = novo
+            else:
+                soma.pop(codigo, None)
+        return DicionarioCompacto.de_codigos(
+            self.colunas, list(soma), list(soma.values()), self.tipo
+        )
+
+    def copia(self):
+        """
+        Cópia independente do armazenamento
+        em O(k)
+        """
+        compacto = DicionarioCompacto(self.colunas)
+        compacto.codigos = dict(self.codigos)
+        if self.valores is not None:
+            compacto.valores = array(self.valores.typecode, self.valores)
+            compacto.livres = list(self.livres)
+        return compacto
+
+    def escalado(self, escalar):
+        """
+        Cópia com todos os valores multiplicados por escalar, sem decodificar
+        as posições
+        em O(k)
+        """
+        if self.valores is None:
+            return DicionarioCompacto.de_codigos(
+                self.colunas,
+                list(self.codigos),
+                [valor * escalar for valor in self.codigos.values()],
+            )
+        compacto = DicionarioCompacto(self.colunas)
+        compacto.codigos = dict(self.codigos)
+        compacto.valores = _arranjo_tipado(
+            self.valores.typecode, [valor * escalar for valor in self.valores]
+        )
+        compacto.livres = list(self.livres)
+        return compacto
+
+    # Interface de dicionário com chaves (i, j)
+
+    def get(self, chave, padrao=None):
+        i, j = chave
+        return self.obter(i * self.colunas + j, padrao)
+
+    def __getitem__(self, chave):
+        valor = self.get(chave)
+        if valor is None:
+            raise KeyError(chave)
+        return valor
+
+    def __setitem__(self, chave, valor):
+        i, j = chave
+        self.definir(i * self.colunas + j, valor)
+
+    def __delitem__(self, chave):
+        i, j = chave
+        codigo = i * self.colunas + j
+        if codigo not in self.codigos:
+            raise KeyError(chave)
+        self.remover(codigo)
+
+    def __contains__(self, chave):
+        i, j = chave
+        return i * self.colunas + j in self.codigos
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        colunas = self.colunas
+        for codigo in self.codigos:
+            yield divmod(codigo, colunas)
+
+    def values(self):
+        if self.valores is None:
+            return iter(self.codigos.values())
+        valores = self.valores
+        return (valores[posicao] for posicao in self.codigos.values())
+
+    def items(self):
+        colunas = self.colunas
+        if self.valores is None:
+            for codigo, valor in self.codigos.items():
+                yield divmod(codigo, colunas), valor
+        else:
+            valores = self.valores
+            for codigo, posicao in self.codigos.items():
+                yield divmod(codigo, colunas), valores[posicao]
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
 class MatrizEsparsaHash:
-    def __init__(self, n, m):
+    def __init__(self, n, m, chaves_inteiras=False, tipo_valores=None):
+        # Contador de modificações e estruturas derivadas de self.data,
+        # memoizadas contra ele (compartilhados com transpostas e snapshots
+        # até a primeira escrita)
+        self._cache = CacheDerivado()
         self.n = n
         self.m = m
-        self.data = {}
+        if chaves_inteiras or tipo_valores:
+            # Posições como inteiros i * m + j e, opcionalmente, valores num
+            # arranjo tipado ('q' ou 'd')
+            self.data = DicionarioCompacto(m, tipo_valores)
+        else:
+            self.data = {}
         self.eh_transposta = False
+        # Índices físicos opcionais {"linhas": {p_i: {p_j: None}},
+        # "colunas": {p_j: {p_i: None}}}, mantidos a cada escrita
+        self._indices = {}
+
+    @classmethod
+    def from_triplets(
+        cls,
+        n,
+        m,
+        triplas,
+        assume_sorted=False,
+        duplicates="sum",
+        chaves_inteiras=False,
+        tipo_valores=None,
+    ):
+        """
+        Constrói a matriz a partir de triplas (i, j, valor) preenchendo o
+        dicionário diretamente. Posições repetidas são somadas
+        (duplicates="sum") ou ficam com o último valor (duplicates="last");
+        resultados nulos são descartados. assume_sorted existe só para manter a
+        mesma interface da MatrizEsparsaArvore
+        em O(k) esperado
+        """
+        if duplicates not in ("sum", "last"):
+            raise ValueError("duplicates deve ser 'sum' ou 'last'")
+
+        A = cls(n, m, chaves_inteiras, tipo_valores)
+        data = A.data
+        if isinstance(data, DicionarioCompacto):
+            # Trabalha direto com os códigos, sem criar tuplas
+            for i, j, valor in triplas:
+                codigo = i * m + j
+                if duplicates == "sum":
+                    valor = data.obter(codigo, 0) + valor
+                data.definir(codigo, valor)
+            for codigo in [c for c in data.codigos if data.obter(c) == 0]:
+                data.remover(codigo)
+            return A
+
+        if duplicates == "sum":
+            for i, j, valor in triplas:
+                data[i, j] = data.get((i, j), 0) + valor
+        else:
+            for i, j, valor in triplas:
+                data[i, j] = valor
+
+        for chave in [chave for chave, valor in data.items() if valor == 0]:
+            del data[chave]
+        return A
+
+    @property
+    def versao(self):
+        """
+        Contador de modificações de self.data, compartilhado com as transpostas
+        e snapshots enquanto nenhum deles escreve
+        """
+        return self._cache.versao
+
+    def _compartilhar(self, outra):
+        """
+        Faz 'outra' ler o mesmo armazenamento (e índices) desta matriz, sem
+        copiar; quem escrever primeiro ganha a sua própria cópia
+        em O(1)
+        """
+        outra.data = self.data
+        outra._cache = self._cache
+        outra._indices = self._indices
+        self._cache.usuarios += 1
+
+    def _preparar_escrita(self):
+        """
+        Chamado antes de toda escrita: se self.data é compartilhado com
+        transpostas ou snapshots vivos, esta matriz passa a ter a sua própria
+        cópia (cópia na escrita), e as outras não veem a mudança. Depois
+        registra a modificação
+        em O(1), ou O(k) na primeira escrita depois de um compartilhamento
+        """
+        if self._cache.usuarios > 1:
+            self._cache = self._cache.separar()
+            if isinstance(self.data, DicionarioCompacto):
+                self.data = self.data.copia()
+            else:
+                self.data = dict(self.data)
+            indexada = bool(self._indices)
+            self._indices = {}
+            if indexada:
+                self.criar_indices()
+        self._cache.invalidar()
+
+    def snapshot(self):
+        """
+        Retorna uma cópia de A que compartilha o armazenamento até a primeira
+        escrita em qualquer um dos dois, quando só quem escreve copia os dados
+        em O(1)
+        """
+        copia = MatrizEsparsaHash(self.n, self.m)
+        self._compartilhar(copia)
+        copia.eh_transposta = self.eh_transposta
+        return copia
+
+    def copy(self):
+        """
+        O mesmo que snapshot()
+        em O(1)
+        """
+        return self.snapshot()
+
+    def __del__(self):
+        # Deixa de contar como usuária do armazenamento compartilhado
+        self._cache.usuarios -= 1
+
+    def _nova(self, n, m):
+        """
+        Matriz vazia com o mesmo tipo de armazenamento desta
+        """
+        if isinstance(self.data, DicionarioCompacto):
+            return MatrizEsparsaHash(n, m, True, self.data.tipo)
+        return MatrizEsparsaHash(n, m)
 
     def _get_pos(self, i, j):
         """
@@ -21,8 +422,19 @@ class MatrizEsparsaHash:
         em O(1)
         """
         i, j = tupla_pos
-        chave = self._get_pos(i, j)
-        return self.data.get(chave, 0)
+        if isinstance(i, slice) or isinstance(j, slice):
+            # A[i, :], A[:, j], A[i0:i1, j0:j1]. Testado antes da busca: fatias
+            # são hasheáveis a partir do Python 3.12 e só não seriam achadas
+            return self._fatiar(i, j)
+
+        data = self.data
+        if type(data) is DicionarioCompacto:
+            # Um único inteiro por acesso, sem montar a tupla física
+            if self.eh_transposta:
+                return data.obter(j * data.colunas + i, 0)
+            return data.obter(i * data.colunas + j, 0)
+
+        return data.get(self._get_pos(i, j), 0)
 
     def __setitem__(self, tupla_pos, valor):
         """
@@ -30,36 +442,302 @@ class MatrizEsparsaHash:
         em O(1)
         """
         i, j = tupla_pos
+        self._preparar_escrita()
+        data = self.data
+        if type(data) is DicionarioCompacto and not self._indices:
+            codigo = j * data.colunas + i if self.eh_transposta else i * data.colunas + j
+            if valor != 0:
+                data.definir(codigo, valor)
+            elif codigo in data.codigos:
+                data.remover(codigo)
+            return
+
         chave = self._get_pos(i, j)
         if valor != 0:
+            if self._indices and chave not in self.data:
+                self._indexar(chave)
             self.data[chave] = valor
         else:
             if chave in self.data:
                 del self.data[chave]
+                if self._indices:
+                    self._desindexar(chave)
 
-    def __add__(self, B):
+    def _chaves_fisicas(self, rows, cols):
         """
-        Retorna C = A + B
-        em O(ka + kb)
+        Posições físicas das posições lógicas (rows[t], cols[t])
+        """
+        if self.eh_transposta:
+            return zip(cols, rows)
+        return zip(rows, cols)
+
+    def set_many(self, rows, cols, vals):
         """
-        C = MatrizEsparsaHash(self.n, B.m)
+        Faz A[rows[t], cols[t]] = vals[t] para um lote de posições, com a
+        mesma regra do __setitem__ (zero remove). Se uma posição se repete, vale
+        o último valor do lote e ela conta uma só vez. Retorna
+        (inseridos, atualizados, removidos)
+        em O(b) esperado, sendo b o tamanho do lote
+        """
+        self._preparar_escrita()
+        data = self.data
+        inseridos = atualizados = removidos = 0
+
+        if type(data) is DicionarioCompacto and not self._indices:
+            # Último valor de cada código, sem passar por tuplas
+            colunas = data.colunas
+            lote = dict(
+                zip((i * colunas + j for i, j in self._chaves_fisicas(rows, cols)), vals)
+            )
+            codigos = data.codigos
+            for codigo, valor in lote.items():
+                existe = codigo in codigos
+                if valor != 0:
+                    if existe:
+                        atualizados += 1
+                    else:
+                        inseridos += 1
+                    data.definir(codigo, valor)
+                elif existe:
+                    removidos += 1
+                    data.remover(codigo)
+            return (inseridos, atualizados, removidos)
+
+        # Último valor de cada posição física
+        lote = dict(zip(self._chaves_fisicas(rows, cols), vals))
+        for chave, valor in lote.items():
+            existe = chave in data
+            if valor != 0:
+                if existe:
+                    atualizados += 1
+                else:
+                    inseridos += 1
+                    if self._indices:
+                        self._indexar(chave)
+                data[chave] = valor
+            elif existe:
+                removidos += 1
+                del data[chave]
+                if self._indices:
+                    self._desindexar(chave)
+        return (inseridos, atualizados, removidos)
 
-        # Adiciona os elementos de A em C em tempo O(ka)
+    def delete_many(self, rows, cols):
+        """
+        Zera as posições (rows[t], cols[t]) do lote; posições já nulas são
+        ignoradas. Retorna (0, 0, removidos), no mesmo formato de set_many
+        em O(b) esperado
+        """
+        self._preparar_escrita()
+        data = self.data
+        removidos = 0
+        for chave in set(self._chaves_fisicas(rows, cols)):
+            if chave in data:
+                removidos += 1
+                del data[chave]
+                if self._indices:
+                    self._desindexar(chave)
+        return (0, 0, removidos)
+
+    def _indexar(self, chave):
+        p_i, p_j = chave
+        linhas = self._indices["linhas"]
+        colunas = self._indices["colunas"]
+        if p_i not in linhas:
+            linhas[p_i] = {}
+        linhas[p_i][p_j] = None
+        if p_j not in colunas:
+            colunas[p_j] = {}
+        colunas[p_j][p_i] = None
+
+    def _desindexar(self, chave):
+        p_i, p_j = chave
+        linhas = self._indices["linhas"]
+        colunas = self._indices["colunas"]
+        del linhas[p_i][p_j]
+        if not linhas[p_i]:
+            del linhas[p_i]
+        del colunas[p_j][p_i]
+        if not colunas[p_j]:
+            del colunas[p_j]
+
+    def criar_indices(self):
+        """
+        Cria os índices de linhas e colunas, que passam a ser mantidos por
+        todas as escritas. Os índices guardam posições físicas, então uma
+        transposta usa os mesmos índices com os papéis trocados
+        em O(k) esperado
+        """
+        self._indices["linhas"] = {}
+        self._indices["colunas"] = {}
+        for chave in self.data:
+            self._indexar(chave)
+
+    def remover_indices(self):
+        """
+        Descarta os índices de linhas e colunas desta matriz; transpostas e
+        snapshots que ainda compartilham o armazenamento continuam com eles
+        em O(1)
+        """
+        self._indices = {}
+
+    def _indice_logico(self, por_linha):
+        """
+        Índice físico que responde pelas linhas (ou colunas) lógicas, ou None
+        se os índices não foram criados
+        em O(1)
+        """
+        if not self._indices:
+            return None
+        if por_linha != self.eh_transposta:
+            return self._indices["linhas"]
+        return self._indices["colunas"]
+
+    def _itens_logicos(self):
         for (p_i, p_j), valor in self.data.items():
             if self.eh_transposta:
-                i, j = (p_j, p_i)
+                yield (p_j, p_i), valor
             else:
-                i, j = (p_i, p_j)
-            C[i, j] = valor
+                yield (p_i, p_j), valor
 
-        # Soma com os elementos de B em tempo O(kb)
-        for (p_i, p_j), valor in B.data.items():
-            if B.eh_transposta:
-                i, j = (p_j, p_i)
+    def row(self, i):
+        """
+        Retorna {j: A[i, j]} com os elementos não nulos da linha i
+        em O(nnz da linha) com índices, O(k) sem
+        """
+        indice = self._indice_logico(True)
+        if indice is None:
+            return {j: valor for (a_i, j), valor in self._itens_logicos() if a_i == i}
+        return {j: self.data[self._get_pos(i, j)] for j in indice.get(i, ())}
+
+    def col(self, j):
+        """
+        Retorna {i: A[i, j]} com os elementos não nulos da coluna j
+        em O(nnz da coluna) com índices, O(k) sem
+        """
+        indice = self._indice_logico(False)
+        if indice is None:
+            return {i: valor for (i, a_j), valor in self._itens_logicos() if a_j == j}
+        return {i: self.data[self._get_pos(i, j)] for i in indice.get(j, ())}
+
+    def row_nnz(self, i):
+        """
+        Número de elementos não nulos da linha i
+        em O(1) com índices, O(k) sem
+        """
+        indice = self._indice_logico(True)
+        if indice is None:
+            return len(self.row(i))
+        return len(indice.get(i, ()))
+
+    def col_nnz(self, j):
+        """
+        Número de elementos não nulos da coluna j
+        em O(1) com índices, O(k) sem
+        """
+        indice = self._indice_logico(False)
+        if indice is None:
+            return len(self.col(j))
+        return len(indice.get(j, ()))
+
+    def _fatiar(self, i, j):
+        """
+        Retorna a submatriz A[i, j] em que i e/ou j são fatias (passo 1); um
+        índice inteiro vira uma dimensão de tamanho 1
+        em O(nnz do resultado + linhas da fatia) com índices, O(k) sem
+        """
+        faixas = []
+        for indice, dimensao in ((i, self.n), (j, self.m)):
+            if isinstance(indice, slice):
+                inicio, fim, passo = indice.indices(dimensao)
+                if passo != 1:
+                    raise ValueError("Fatias com passo diferente de 1 não são suportadas")
+                faixas.append((inicio, max(inicio, fim)))
             else:
-                i, j = (p_i, p_j)
-            C[i, j] = C[i, j] + valor
+                if indice < 0:
+                    indice += dimensao
+                faixas.append((indice, indice + 1))
+        (i0, i1), (j0, j1) = faixas
 
+        C = self._nova(i1 - i0, j1 - j0)
+        indice_linhas = self._indice_logico(True)
+        indice_colunas = self._indice_logico(False)
+        if indice_linhas is None:
+            elementos = (
+                ((a_i, a_j), valor)
+                for (a_i, a_j), valor in self._itens_logicos()
+                if i0 <= a_i < i1 and j0 <= a_j < j1
+            )
+        elif j1 - j0 == 1:
+            elementos = (
+                ((a_i, j0), valor)
+                for a_i, valor in self.col(j0).items()
+                if i0 <= a_i < i1
+            )
+        else:
+            # Percorre só as linhas da faixa que têm elementos
+            if i1 - i0 < len(indice_linhas):
+                linhas = (a_i for a_i in range(i0, i1) if a_i in indice_linhas)
+            else:
+                linhas = (a_i for a_i in indice_linhas if i0 <= a_i < i1)
+            elementos = (
+                ((a_i, a_j), valor)
+                for a_i in linhas
+                for a_j, valor in self.row(a_i).items()
+                if j0 <= a_j < j1
+            )
+
+        for (a_i, a_j), valor in elementos:
+            C.data[a_i - i0, a_j - j0] = valor
+        return C
+
+    def __add__(self, B):
+        """
+        Retorna C = A + B
+        em O(ka + kb)
+        """
+        C = self._nova(self.n, B.m)
+        if (
+            isinstance(self.data, DicionarioCompacto)
+            and isinstance(B, MatrizEsparsaHash)
+            and isinstance(B.data, DicionarioCompacto)
+            and B.eh_transposta == self.eh_transposta
+            and B.data.colunas == self.data.colunas
+        ):
+            # Mesma codificação nos dois: soma direto pelos códigos
+            C.eh_transposta = self.eh_transposta
+            C.data = self.data.somado(B.data)
+            return C
+
+        # Soma num dicionário local com as posições físicas de C, sem passar
+        # por __setitem__ (C é nova: não tem índices nem quem a compartilhe).
+        # A chave compacta é sempre lógica; o dicionário comum segue A
+        comum = not isinstance(C.data, DicionarioCompacto)
+        transposta = self.eh_transposta and comum
+
+        # Copia os elementos de A em tempo O(ka)
+        if transposta == self.eh_transposta:
+            soma = dict(self.data.items())
+        else:
+            soma = {(p_j, p_i): valor for (p_i, p_j), valor in self.data.items()}
+
+        # Soma com os elementos de B em tempo O(kb)
+        if B.eh_transposta == transposta:
+            for chave, valor in B.data.items():
+                soma[chave] = soma.get(chave, 0) + valor
+        else:
+            for (p_i, p_j), valor in B.data.items():
+                chave = (p_j, p_i)
+                soma[chave] = soma.get(chave, 0) + valor
+
+        C.eh_transposta = transposta
+        if comum:
+            C.data = {chave: valor for chave, valor in soma.items() if valor != 0}
+        else:
+            colunas = C.data.colunas
+            for (i, j), valor in soma.items():
+                if valor != 0:
+                    C.data.definir(i * colunas + j, valor)
         return C
 
     def __mul__(self, escalar):
@@ -69,6 +747,10 @@ class MatrizEsparsaHash:
         """
         C = MatrizEsparsaHash(self.n, self.m)
         C.eh_transposta = self.eh_transposta
+        if isinstance(self.data, DicionarioCompacto):
+            C.data = self.data.escalado(escalar)
+            return C
+
         for (i, j), valor in self.data.items():
             C.data[i, j] = valor * escalar
 
@@ -81,6 +763,69 @@ class MatrizEsparsaHash:
         """
         return self.__mul__(escalar)
 
+    def axpy(self, alpha, B):
+        """
+        Faz A = A + alpha * B no próprio A, sem criar matrizes intermediárias.
+        Transpostas e snapshots de A tirados antes não mudam (cópia na escrita)
+        em O(kb) esperado
+        """
+        if self.n != B.n or self.m != B.m:
+            raise ValueError("Matrizes devem ter mesmas dimensões")
+
+        # Se B compartilha o dicionário de A (ex.: A += A.transpor()), lemos
+        # uma cópia dos itens para não alterar o dicionário durante a iteração
+        itens_B = B.data.items()
+        if B.data is self.data:
+            itens_B = list(itens_B)
+
+        self._preparar_escrita()
+
+        # Converte a posição física em B para a posição física em A
+        inverter = B.eh_transposta != self.eh_transposta
+        for (p_i, p_j), valor in itens_B:
+            chave = (p_j, p_i) if inverter else (p_i, p_j)
+            atual = self.data.get(chave)
+            novo = (0 if atual is None else atual) + alpha * valor
+            if novo != 0:
+                if atual is None and self._indices:
+                    self._indexar(chave)
+                self.data[chave] = novo
+            elif atual is not None:
+                del self.data[chave]
+                if self._indices:
+                    self._desindexar(chave)
+        return self
+
+    def __iadd__(self, B):
+        """
+        A += B no próprio A
+        em O(kb) esperado
+        """
+        return self.axpy(1, B)
+
+    def __isub__(self, B):
+        """
+        A -= B no próprio A
+        em O(kb) esperado
+        """
+        return self.axpy(-1, B)
+
+    def __imul__(self, escalar):
+        """
+        A *= b no próprio A, sendo b um escalar
+        em O(ka)
+        """
+        self._preparar_escrita()
+        for chave in self.data:
+            self.data[chave] *= escalar
+
+        # Multiplicar por zero (ou um underflow) não pode deixar zeros guardados
+        for chave in [chave for chave, valor in self.data.items() if valor == 0]:
+            del self.data[chave]
+            if self._indices:
+                self._desindexar(chave)
+        return self
+
     def __matmul__(self, B):
         """
         Retorna C = A @ B
@@ -89,57 +834,246 @@ class MatrizEsparsaHash:
         if self.m != B.n:
             raise ValueError("Dimensões incompatíveis para multiplicação")
 
+        if np is not None and isinstance(B, MatrizEsparsaHash):
+            C = self._matmul_vetorizado(B)
+            if C is not None:
+                return C
+
         # C é a matriz de resultado
-        C = MatrizEsparsaHash(self.n, B.m)
-
-        # Criamos um dicionário para acesso rápido às linhas de B
-        # em O(kb) esperado
-        # Estrutura: {indice_linha -> {indice_coluna: valor, ...}}
-        B_por_linha = {}
-        for (p_i_B, p_j_B), val_B in B.data.items():
-            if B.eh_transposta:
-                b_i, b_j = p_j_B, p_i_B
-            else:
-                b_i, b_j = p_i_B, p_j_B
+        C = self._nova(self.n, B.m)
 
-            # Adiciona ao dicionário de linhas
-            if b_i not in B_por_linha:
-                B_por_linha[b_i] = {}
-            B_por_linha[b_i][b_j] = val_B
+        # Linhas de A e de B agrupadas, reaproveitadas do cache enquanto as
+        # matrizes não mudarem (ex.: o mesmo B em várias multiplicações)
+        # em O(ka + kb) esperado na primeira vez e O(1) depois
+        A_por_linha = self._por_linha()
+        if isinstance(B, MatrizEsparsaHash):
+            linha_de_B = B._por_linha().get
+        else:
+            # B de outra estrutura: agrupa sem passar pelo cache dela
+            linha_de_B = MatrizEsparsaHash._agrupar_por_linha(B).get
 
-        # Itera sobre A e usa o dicionário de linhas de B
+        # Calcula C uma linha por vez (Gustavson): os produtos parciais da
+        # linha i vão para um acumulador que é esvaziado a cada linha, e C só
+        # é escrita uma vez por elemento
         # em O(ka * db) esperado
+        acumulador = {}
+        for a_i, linha_A in A_por_linha.items():
+            for a_j, val_A in linha_A.items():
+                # Agora, A[i, j] é multiplicado por todos os elementos da linha 'a_j' de B.
+                # Usamos nosso mapa para pegar a linha 'a_j' de B em O(1) esperado
+                linha_B = linha_de_B(a_j)
+                if linha_B:
+                    # Itera apenas pelos dB elementos dessa linha
+                    for b_k, val_B_k in linha_B.items():
+                        # C[i, k] = C[i, k] + A[i, j] * B[j, k]
+                        acumulador[b_k] = acumulador.get(b_k, 0) + (val_A * val_B_k)
+
+            for b_k, valor in acumulador.items():
+                if valor != 0:
+                    C.data[a_i, b_k] = valor
+            acumulador.clear()
 
-        for (p_i_A, p_j_A), val_A in self.data.items():
+        return C
+
+    def _por_linha(self):
+        """
+        Agrupa os elementos por linha lógica, preservando a ordem de self.data
+        dentro de cada linha, e guarda o resultado no cache. O agrupamento por
+        colunas é o mesmo artefato visto pela transposta
+        em O(k) esperado na primeira chamada e O(1) depois
+        Estrutura: {indice_linha -> {indice_coluna: valor, ...}}
+        """
+        return self._cache.obter(
+            ("por_linha", self.eh_transposta), self._agrupar_por_linha
+        )
+
+    def _agrupar_por_linha(self):
+        por_linha = {}
+        for (p_i, p_j), valor in self.data.items():
             if self.eh_transposta:
-                a_i, a_j = p_j_A, p_i_A
+                i, j = p_j, p_i
             else:
-                a_i, a_j = p_i_A, p_j_A
+                i, j = p_i, p_j
 
-            # Agora, A[i, j] é multiplicado por todos os elementos da linha 'a_j' de B.
-            # Usamos nosso mapa para pegar a linha 'a_j' de B em O(1) esperado
-            if a_j in B_por_linha:
-                # coluna_B_j contém {k: B[j, k], ...}
-                coluna_B_j = B_por_linha[a_j]
+            if i not in por_linha:
+                por_linha[i] = {}
+            por_linha[i][j] = valor
+        return por_linha
 
-                # Itera apenas pelos dB elementos dessa linha
-                for b_k, val_B_k in coluna_B_j.items():
-                    # C[i, k] = C[i, k] + A[i, j] * B[j, k]
-                    C[a_i, b_k] = C[a_i, b_k] + (val_A * val_B_k)
+    def _coordenadas(self):
+        """
+        Exporta os elementos para arranjos NumPy (linhas, colunas, valores) já
+        com as coordenadas lógicas, na ordem de iteração de self.data, e guarda
+        os arranjos no cache
+        em O(k) na primeira chamada e O(1) depois
+        """
+        return self._cache.obter(
+            ("coordenadas", self.eh_transposta), self._exportar_coordenadas
+        )
 
+    def _exportar_coordenadas(self):
+        data = self.data
+        if isinstance(data, DicionarioCompacto):
+            # Decodifica as posições de uma vez, sem passar por tuplas
+            if data.valores is None:
+                valores = _arranjo_numerico(list(data.codigos.values()))
+            elif data.codigos:
+                posicoes = np.fromiter(data.codigos.values(), np.int64, len(data.codigos))
+                valores = np.frombuffer(data.valores, data.valores.typecode)[posicoes]
+            else:
+                valores = None
+            if valores is None:
+                return None
+            codigos = np.fromiter(data.codigos, np.int64, len(data.codigos))
+            p_i, p_j = np.divmod(codigos, data.colunas)
+            if self.eh_transposta:
+                return p_j, p_i, valores
+            return p_i, p_j, valores
+
+        valores = _arranjo_numerico(list(self.data.values()))
+        if valores is None:
+            return None
+        # As tuplas achatadas direto num arranjo, sem uma lista intermediária
+        chaves = np.fromiter(
+            chain.from_iterable(self.data), np.int64, 2 * len(self.data)
+        ).reshape(-1, 2)
+        if self.eh_transposta:
+            return chaves[:, 1], chaves[:, 0], valores
+        return chaves[:, 0], chaves[:, 1], valores
+
+    def _coordenadas_por_linha(self):
+        """
+        Colunas e valores agrupados por linha lógica sem mudar a ordem dentro
+        de cada linha (como em _por_linha), com o tamanho e o início de cada
+        linha, guardados no cache
+        em O(k log k) na primeira chamada e O(1) depois
+        """
+        return self._cache.obter(
+            ("coordenadas_por_linha", self.eh_transposta), self._ordenar_coordenadas
+        )
+
+    def _ordenar_coordenadas(self):
+        coords = self._coordenadas()
+        if coords is None:
+            return None
+        linhas, colunas, valores = coords
+        ordem = np.argsort(linhas, kind="stable")
+        tamanhos = np.bincount(linhas, minlength=self.n)
+        return colunas[ordem], valores[ordem], tamanhos, np.cumsum(tamanhos) - tamanhos
+
+    def _matmul_vetorizado(self, B):
+        """
+        Retorna C = A @ B por expansão, ordenação e redução por segmentos, ou
+        None se os valores não puderem ser tratados pelo NumPy sem mudar o
+        resultado (tipos mistos ou risco de estouro de int64)
+        em O(ka + kb + f log f), sendo f o número de produtos parciais
+        """
+        coords_A = self._coordenadas()
+        linhas_B = B._coordenadas_por_linha()
+        if coords_A is None or linhas_B is None:
+            return None
+        a_i, a_k, val_A = coords_A
+        b_j, val_B, tamanho_linha_B, inicio_linha_B = linhas_B
+
+        # Expande cada A[i, k] contra todos os elementos da linha k de B
+        repeticoes = tamanho_linha_B[a_k]
+        total = int(repeticoes.sum())
+        if total == 0:
+            return self._nova(self.n, B.m)
+
+        if val_A.dtype.kind == "i" and val_B.dtype.kind == "i":
+            limite = int(np.abs(val_A).max()) * int(np.abs(val_B).max()) * total
+            if limite >= 2**63:
+                return None
+
+        origem_A = np.repeat(np.arange(len(a_i)), repeticoes)
+        deslocamento = np.arange(total) - np.repeat(
+            np.cumsum(repeticoes) - repeticoes, repeticoes
+        )
+        origem_B = np.repeat(inicio_linha_B[a_k], repeticoes) + deslocamento
+
+        c_i = a_i[origem_A]
+        c_j = b_j[origem_B]
+        produtos = val_A[origem_A] * val_B[origem_B]
+
+        # Ordenação estável por (i, j) preserva a ordem de acumulação original
+        chave = c_i * B.m + c_j
+        ordem = np.argsort(chave, kind="stable")
+        chave, produtos = chave[ordem], produtos[ordem]
+        inicios = np.flatnonzero(np.r_[True, chave[1:] != chave[:-1]])
+        tamanhos = np.diff(np.r_[inicios, total])
+        somas = _somar_segmentos(produtos, inicios, tamanhos)
+
+        chave = chave[inicios]
+        nao_nulos = somas != 0
+        chave, somas = chave[nao_nulos], somas[nao_nulos]
+
+        C = self._nova(self.n, B.m)
+        if isinstance(C.data, DicionarioCompacto):
+            # A chave usada na ordenação já é o código de C
+            C.data = DicionarioCompacto.de_arranjos(B.m, chave, somas, C.data.tipo)
+            return C
+        C.data = dict(
+            zip(
+                zip((chave // B.m).tolist(), (chave % B.m).tolist()),
+                somas.tolist(),
+            )
+        )
         return C
 
     def transpor(self):
         """
-        Retorna a matriz A "transposta"
+        Retorna a matriz A "transposta". Ela lê o mesmo armazenamento de A, com
+        os índices invertidos, até que uma das duas seja escrita: escrever na
+        transposta não altera A, nem o contrário (cópia na escrita)
         em O(1)
         """
-        # Cria uma cópia com as instâncias invertidas
         transposta = MatrizEsparsaHash(self.m, self.n)
-        transposta.data = self.data
+        self._compartilhar(transposta)
         transposta.eh_transposta = not self.eh_transposta
         return transposta
 
+    def _visao_linhas(self):
+        """
+        Visão comprimida por linhas lógicas, guardada no cache até a próxima
+        alteração da matriz
+        em O(k + r log r) na primeira chamada e O(1) depois
+        """
+        return self._cache.obter(
+            ("linhas", self.eh_transposta),
+            lambda: VisaoLinhas.de_itens(self.data.items(), self.eh_transposta),
+        )
+
+    def dot(self, x):
+        """
+        Retorna A @ x para um vetor denso x (lista, array ou NumPy 1-D), ou
+        A @ X para um bloco denso X com várias colunas (lista de linhas ou
+        NumPy 2-D), no mesmo formato da entrada
+        em O(k) por vetor, reaproveitando a visão por linhas entre chamadas
+        """
+        return multiplicar_denso(self._visao_linhas(), self.n, self.m, x)
+
+    def save(self, path):
+        """
+        Grava a matriz no formato binário de persistencia (arranjos CSR
+        ordenados)
+        em O(k log k + n)
+        """
+        from persistencia import salvar
+
+        salvar(self, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Abre uma matriz gravada com save(). Com mmap=True o arquivo é mapeado e
+        devolvido como MatrizEsparsaCSR somente leitura, sem montar o
+        dicionário; com mmap=False retorna uma MatrizEsparsaHash
+        """
+        from persistencia import carregar
+
+        return carregar(path, mmap, cls)
+
     def imprimir_matriz_hash(self):
         """
         Imprime o estado interno real da matriz
@@ -1,16 +1,72 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from cache_derivado import CacheDerivado
+from produto_denso import VisaoLinhas, multiplicar_denso
+
+
 class No:
-    def __init__(self, chave: tuple[int, int], valor: int | float) -> None:
+    __slots__ = ("chave", "valor", "esquerda", "direita", "altura", "dono")
+
+    def __init__(
+        self, chave: tuple[int, int], valor: int | float, dono: object = None
+    ) -> None:
         self.chave: tuple[int, int] = chave
         self.valor: int | float = valor
         self.esquerda: No | None = None
         self.direita: No | None = None
         self.altura: int = 1
+        # Marca da árvore que pode alterar este nó no lugar (ver Arvore.copiar)
+        self.dono: object = dono
 
 
 class Arvore:
+    """
+    Árvore AVL com busca, inserção, remoção e percurso iterativos (pilha de
+    caminho explícita). A versão recursiva original está em arvore_referencia
+    e é comparada com esta em tests/test_estrutura2.py. A árvore é persistente
+    por cópia de caminho: copiar() é O(1) e as duas árvores passam a
+    compartilhar os nós; uma escrita copia só os nós que altera (o caminho da
+    raiz até a chave e os das rotações), em O(log k)
+    """
+
+    # Fração b/k de um lote a partir da qual reconstruir a árvore sai mais
+    # barato que aplicar o lote chave a chave (medido: ~15 us por chave contra
+    # ~4 us por item reconstruído)
+    FRACAO_RECONSTRUCAO: float = 0.25
+
     def __init__(self) -> None:
         self.raiz: No | None = None
         self.tamanho: int = 0
+        # Nós com outra marca podem ser vistos por outra árvore e são copiados
+        # antes de qualquer alteração
+        self.dono: object = object()
+
+    def _proprio(self, no: No) -> No:
+        """
+        O próprio nó, se esta árvore pode alterá-lo, ou uma cópia dele que ela
+        pode (com os mesmos filhos)
+        em O(1)
+        """
+        if no.dono is self.dono:
+            return no
+        copia: No = No(no.chave, no.valor, self.dono)
+        copia.esquerda = no.esquerda
+        copia.direita = no.direita
+        copia.altura = no.altura
+        return copia
+
+    def copiar(self) -> "Arvore":
+        """
+        Cópia independente em O(1): as duas árvores compartilham todos os nós
+        atuais e cada uma copia, ao escrever, só o caminho que altera
+        """
+        copia: Arvore = Arvore()
+        copia.raiz = self.raiz
+        copia.tamanho = self.tamanho
+        # Os nós atuais deixam de ser exclusivos desta árvore também
+        self.dono = object()
+        return copia
 
     def _altura(self, no: No | None) -> int:
         if no is None:
@@ -27,7 +83,8 @@ class Arvore:
             no.altura = 1 + max(self._altura(no.esquerda), self._altura(no.direita))
 
     def _rotacao_direita(self, y: No) -> No:
-        x: No = y.esquerda  # type: ignore
+        y = self._proprio(y)
+        x: No = self._proprio(y.esquerda)  # type: ignore
         B: No | None = x.direita
         x.direita = y
         y.esquerda = B
@@ -36,7 +93,8 @@ class Arvore:
         return x
 
     def _rotacao_esquerda(self, x: No) -> No:
-        y: No = x.direita  # type: ignore
+        x = self._proprio(x)
+        y: No = self._proprio(x.direita)  # type: ignore
         B: No | None = y.esquerda
         y.esquerda = x
         x.direita = B
@@ -64,89 +122,675 @@ class Arvore:
 
         return no
 
-    def _inserir_recursivo(
-        self, no: No | None, chave: tuple[int, int], valor: int | float
-    ) -> No:
+    def _rebalancear_caminho(self, caminho: list, filho: No | None) -> None:
+        """
+        Religa 'filho' ao último nó do caminho e sobe balanceando; para assim
+        que uma subárvore mantém a mesma raiz e a mesma altura
+        """
+        while caminho:
+            no, pela_esquerda = caminho.pop()
+            if pela_esquerda:
+                no.esquerda = filho
+            else:
+                no.direita = filho
+
+            altura_antiga: int = no.altura
+            filho = self._balancear(no)
+            if filho is no and no.altura == altura_antiga:
+                return
+
+        self.raiz = filho
+
+    def inserir(self, chave: tuple[int, int], valor: int | float) -> bool:
+        """
+        Insere ou atualiza a chave; retorna True se ela não existia
+        """
+        caminho: list = []
+        no: No | None = self._raiz_propria()
+        while no is not None:
+            if chave < no.chave:
+                caminho.append((no, True))
+                no = self._filho_proprio(no, True)
+            elif chave > no.chave:
+                caminho.append((no, False))
+                no = self._filho_proprio(no, False)
+            else:
+                no.valor = valor
+                return False
+
+        self.tamanho += 1
+        self._rebalancear_caminho(caminho, No(chave, valor, self.dono))
+        return True
+
+    def _raiz_propria(self) -> No | None:
+        if self.raiz is not None and self.raiz.dono is not self.dono:
+            self.raiz = self._proprio(self.raiz)
+        return self.raiz
+
+    def _filho_proprio(self, no: No, pela_esquerda: bool) -> No | None:
+        """
+        Filho de 'no' (que já é desta árvore), trocado por uma cópia própria
+        se for compartilhado
+        """
+        filho: No | None = no.esquerda if pela_esquerda else no.direita
+        if filho is not None and filho.dono is not self.dono:
+            filho = self._proprio(filho)
+            if pela_esquerda:
+                no.esquerda = filho
+            else:
+                no.direita = filho
+        return filho
+
+    def _buscar_no(self, chave: tuple[int, int]) -> No | None:
+        no: No | None = self.raiz
+        while no is not None:
+            if chave < no.chave:
+                no = no.esquerda
+            elif chave > no.chave:
+                no = no.direita
+            else:
+                return no
+        return None
+
+    def buscar(self, chave: tuple[int, int]) -> int | float | None:
+        no: No | None = self._buscar_no(chave)
+        return no.valor if no else None
+
+    def contem(self, chave: tuple[int, int]) -> bool:
+        return self._buscar_no(chave) is not None
+
+    def remover(self, chave: tuple[int, int]) -> bool:
+        """
+        Remove a chave, se existir, numa única descida; retorna se removeu
+        """
+        caminho: list = []
+        no: No | None = self._raiz_propria()
+        while no is not None and chave != no.chave:
+            pela_esquerda: bool = chave < no.chave
+            caminho.append((no, pela_esquerda))
+            no = self._filho_proprio(no, pela_esquerda)
+
         if no is None:
-            self.tamanho += 1
-            return No(chave, valor)
+            return False
+        self.tamanho -= 1
 
-        if chave < no.chave:
-            no.esquerda = self._inserir_recursivo(no.esquerda, chave, valor)
-        elif chave > no.chave:
-            no.direita = self._inserir_recursivo(no.direita, chave, valor)
+        if no.esquerda is not None and no.direita is not None:
+            # Copia o sucessor para o nó e passa a remover o sucessor, que não
+            # tem filho à esquerda
+            caminho.append((no, False))
+            sucessor: No = self._filho_proprio(no, False)  # type: ignore
+            while sucessor.esquerda is not None:
+                caminho.append((sucessor, True))
+                sucessor = self._filho_proprio(sucessor, True)  # type: ignore
+            no.chave = sucessor.chave
+            no.valor = sucessor.valor
+            no = sucessor
+
+        filho: No | None = no.esquerda if no.esquerda is not None else no.direita
+        self._rebalancear_caminho(caminho, filho)
+        return True
+
+    def somar(self, chave: tuple[int, int], valor: int | float) -> None:
+        """
+        Soma valor ao elemento da chave, inserindo se não existir e removendo
+        se o resultado for zero
+        """
+        no: No | None = self._buscar_no(chave)
+        if no is None:
+            if valor != 0:
+                self.inserir(chave, valor)
+        elif no.valor + valor == 0:
+            self.remover(chave)
+        elif no.dono is self.dono:
+            no.valor = no.valor + valor
         else:
-            no.valor = valor
-            return no
+            # Nó compartilhado: a atualização copia o caminho
+            self.inserir(chave, no.valor + valor)
 
-        return self._balancear(no)
+    def aplicar_lote(self, lote: list) -> tuple[int, int, int]:
+        """
+        Aplica [(chave, valor)] (valor nulo remove) chave a chave e retorna
+        (inseridos, atualizados, removidos)
+        em O(b log k)
+        """
+        inseridos = atualizados = removidos = 0
+        for chave, valor in lote:
+            if valor != 0:
+                if self.inserir(chave, valor):
+                    inseridos += 1
+                else:
+                    atualizados += 1
+            elif self.remover(chave):
+                removidos += 1
+        return (inseridos, atualizados, removidos)
 
-    def inserir(self, chave: tuple[int, int], valor: int | float) -> None:
-        self.raiz = self._inserir_recursivo(self.raiz, chave, valor)
+    def multiplicar_valores(self, escalar: int | float) -> None:
+        """
+        Multiplica todos os valores no lugar, sem mudar a forma da árvore;
+        elementos que viram zero são removidos depois
+        em O(k)
+        """
+        zerados: list = []
+        raiz: No | None = self._raiz_propria()
+        pilha: list = [raiz] if raiz is not None else []
+        while pilha:
+            no: No = pilha.pop()
+            no.valor = no.valor * escalar
+            if no.valor == 0:
+                zerados.append(no.chave)
+            # Nós compartilhados são copiados antes de mudar
+            if no.esquerda is not None:
+                pilha.append(self._filho_proprio(no, True))
+            if no.direita is not None:
+                pilha.append(self._filho_proprio(no, False))
 
-    def _buscar_recursivo(self, no: No | None, chave: tuple[int, int]) -> No | None:
-        if no is None:
+        if len(zerados) == self.tamanho:
+            self.raiz = None
+            self.tamanho = 0
+            return
+        for chave in zerados:
+            self.remover(chave)
+
+    def _construir_balanceada(
+        self, itens: list, inicio: int, fim: int
+    ) -> No | None:
+        if inicio >= fim:
             return None
 
-        if chave < no.chave:
-            return self._buscar_recursivo(no.esquerda, chave)
-        elif chave > no.chave:
-            return self._buscar_recursivo(no.direita, chave)
-        else:
-            return no
+        meio: int = (inicio + fim) // 2
+        chave, valor = itens[meio]
+        no: No = No(chave, valor, self.dono)
+        no.esquerda = self._construir_balanceada(itens, inicio, meio)
+        no.direita = self._construir_balanceada(itens, meio + 1, fim)
+        self._atualizar_altura(no)
+        return no
+
+    @classmethod
+    def de_itens_ordenados(cls, itens: list) -> "Arvore":
+        """
+        Constrói uma árvore perfeitamente balanceada a partir de uma lista de
+        (chave, valor) com chaves estritamente crescentes, sem rotações
+        em O(k)
+        """
+        arvore: Arvore = cls()
+        arvore.raiz = arvore._construir_balanceada(itens, 0, len(itens))
+        arvore.tamanho = len(itens)
+        return arvore
+
+    def items(self):
+        # Percurso em ordem com pilha explícita, sem geradores aninhados
+        pilha: list = []
+        no: No | None = self.raiz
+        while pilha or no is not None:
+            while no is not None:
+                pilha.append(no)
+                no = no.esquerda
+            no = pilha.pop()
+            yield (no.chave, no.valor)
+            no = no.direita
+
+    def intervalo(self, inicio: tuple[int, int], fim: tuple[int, int]):
+        """
+        Itens com inicio <= chave < fim, em ordem crescente, descendo apenas
+        pelos ramos que podem conter chaves do intervalo
+        em O(log k + saída)
+        """
+        pilha: list = []
+        no: No | None = self.raiz
+        while pilha or no is not None:
+            while no is not None:
+                if no.chave < inicio:
+                    # Toda a subárvore esquerda fica antes do intervalo
+                    no = no.direita
+                else:
+                    pilha.append(no)
+                    no = no.esquerda
+            if not pilha:
+                return
+            no = pilha.pop()
+            if no.chave >= fim:
+                return
+            yield (no.chave, no.valor)
+            no = no.direita
+
+    def assumir(self, outra: "Arvore") -> None:
+        """
+        Passa a ter o conteúdo de outra árvore, mantendo a identidade do objeto
+        (quem compartilha esta árvore vê a mudança)
+        """
+        self.raiz = outra.raiz
+        self.tamanho = outra.tamanho
+        self.dono = outra.dono
+
+    def __len__(self) -> int:
+        return self.tamanho
+
+
+# Máximo de chaves por nó da ArvoreBMais; todo nó fora a raiz fica com pelo
+# menos a metade disso
+ORDEM_B_MAIS = 64
+
+# A ArvoreBMais guarda a chave (i, j) como o inteiro (i << 32) | j, que tem a
+# mesma ordem da tupla para 0 <= j < 2**32
+_BITS_COLUNA = 32
+_MASCARA_COLUNA = (1 << _BITS_COLUNA) - 1
+
+
+def _codificar(chave: tuple[int, int]) -> int:
+    i, j = chave
+    return (i << _BITS_COLUNA) | j
+
+
+class FolhaBMais:
+    __slots__ = ("chaves", "valores", "proxima")
+
+    def __init__(self, chaves: array, valores: list) -> None:
+        self.chaves: array = chaves
+        self.valores: list = valores
+        self.proxima: FolhaBMais | None = None
+
+
+class NoInternoBMais:
+    # chaves[i] é a menor chave da subárvore filhos[i + 1]
+    __slots__ = ("chaves", "filhos")
+
+    def __init__(self, chaves: array, filhos: list) -> None:
+        self.chaves: array = chaves
+        self.filhos: list = filhos
+
+
+def _repartir(total: int, capacidade: int) -> list:
+    """
+    Tamanhos de ceil(total / capacidade) grupos consecutivos que somam
+    total, o mais parecidos possível
+    """
+    grupos: int = max(1, -(-total // capacidade))
+    base, sobra = divmod(total, grupos)
+    return [base + 1 if g < sobra else base for g in range(grupos)]
+
+
+class ArvoreBMais:
+    """
+    Árvore B+ com a mesma interface da Arvore AVL. Cada nó guarda até
+    ORDEM_B_MAIS chaves codificadas como inteiros num array('q') contíguo,
+    percorrido com bisect, e só as folhas têm valores; as folhas são
+    encadeadas, então percursos e intervalos andam de folha em folha sem
+    pilha. A altura fica em O(log k / log ORDEM), bem menor que a da AVL, e não
+    há um objeto nem uma tupla guardada por elemento. Índices devem caber em
+    0 <= j < 2**32 e 0 <= i < 2**31
+    Complexidades: busca, inserção e remoção em O(log k); percurso em O(k)
+    """
+
+    # Inserções pontuais são baratas aqui (~4 us): só lotes maiores que a
+    # própria árvore compensam a reconstrução
+    FRACAO_RECONSTRUCAO: float = 2.0
+
+    def __init__(self) -> None:
+        self.raiz: FolhaBMais | NoInternoBMais = FolhaBMais(array("q"), [])
+        self.tamanho: int = 0
+
+    def _descer(self, codigo: int, caminho: list | None = None) -> FolhaBMais:
+        """
+        Folha em que o código está ou entraria; se 'caminho' é dado, recebe os
+        pares (nó interno, índice do filho seguido)
+        """
+        no = self.raiz
+        while type(no) is NoInternoBMais:
+            indice: int = bisect_right(no.chaves, codigo)
+            if caminho is not None:
+                caminho.append((no, indice))
+            no = no.filhos[indice]
+        return no
 
     def buscar(self, chave: tuple[int, int]) -> int | float | None:
-        no: No | None = self._buscar_recursivo(self.raiz, chave)
-        return no.valor if no else None
+        codigo: int = _codificar(chave)
+        folha: FolhaBMais = self._descer(codigo)
+        pos: int = bisect_left(folha.chaves, codigo)
+        if pos < len(folha.chaves) and folha.chaves[pos] == codigo:
+            return folha.valores[pos]
+        return None
 
     def contem(self, chave: tuple[int, int]) -> bool:
-        return self._buscar_recursivo(self.raiz, chave) is not None
+        return self.buscar(chave) is not None
 
-    def _no_minimo(self, no: No) -> No:
-        atual: No = no
-        while atual.esquerda is not None:
-            atual = atual.esquerda
-        return atual
+    def inserir(self, chave: tuple[int, int], valor: int | float) -> bool:
+        """
+        Insere ou atualiza a chave; retorna True se ela não existia
+        """
+        codigo: int = _codificar(chave)
+        caminho: list = []
+        folha: FolhaBMais = self._descer(codigo, caminho)
+        pos: int = bisect_left(folha.chaves, codigo)
+        if pos < len(folha.chaves) and folha.chaves[pos] == codigo:
+            folha.valores[pos] = valor
+            return False
 
-    def _remover_recursivo(self, no: No | None, chave: tuple[int, int]) -> No | None:
-        if no is None:
-            return no
+        folha.chaves.insert(pos, codigo)
+        folha.valores.insert(pos, valor)
+        self.tamanho += 1
+        if len(folha.chaves) > ORDEM_B_MAIS:
+            self._dividir(folha, caminho)
+        return True
+
+    def _dividir(self, folha: FolhaBMais, caminho: list) -> None:
+        """
+        Divide a folha cheia ao meio e sobe dividindo os nós internos que
+        estourarem, criando uma nova raiz se preciso
+        em O(ORDEM_B_MAIS * altura)
+        """
+        meio: int = len(folha.chaves) // 2
+        nova = FolhaBMais(folha.chaves[meio:], folha.valores[meio:])
+        del folha.chaves[meio:]
+        del folha.valores[meio:]
+        nova.proxima = folha.proxima
+        folha.proxima = nova
+        separador: int = nova.chaves[0]
+        direito: FolhaBMais | NoInternoBMais = nova
+
+        while caminho:
+            pai, indice = caminho.pop()
+            pai.chaves.insert(indice, separador)
+            pai.filhos.insert(indice + 1, direito)
+            if len(pai.chaves) <= ORDEM_B_MAIS:
+                return
+            meio = len(pai.chaves) // 2
+            separador = pai.chaves[meio]
+            direito = NoInternoBMais(pai.chaves[meio + 1:], pai.filhos[meio + 1:])
+            del pai.chaves[meio:]
+            del pai.filhos[meio + 1:]
 
-        if chave < no.chave:
-            no.esquerda = self._remover_recursivo(no.esquerda, chave)
-        elif chave > no.chave:
-            no.direita = self._remover_recursivo(no.direita, chave)
+        self.raiz = NoInternoBMais(array("q", [separador]), [self.raiz, direito])
+
+    def remover(self, chave: tuple[int, int]) -> bool:
+        """
+        Remove a chave, se existir; retorna se removeu
+        """
+        codigo: int = _codificar(chave)
+        caminho: list = []
+        folha: FolhaBMais = self._descer(codigo, caminho)
+        pos: int = bisect_left(folha.chaves, codigo)
+        if pos == len(folha.chaves) or folha.chaves[pos] != codigo:
+            return False
+
+        del folha.chaves[pos]
+        del folha.valores[pos]
+        self.tamanho -= 1
+        self._corrigir_falta(folha, caminho)
+        return True
+
+    def _corrigir_falta(self, no, caminho: list) -> None:
+        """
+        Sobe a partir de um nó que pode ter ficado com menos da metade das
+        chaves: empresta uma chave de um irmão ou funde com ele, o que pode
+        esvaziar o pai; a raiz interna com um único filho é descartada
+        em O(ORDEM_B_MAIS * altura)
+        """
+        minimo: int = ORDEM_B_MAIS // 2
+        while caminho and len(no.chaves) < minimo:
+            pai, indice = caminho.pop()
+            esquerdo = pai.filhos[indice - 1] if indice > 0 else None
+            direito = pai.filhos[indice + 1] if indice + 1 < len(pai.filhos) else None
+            folha: bool = type(no) is FolhaBMais
+
+            if esquerdo is not None and len(esquerdo.chaves) > minimo:
+                if folha:
+                    no.chaves.insert(0, esquerdo.chaves.pop())
+                    no.valores.insert(0, esquerdo.valores.pop())
+                    pai.chaves[indice - 1] = no.chaves[0]
+                else:
+                    no.chaves.insert(0, pai.chaves[indice - 1])
+                    pai.chaves[indice - 1] = esquerdo.chaves.pop()
+                    no.filhos.insert(0, esquerdo.filhos.pop())
+                return
+
+            if direito is not None and len(direito.chaves) > minimo:
+                if folha:
+                    no.chaves.append(direito.chaves.pop(0))
+                    no.valores.append(direito.valores.pop(0))
+                    pai.chaves[indice] = direito.chaves[0]
+                else:
+                    no.chaves.append(pai.chaves[indice])
+                    pai.chaves[indice] = direito.chaves.pop(0)
+                    no.filhos.append(direito.filhos.pop(0))
+                return
+
+            # Nenhum irmão pode emprestar: funde com um deles
+            if esquerdo is not None:
+                esquerdo, direito, indice = esquerdo, no, indice - 1
+            else:
+                esquerdo, direito = no, direito
+            if folha:
+                esquerdo.chaves.extend(direito.chaves)
+                esquerdo.valores.extend(direito.valores)
+                esquerdo.proxima = direito.proxima
+            else:
+                esquerdo.chaves.append(pai.chaves[indice])
+                esquerdo.chaves.extend(direito.chaves)
+                esquerdo.filhos.extend(direito.filhos)
+            del pai.chaves[indice]
+            del pai.filhos[indice + 1]
+            no = pai
+
+        if type(self.raiz) is NoInternoBMais and not self.raiz.chaves:
+            self.raiz = self.raiz.filhos[0]
+
+    def somar(self, chave: tuple[int, int], valor: int | float) -> None:
+        """
+        Soma valor ao elemento da chave, inserindo se não existir e removendo
+        se o resultado for zero
+        """
+        codigo: int = _codificar(chave)
+        caminho: list = []
+        folha: FolhaBMais = self._descer(codigo, caminho)
+        pos: int = bisect_left(folha.chaves, codigo)
+        if pos == len(folha.chaves) or folha.chaves[pos] != codigo:
+            if valor != 0:
+                self.inserir(chave, valor)
+        elif folha.valores[pos] + valor != 0:
+            folha.valores[pos] = folha.valores[pos] + valor
         else:
+            del folha.chaves[pos]
+            del folha.valores[pos]
             self.tamanho -= 1
+            self._corrigir_falta(folha, caminho)
 
-            if no.esquerda is None:
-                return no.direita
-            elif no.direita is None:
-                return no.esquerda
+    def aplicar_lote(self, lote: list) -> tuple[int, int, int]:
+        """
+        Aplica [(chave, valor)] em ordem crescente de chave (valor nulo
+        remove) e retorna (inseridos, atualizados, removidos). Chaves seguidas
+        que caem na mesma folha são tratadas nela, sem descer de novo; só
+        divisões e fusões obrigam a uma nova descida
+        em O(b log k), e bem menos descidas que b quando o lote é denso
+        """
+        minimo: int = ORDEM_B_MAIS // 2
+        inseridos = atualizados = removidos = 0
+        folha: FolhaBMais | None = None
+        caminho: list = []
+        limite: int | None = None
+        for chave, valor in lote:
+            codigo: int = _codificar(chave)
+            if folha is None or (limite is not None and codigo >= limite):
+                caminho = []
+                folha = self._descer(codigo, caminho)
+                # Primeiro separador à direita no caminho: fim da faixa da folha
+                limite = None
+                for pai, indice in reversed(caminho):
+                    if indice < len(pai.chaves):
+                        limite = pai.chaves[indice]
+                        break
 
-            sucessor: No = self._no_minimo(no.direita)
-            no.chave = sucessor.chave
-            no.valor = sucessor.valor
-            no.direita = self._remover_recursivo(no.direita, sucessor.chave)
+            chaves: array = folha.chaves
+            pos: int = bisect_left(chaves, codigo)
+            existe: bool = pos < len(chaves) and chaves[pos] == codigo
+            if valor != 0:
+                if existe:
+                    folha.valores[pos] = valor
+                    atualizados += 1
+                    continue
+                chaves.insert(pos, codigo)
+                folha.valores.insert(pos, valor)
+                self.tamanho += 1
+                inseridos += 1
+                if len(chaves) > ORDEM_B_MAIS:
+                    self._dividir(folha, caminho)
+                    folha = None
+            elif existe:
+                del chaves[pos]
+                del folha.valores[pos]
+                self.tamanho -= 1
+                removidos += 1
+                if len(chaves) < minimo and caminho:
+                    self._corrigir_falta(folha, caminho)
+                    folha = None
+        return (inseridos, atualizados, removidos)
 
-        return self._balancear(no)
+    def _primeira_folha(self) -> FolhaBMais:
+        no = self.raiz
+        while type(no) is NoInternoBMais:
+            no = no.filhos[0]
+        return no
 
-    def remover(self, chave: tuple[int, int]) -> None:
-        self.raiz = self._remover_recursivo(self.raiz, chave)
+    def multiplicar_valores(self, escalar: int | float) -> None:
+        """
+        Multiplica todos os valores no lugar, folha por folha; elementos que
+        viram zero são removidos depois
+        em O(k)
+        """
+        zerados: list = []
+        folha: FolhaBMais | None = self._primeira_folha()
+        while folha is not None:
+            valores: list = folha.valores
+            for pos in range(len(valores)):
+                valores[pos] = valores[pos] * escalar
+                if valores[pos] == 0:
+                    zerados.append(folha.chaves[pos])
+            folha = folha.proxima
 
-    def _iterar_inordem(self, no: No | None):
-        if no is not None:
-            yield from self._iterar_inordem(no.esquerda)
-            yield (no.chave, no.valor)
-            yield from self._iterar_inordem(no.direita)
+        if len(zerados) == self.tamanho:
+            self.assumir(ArvoreBMais())
+            return
+        for codigo in zerados:
+            self.remover(divmod(codigo, 1 << _BITS_COLUNA))
+
+    @classmethod
+    def de_itens_ordenados(cls, itens: list) -> "ArvoreBMais":
+        """
+        Constrói a árvore de baixo para cima a partir de uma lista de
+        (chave, valor) com chaves estritamente crescentes: folhas cheias e
+        encadeadas e, acima delas, níveis internos com o mesmo fator
+        em O(k)
+        """
+        arvore: ArvoreBMais = cls()
+        if not itens:
+            return arvore
+
+        nivel: list = []
+        primeiras: list = []
+        inicio: int = 0
+        anterior: FolhaBMais | None = None
+        for tamanho in _repartir(len(itens), ORDEM_B_MAIS):
+            bloco: list = itens[inicio:inicio + tamanho]
+            folha = FolhaBMais(
+                array("q", [_codificar(chave) for chave, _ in bloco]),
+                [valor for _, valor in bloco],
+            )
+            if anterior is not None:
+                anterior.proxima = folha
+            anterior = folha
+            nivel.append(folha)
+            primeiras.append(folha.chaves[0])
+            inicio += tamanho
+
+        while len(nivel) > 1:
+            acima: list = []
+            primeiras_acima: list = []
+            inicio = 0
+            for tamanho in _repartir(len(nivel), ORDEM_B_MAIS + 1):
+                acima.append(
+                    NoInternoBMais(
+                        primeiras[inicio + 1:inicio + tamanho],
+                        nivel[inicio:inicio + tamanho],
+                    )
+                )
+                primeiras_acima.append(primeiras[inicio])
+                inicio += tamanho
+            nivel, primeiras = acima, primeiras_acima
+
+        arvore.raiz = nivel[0]
+        arvore.tamanho = len(itens)
+        return arvore
 
     def items(self):
-        return self._iterar_inordem(self.raiz)
+        # Percorre as folhas encadeadas, sem pilha, decodificando as chaves
+        folha: FolhaBMais | None = self._primeira_folha()
+        while folha is not None:
+            for codigo, valor in zip(folha.chaves, folha.valores):
+                yield ((codigo >> _BITS_COLUNA, codigo & _MASCARA_COLUNA), valor)
+            folha = folha.proxima
+
+    def intervalo(self, inicio: tuple[int, int], fim: tuple[int, int]):
+        """
+        Itens com inicio <= chave < fim, em ordem crescente: uma descida até a
+        folha de inicio e depois só o encadeamento das folhas
+        em O(log k + saída)
+        """
+        codigo_inicio: int = _codificar(inicio)
+        codigo_fim: int = _codificar(fim)
+        folha: FolhaBMais | None = self._descer(codigo_inicio)
+        pos: int = bisect_left(folha.chaves, codigo_inicio)
+        while folha is not None:
+            chaves: array = folha.chaves
+            ate: int = bisect_left(chaves, codigo_fim, pos)
+            for p in range(pos, ate):
+                codigo: int = chaves[p]
+                yield (
+                    (codigo >> _BITS_COLUNA, codigo & _MASCARA_COLUNA),
+                    folha.valores[p],
+                )
+            if ate < len(chaves):
+                return
+            folha = folha.proxima
+            pos = 0
+
+    def copiar(self) -> "ArvoreBMais":
+        """
+        Cópia independente, nó a nó, com as folhas encadeadas de novo. As
+        folhas encadeadas impedem a cópia de caminho da AVL: copiar uma folha
+        obrigaria a copiar a anterior, e assim por diante
+        em O(k)
+        """
+        folhas: list = []
+
+        def copiar_no(no):
+            if type(no) is FolhaBMais:
+                folha = FolhaBMais(no.chaves[:], no.valores[:])
+                folhas.append(folha)
+                return folha
+            return NoInternoBMais(no.chaves[:], [copiar_no(filho) for filho in no.filhos])
+
+        copia: ArvoreBMais = ArvoreBMais()
+        copia.raiz = copiar_no(self.raiz)
+        copia.tamanho = self.tamanho
+        for anterior, folha in zip(folhas, folhas[1:]):
+            anterior.proxima = folha
+        return copia
+
+    def assumir(self, outra: "ArvoreBMais") -> None:
+        """
+        Passa a ter o conteúdo de outra árvore, mantendo a identidade do objeto
+        (quem compartilha esta árvore vê a mudança)
+        """
+        self.raiz = outra.raiz
+        self.tamanho = outra.tamanho
 
     def __len__(self) -> int:
         return self.tamanho
 
 
+# Implementações de árvore aceitas por MatrizEsparsaArvore
+ARVORES: dict = {"avl": Arvore, "bmais": ArvoreBMais}
+
+
 class MatrizEsparsaArvore:
     """
     Estrutura 2: Usa Árvore AVL balanceada para armazenar elementos não-nulos
@@ -154,18 +798,144 @@ class MatrizEsparsaArvore:
     - Memória: O(k)
     - Acesso A[i,j]: O(log k)
     - Inserção: O(log k)
-    - Transposta: O(1)
-    - Soma: O((ka + kb) log k)
+    - Transposta, snapshot() e copy(): O(1), com cópia na escrita; a primeira
+      escrita depois custa O(log k) na AVL e O(k) na ArvoreBMais
+    - Soma: O(ka + kb), ou O(k log k) se só um operando está transposto
     - Multiplicação escalar: O(k)
-    - Multiplicação matricial: O(ka * db * log kc)
+    - Multiplicação matricial: O(ka * db + kc log kc)
+    - Linha A[i, :]: O(log k + nnz da linha)
+    - Bloco A[i0:i1, j0:j1]: O(r log k + saída), r = linhas não vazias da faixa
+    A árvore é escolhida na construção: arvore="avl" (padrão) ou "bmais"
+    (ArvoreBMais, com os mesmos limites e nós largos)
     """
 
-    def __init__(self, n: int, m: int) -> None:
+    def __init__(self, n: int, m: int, arvore: str = "avl") -> None:
+        # Contador de modificações e estruturas derivadas de self.data,
+        # memoizadas contra ele (compartilhados com transpostas e snapshots
+        # até a primeira escrita)
+        self._cache: CacheDerivado = CacheDerivado()
+        if arvore not in ARVORES:
+            raise ValueError(f"arvore deve ser uma de {sorted(ARVORES)}")
         self.n: int = n
         self.m: int = m
-        self.data: Arvore = Arvore()
+        self.data: Arvore | ArvoreBMais = ARVORES[arvore]()
         self.eh_transposta: bool = False
 
+    @classmethod
+    def from_triplets(
+        cls,
+        n: int,
+        m: int,
+        triplas,
+        assume_sorted: bool = False,
+        duplicates: str = "sum",
+        arvore: str = "avl",
+    ) -> "MatrizEsparsaArvore":
+        """
+        Constrói a matriz a partir de triplas (i, j, valor) ordenando uma única
+        vez e montando a árvore já balanceada, sem rotações. Posições repetidas
+        são somadas (duplicates="sum") ou ficam com o último valor
+        (duplicates="last"); resultados nulos são descartados
+        em O(k log k), ou O(k) se assume_sorted
+        """
+        if duplicates not in ("sum", "last"):
+            raise ValueError("duplicates deve ser 'sum' ou 'last'")
+
+        if not assume_sorted:
+            # Ordenação estável: entre repetidas, a ordem de entrada se mantém
+            triplas = sorted(triplas, key=lambda tripla: (tripla[0], tripla[1]))
+
+        itens: list = []
+        chave_atual: tuple[int, int] | None = None
+        valor_atual: int | float = 0
+        for i, j, valor in triplas:
+            chave: tuple[int, int] = (i, j)
+            if chave == chave_atual:
+                valor_atual = valor_atual + valor if duplicates == "sum" else valor
+                continue
+            if chave_atual is not None:
+                if chave < chave_atual:
+                    raise ValueError("Triplas fora de ordem com assume_sorted=True")
+                if valor_atual != 0:
+                    itens.append((chave_atual, valor_atual))
+            chave_atual, valor_atual = chave, valor
+        if chave_atual is not None and valor_atual != 0:
+            itens.append((chave_atual, valor_atual))
+
+        A: MatrizEsparsaArvore = cls(n, m, arvore)
+        A.data = type(A.data).de_itens_ordenados(itens)
+        return A
+
+    @property
+    def versao(self) -> int:
+        """
+        Contador de modificações de self.data, compartilhado com as transpostas
+        e snapshots enquanto nenhum deles escreve
+        """
+        return self._cache.versao
+
+    def _compartilhar(self, outra: "MatrizEsparsaArvore") -> None:
+        """
+        Faz 'outra' ler a mesma árvore desta matriz, sem copiar; quem escrever
+        primeiro ganha a sua própria cópia
+        em O(1)
+        """
+        outra.data = self.data
+        outra._cache = self._cache
+        self._cache.usuarios += 1
+
+    def _preparar_escrita(self) -> None:
+        """
+        Chamado antes de toda escrita: se a árvore é compartilhada com
+        transpostas ou snapshots vivos, esta matriz passa a ter a sua própria
+        (cópia na escrita), e as outras não veem a mudança. Na AVL a cópia é
+        O(1) e a escrita copia só o caminho que altera. Depois registra a
+        modificação
+        em O(1), ou O(k) na primeira escrita da ArvoreBMais compartilhada
+        """
+        if self._cache.usuarios > 1:
+            self._cache = self._cache.separar()
+            self.data = self.data.copiar()
+        self._cache.invalidar()
+
+    def snapshot(self) -> "MatrizEsparsaArvore":
+        """
+        Retorna uma cópia de A que compartilha a árvore até a primeira escrita
+        em qualquer uma das duas, quando só quem escreve se separa
+        em O(1)
+        """
+        copia: MatrizEsparsaArvore = MatrizEsparsaArvore(self.n, self.m)
+        self._compartilhar(copia)
+        copia.eh_transposta = self.eh_transposta
+        return copia
+
+    def copy(self) -> "MatrizEsparsaArvore":
+        """
+        O mesmo que snapshot()
+        em O(1)
+        """
+        return self.snapshot()
+
+    def __del__(self) -> None:
+        # Deixa de contar como usuária da árvore compartilhada
+        self._cache.usuarios -= 1
+
+    @property
+    def arvore(self) -> str:
+        """
+        Nome da implementação de árvore usada ("avl" ou "bmais")
+        """
+        return next(nome for nome, tipo in ARVORES.items() if type(self.data) is tipo)
+
+    def _nova(self, n: int, m: int, itens: list | None = None) -> "MatrizEsparsaArvore":
+        """
+        Matriz com a mesma implementação de árvore desta, montada a partir de
+        itens em ordem estritamente crescente de chave, se dados
+        """
+        C: MatrizEsparsaArvore = MatrizEsparsaArvore(n, m)
+        C.data = type(self.data).de_itens_ordenados(itens or [])
+        return C
+
     def _get_pos(self, i: int, j: int) -> tuple[int, int]:
         if self.eh_transposta:
             return (j, i)
@@ -174,6 +944,9 @@ class MatrizEsparsaArvore:
 
     def __getitem__(self, tupla_pos: tuple[int, int]) -> int | float:
         i, j = tupla_pos
+        if isinstance(i, slice) or isinstance(j, slice):
+            # A[i, :], A[:, j], A[i0:i1, j0:j1]
+            return self._fatiar(i, j)
         chave: tuple[int, int] = self._get_pos(i, j)
         valor: int | float | None = self.data.buscar(chave)
         return valor if valor is not None else 0
@@ -181,35 +954,231 @@ class MatrizEsparsaArvore:
     def __setitem__(self, tupla_pos: tuple[int, int], valor: int | float) -> None:
         i, j = tupla_pos
         chave: tuple[int, int] = self._get_pos(i, j)
+        self._preparar_escrita()
         if valor != 0:
             self.data.inserir(chave, valor)
         else:
-            if self.data.contem(chave):
-                self.data.remover(chave)
+            # remover já ignora chaves ausentes: uma única descida
+            self.data.remover(chave)
+
+    def _lote_fisico(self, rows, cols, vals=None) -> list:
+        """
+        Lote em ordem de chave física, como [(chave, valor)] (ou [chave] sem
+        vals), com uma entrada por posição: vale a última ocorrência
+        em O(b log b)
+        """
+        if self.eh_transposta:
+            chaves = zip(cols, rows)
+        else:
+            chaves = zip(rows, cols)
+        # Ordena pelo código inteiro da chave, que tem a mesma ordem da tupla e
+        # é bem mais barato de comparar
+        if vals is None:
+            return sorted(set(chaves), key=_codificar)
+        lote: dict = dict(zip(chaves, vals))
+        return [(chave, lote[chave]) for chave in sorted(lote, key=_codificar)]
+
+    def _lote_pequeno(self, b: int) -> bool:
+        """
+        Se um lote de b posições deve ser aplicado chave a chave, em vez de
+        intercalado com todos os itens da árvore e reconstruído
+        """
+        return b < len(self.data) * self.data.FRACAO_RECONSTRUCAO
+
+    def set_many(self, rows, cols, vals) -> tuple[int, int, int]:
+        """
+        Faz A[rows[t], cols[t]] = vals[t] para um lote de posições, com a
+        mesma regra do __setitem__ (zero remove). Se uma posição se repete, vale
+        o último valor do lote e ela conta uma só vez. O lote é ordenado uma
+        vez; se é pequeno perto de k, entra chave a chave em ordem
+        (aplicar_lote da árvore), senão é intercalado com o percurso da árvore
+        numa única passada e a árvore é reconstruída já balanceada. Retorna
+        (inseridos, atualizados, removidos)
+        em O(b log b + min(b log k, k + b))
+        """
+        lote: list = self._lote_fisico(rows, cols, vals)
+        self._preparar_escrita()
+        inseridos = atualizados = removidos = 0
+
+        if self._lote_pequeno(len(lote)):
+            return self.data.aplicar_lote(lote)
+
+        # Intercala o lote com o percurso em ordem da árvore numa única passada
+        itens_C: list = []
+        itens_A = iter(list(self.data.items()))
+        atual_A = next(itens_A, None)
+        for chave, valor in lote:
+            while atual_A is not None and atual_A[0] < chave:
+                itens_C.append(atual_A)
+                atual_A = next(itens_A, None)
+            existe: bool = atual_A is not None and atual_A[0] == chave
+            if existe:
+                atual_A = next(itens_A, None)
+            if valor != 0:
+                itens_C.append((chave, valor))
+                if existe:
+                    atualizados += 1
+                else:
+                    inseridos += 1
+            elif existe:
+                removidos += 1
+        if atual_A is not None:
+            itens_C.append(atual_A)
+            itens_C.extend(itens_A)
+
+        self.data.assumir(type(self.data).de_itens_ordenados(itens_C))
+        return (inseridos, atualizados, removidos)
+
+    def delete_many(self, rows, cols) -> tuple[int, int, int]:
+        """
+        Zera as posições (rows[t], cols[t]) do lote; posições já nulas são
+        ignoradas. Usa o mesmo critério de set_many para remover chave a
+        chave ou reconstruir a árvore. Retorna (0, 0, removidos)
+        em O(b log b + min(b log k, k + b))
+        """
+        lote: list = self._lote_fisico(rows, cols)
+        self._preparar_escrita()
+
+        if self._lote_pequeno(len(lote)):
+            return (0, 0, sum(1 for chave in lote if self.data.remover(chave)))
+
+        removidas: set = set(lote)
+        itens_C: list = [item for item in self.data.items() if item[0] not in removidas]
+        removidos: int = len(self.data) - len(itens_C)
+        self.data.assumir(type(self.data).de_itens_ordenados(itens_C))
+        return (0, 0, removidos)
+
+    def _bloco_fisico(self, l0: int, l1: int, c0: int, c1: int) -> list:
+        """
+        Itens físicos com l0 <= linha < l1 e c0 <= coluna < c1, já deslocados
+        para (0, 0) e em ordem. Cada linha física não vazia custa uma busca;
+        linhas fora da faixa nunca são visitadas
+        em O(r log k + saída), sendo r o número de linhas não vazias da faixa
+        """
+        colunas_fisicas: int = self.n if self.eh_transposta else self.m
+        if c0 <= 0 and c1 >= colunas_fisicas:
+            # Linhas inteiras: um único percurso contíguo
+            return [
+                ((p_i - l0, p_j), valor)
+                for (p_i, p_j), valor in self.data.intervalo((l0, 0), (l1, 0))
+            ]
+
+        itens: list = []
+        cursor: tuple[int, int] = (l0, c0)
+        while True:
+            primeiro = next(self.data.intervalo(cursor, (l1, 0)), None)
+            if primeiro is None:
+                break
+            linha: int = primeiro[0][0]
+            if primeiro[0][1] < c1:
+                for (_, p_j), valor in self.data.intervalo((linha, c0), (linha, c1)):
+                    itens.append(((linha - l0, p_j - c0), valor))
+            # Pula o resto da linha direto para a próxima
+            cursor = (linha + 1, c0)
+        return itens
+
+    def _fatiar(self, i, j) -> "MatrizEsparsaArvore":
+        """
+        Retorna a submatriz A[i, j] em que i e/ou j são fatias (passo 1); um
+        índice inteiro vira uma dimensão de tamanho 1. A árvore do resultado é
+        montada já balanceada a partir do bloco em ordem e, se A está
+        transposta, o resultado também fica
+        em O(r log k + saída)
+        """
+        faixas: list = []
+        for indice, dimensao in ((i, self.n), (j, self.m)):
+            if isinstance(indice, slice):
+                inicio, fim, passo = indice.indices(dimensao)
+                if passo != 1:
+                    raise ValueError("Fatias com passo diferente de 1 não são suportadas")
+                faixas.append((inicio, max(inicio, fim)))
+            else:
+                if indice < 0:
+                    indice += dimensao
+                faixas.append((indice, indice + 1))
+        (i0, i1), (j0, j1) = faixas
+
+        if self.eh_transposta:
+            itens: list = self._bloco_fisico(j0, j1, i0, i1)
+        else:
+            itens = self._bloco_fisico(i0, i1, j0, j1)
+        C: MatrizEsparsaArvore = self._nova(i1 - i0, j1 - j0, itens)
+        C.eh_transposta = self.eh_transposta
+        return C
+
+    def row(self, i: int) -> dict:
+        """
+        Retorna {j: A[i, j]} com os elementos não nulos da linha i, em ordem
+        de j. Numa transposta a linha é uma coluna física
+        em O(log k + nnz da linha), ou O(r log k) se transposta
+        """
+        if self.eh_transposta:
+            return {p_i: valor for (p_i, _), valor in self._bloco_fisico(0, self.m, i, i + 1)}
+        return {p_j: valor for (_, p_j), valor in self.data.intervalo((i, 0), (i + 1, 0))}
+
+    def col(self, j: int) -> dict:
+        """
+        Retorna {i: A[i, j]} com os elementos não nulos da coluna j, em ordem
+        de i
+        em O(r log k), ou O(log k + nnz da coluna) se transposta
+        """
+        return self.transpor().row(j)
+
+    def _itens_ordenados(self, fisico: bool):
+        """
+        Itens em ordem crescente de chave: físicas (direto da árvore) ou
+        lógicas, que para uma transposta exigem reordenar
+        em O(k) ou O(k log k)
+        """
+        if fisico or not self.eh_transposta:
+            return self.data.items()
+        return sorted(((j, i), valor) for (i, j), valor in self.data.items())
 
     def __add__(self, B: "MatrizEsparsaArvore") -> "MatrizEsparsaArvore":
         if self.n != B.n or self.m != B.m:
             raise ValueError("Matrizes devem ter mesmas dimensões")
 
-        C: MatrizEsparsaArvore = MatrizEsparsaArvore(self.n, self.m)
+        # Se as duas são transpostas, intercalamos na ordem física e C também
+        # sai transposta, sem reordenar nada
+        ambas_transpostas: bool = self.eh_transposta and B.eh_transposta
+        itens_A = iter(self._itens_ordenados(ambas_transpostas))
+        itens_B = iter(B._itens_ordenados(ambas_transpostas))
 
-        for (p_i, p_j), valor in self.data.items():
-            if self.eh_transposta:
-                i, j = (p_j, p_i)
+        # Intercala os dois percursos ordenados, somando chaves iguais e
+        # descartando cancelamentos exatos
+        # em O(ka + kb)
+        itens_C: list = []
+        atual_A = next(itens_A, None)
+        atual_B = next(itens_B, None)
+        while atual_A is not None and atual_B is not None:
+            chave_A, valor_A = atual_A
+            chave_B, valor_B = atual_B
+            if chave_A < chave_B:
+                itens_C.append(atual_A)
+                atual_A = next(itens_A, None)
+            elif chave_B < chave_A:
+                itens_C.append(atual_B)
+                atual_B = next(itens_B, None)
             else:
-                i, j = (p_i, p_j)
-            C[i, j] = valor
+                soma = valor_A + valor_B
+                if soma != 0:
+                    itens_C.append((chave_A, soma))
+                atual_A = next(itens_A, None)
+                atual_B = next(itens_B, None)
 
-        for (p_i, p_j), valor in B.data.items():
-            if B.eh_transposta:
-                i, j = (p_j, p_i)
-            else:
-                i, j = (p_i, p_j)
-            C[i, j] = C[i, j] + valor
+        if atual_A is not None:
+            itens_C.append(atual_A)
+            itens_C.extend(itens_A)
+        if atual_B is not None:
+            itens_C.append(atual_B)
+            itens_C.extend(itens_B)
+
+        C: MatrizEsparsaArvore = self._nova(self.n, self.m, itens_C)
+        C.eh_transposta = ambas_transpostas
         return C
 
     def __mul__(self, escalar: int | float) -> "MatrizEsparsaArvore":
-        C: MatrizEsparsaArvore = MatrizEsparsaArvore(self.n, self.m)
+        C: MatrizEsparsaArvore = self._nova(self.n, self.m)
         C.eh_transposta = self.eh_transposta
 
         elementos: list = list(self.data.items())
@@ -221,50 +1190,172 @@ class MatrizEsparsaArvore:
         result = self.__mul__(escalar)
         return result
 
+    def axpy(self, alpha: int | float, B: "MatrizEsparsaArvore") -> "MatrizEsparsaArvore":
+        """
+        Faz A = A + alpha * B na própria árvore de A, sem criar matrizes
+        intermediárias. Transpostas e snapshots de A tirados antes não mudam
+        (cópia na escrita). Poucos elementos em B são somados um a um;
+        muitos, intercalando os dois percursos e reconstruindo a árvore
+        em O(kb log ka) ou O(ka + kb), o que for menor
+        """
+        if self.n != B.n or self.m != B.m:
+            raise ValueError("Matrizes devem ter mesmas dimensões")
+
+        self._preparar_escrita()
+
+        # Itens de B já nas chaves físicas de A. A cópia em lista também evita
+        # alterar a árvore durante o percurso quando B compartilha self.data
+        if B.eh_transposta == self.eh_transposta:
+            itens_B: list = list(B.data.items())
+        else:
+            itens_B = [((j, i), valor) for (i, j), valor in B.data.items()]
+
+        ka: int = len(self.data)
+        if len(itens_B) * ka.bit_length() < ka:
+            for chave, valor in itens_B:
+                self.data.somar(chave, alpha * valor)
+            return self
+
+        if B.eh_transposta != self.eh_transposta:
+            itens_B.sort()
+
+        itens_C: list = []
+        itens_A = iter(list(self.data.items()))
+        atual_A = next(itens_A, None)
+        for chave_B, valor_B in itens_B:
+            while atual_A is not None and atual_A[0] < chave_B:
+                itens_C.append(atual_A)
+                atual_A = next(itens_A, None)
+            if atual_A is not None and atual_A[0] == chave_B:
+                valor = atual_A[1] + alpha * valor_B
+                atual_A = next(itens_A, None)
+            else:
+                valor = alpha * valor_B
+            if valor != 0:
+                itens_C.append((chave_B, valor))
+        if atual_A is not None:
+            itens_C.append(atual_A)
+            itens_C.extend(itens_A)
+
+        self.data.assumir(type(self.data).de_itens_ordenados(itens_C))
+        return self
+
+    def __iadd__(self, B: "MatrizEsparsaArvore") -> "MatrizEsparsaArvore":
+        return self.axpy(1, B)
+
+    def __isub__(self, B: "MatrizEsparsaArvore") -> "MatrizEsparsaArvore":
+        return self.axpy(-1, B)
+
+    def __imul__(self, escalar: int | float) -> "MatrizEsparsaArvore":
+        self._preparar_escrita()
+        self.data.multiplicar_valores(escalar)
+        return self
+
     def __matmul__(self, B: "MatrizEsparsaArvore") -> "MatrizEsparsaArvore":
         if self.m != B.n:
             raise ValueError(f"Dimensões incompatíveis")
 
-        C: MatrizEsparsaArvore = MatrizEsparsaArvore(self.n, B.m)
+        # Linhas de A e de B agrupadas, reaproveitadas do cache enquanto as
+        # matrizes não mudarem (ex.: o mesmo B em várias multiplicações)
+        # em O(kA + kB) esperado na primeira vez e O(1) depois
+        A_por_linha: dict = self._por_linha()
+        if isinstance(B, MatrizEsparsaArvore):
+            B_por_linha: dict = B._por_linha()
+        else:
+            # B de outra estrutura: agrupa sem passar pelo cache dela
+            B_por_linha = MatrizEsparsaArvore._agrupar_por_linha(B)
 
-        # Criamos um dicionário para acesso rápido às linhas de B
-        # em O(kb * log kb) esperado
-        # Estrutura: {indice_linha -> {indice_coluna: valor, ...}}
-        B_por_linha = {}
-        for (p_k, p_j), valor_b in B.data.items():
-            if B.eh_transposta:
-                k, j = (p_j, p_k)
-            else:
-                k, j = (p_k, p_j)
-            
-            if k not in B_por_linha:
-                B_por_linha[k] = []
-            B_por_linha[k].append((j, valor_b))
-
-        # Itera sobre A e usa o dicionário de linhas de B
-        # em O(kA * dB * log kC)
-        for (p_i, p_k), valor_a in self.data.items():
-            # Ajusta coordenadas lógicas de A
+        # Calcula C uma linha por vez (Gustavson) com um acumulador esvaziado
+        # a cada linha. As linhas prontas saem em ordem de (i, j) e a árvore de
+        # C é construída de uma vez só no final, sem buscas nem rotações
+        # em O(kA * dB + kC log kC)
+        itens_C: list = []
+        acumulador: dict = {}
+        for i in sorted(A_por_linha):
+            for k, valor_a in A_por_linha[i]:
+                if k in B_por_linha:
+                    for (j, valor_b) in B_por_linha[k]:
+                        acumulador[j] = acumulador.get(j, 0) + valor_a * valor_b
+
+            for j in sorted(acumulador):
+                valor = acumulador[j]
+                if valor != 0:
+                    itens_C.append(((i, j), valor))
+            acumulador.clear()
+
+        return self._nova(self.n, B.m, itens_C)
+
+    def _por_linha(self) -> dict:
+        """
+        Agrupa os elementos por linha lógica, em ordem de coluna dentro de cada
+        linha, e guarda o resultado no cache. O agrupamento por colunas é o
+        mesmo artefato visto pela transposta
+        em O(k) esperado na primeira chamada e O(1) depois
+        Estrutura: {indice_linha -> [(indice_coluna, valor), ...]}
+        """
+        return self._cache.obter(
+            ("por_linha", self.eh_transposta), self._agrupar_por_linha
+        )
+
+    def _agrupar_por_linha(self) -> dict:
+        por_linha: dict = {}
+        for (p_i, p_j), valor in self.data.items():
             if self.eh_transposta:
-                i, k = (p_k, p_i)
+                i, j = (p_j, p_i)
             else:
-                i, k = (p_i, p_k)
-
-            if k in B_por_linha:
-                for (j, valor_b) in B_por_linha[k]:
-                    # Insere/Soma na árvore de resultado
-                    # C[i, j] internamente faz busca e inserção O(log k)
-                    valor_atual = C[i, j]
-                    C[i, j] = valor_atual + valor_a * valor_b
+                i, j = (p_i, p_j)
 
-        return C
+            if i not in por_linha:
+                por_linha[i] = []
+            por_linha[i].append((j, valor))
+        return por_linha
 
     def transpor(self) -> "MatrizEsparsaArvore":
+        """
+        Retorna a transposta lendo a mesma árvore, até que uma das duas seja
+        escrita: escrever na transposta não altera A, nem o contrário
+        em O(1)
+        """
         transposta: MatrizEsparsaArvore = MatrizEsparsaArvore(self.m, self.n)
-        transposta.data = self.data
+        self._compartilhar(transposta)
         transposta.eh_transposta = not self.eh_transposta
         return transposta
 
+    def _visao_linhas(self) -> VisaoLinhas:
+        return self._cache.obter(
+            ("linhas", self.eh_transposta),
+            lambda: VisaoLinhas.de_itens(self.data.items(), self.eh_transposta),
+        )
+
+    def dot(self, x):
+        """
+        Retorna A @ x para um vetor denso (lista, array ou NumPy 1-D), ou A @ X
+        para um bloco denso com várias colunas (lista de linhas ou NumPy 2-D).
+        A visão por linhas fica em cache até a próxima alteração da matriz
+        """
+        return multiplicar_denso(self._visao_linhas(), self.n, self.m, x)
+
+    def save(self, path: str) -> None:
+        """
+        Grava a matriz no formato binário de persistencia; a árvore já está em
+        ordem, então não há reordenação
+        em O(k + n)
+        """
+        from persistencia import salvar
+
+        salvar(self, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """
+        Abre uma matriz gravada com save(). Com mmap=True o arquivo é mapeado e
+        devolvido como MatrizEsparsaCSR somente leitura, sem criar nós; com
+        mmap=False a árvore é montada já balanceada
+        """
+        from persistencia import carregar
+
+        return carregar(path, mmap, cls)
+
     def k(self) -> int:
         result = len(self.data)
         return result
@@ -0,0 +1,374 @@
+from array import array
+from bisect import bisect_left
+
+from estrutura1 import MatrizEsparsaHash
+from estrutura2 import Arvore, MatrizEsparsaArvore
+
+
+def _novo_arranjo_valores(valores) -> array:
+    """
+    Cria o arranjo contíguo de valores: inteiros ficam em 'q' (64 bits) e
+    qualquer outro número em 'd', para não perder informação na conversão
+    """
+    valores = list(valores)
+    try:
+        return array("q", valores)
+    except (TypeError, OverflowError):
+        return array("d", valores)
+
+
+def _tipo_valores(valores) -> str:
+    # Arranjos mapeados do disco são memoryviews: o tipo fica em .format
+    return getattr(valores, "typecode", None) or valores.format
+
+
+def _transpor_arranjos(
+    indptr: array, indices: array, valores: array, n_colunas: int
+) -> tuple[array, array, array]:
+    """
+    Converte os arranjos CSR de uma matriz nos arranjos CSR da sua transposta
+    (ou seja, CSR -> CSC) usando ordenação por contagem
+    em O(k + n + m)
+    """
+    k = len(indices)
+    novo_indptr = array("q", [0]) * (n_colunas + 1)
+    for j in indices:
+        novo_indptr[j + 1] += 1
+    for j in range(n_colunas):
+        novo_indptr[j + 1] += novo_indptr[j]
+
+    proxima = array("q", novo_indptr[:-1])
+    novos_indices = array("q", [0]) * k
+    novos_valores = array(_tipo_valores(valores), valores)
+
+    # Percorre as linhas em ordem, então cada nova linha já sai ordenada
+    for i in range(len(indptr) - 1):
+        for p in range(indptr[i], indptr[i + 1]):
+            j = indices[p]
+            destino = proxima[j]
+            novos_indices[destino] = i
+            novos_valores[destino] = valores[p]
+            proxima[j] = destino + 1
+
+    return novo_indptr, novos_indices, novos_valores
+
+
+class ArranjosCSR:
+    """
+    Armazenamento físico comprimido por linhas: as colunas da linha i estão em
+    indices[indptr[i]:indptr[i + 1]] (ordenadas) e os valores correspondentes
+    em valores[indptr[i]:indptr[i + 1]]
+    """
+
+    def __init__(self, n_linhas: int) -> None:
+        self.n_linhas: int = n_linhas
+        self.indptr: array = array("q", [0]) * (n_linhas + 1)
+        self.indices: array = array("q")
+        self.valores: array = array("q")
+
+    @classmethod
+    def de_itens_ordenados(cls, n_linhas: int, itens) -> "ArranjosCSR":
+        """
+        Constrói os arranjos a partir de ((i, j), valor) já em ordem de (i, j)
+        em O(k + n)
+        """
+        arranjos = cls(n_linhas)
+        indptr = arranjos.indptr
+        valores = []
+        for (i, j), valor in itens:
+            indptr[i + 1] += 1
+            arranjos.indices.append(j)
+            valores.append(valor)
+        for i in range(n_linhas):
+            indptr[i + 1] += indptr[i]
+        arranjos.valores = _novo_arranjo_valores(valores)
+        return arranjos
+
+    def _verificar_escrita(self) -> None:
+        if isinstance(self.indices, memoryview):
+            raise TypeError("Matriz mapeada do disco é somente leitura")
+
+    def _posicao(self, i: int, j: int) -> tuple[int, bool]:
+        inicio, fim = self.indptr[i], self.indptr[i + 1]
+        p = bisect_left(self.indices, j, inicio, fim)
+        return p, p < fim and self.indices[p] == j
+
+    def buscar(self, chave: tuple[int, int]) -> int | float | None:
+        """
+        Busca binária dentro da linha
+        em O(log d)
+        """
+        i, j = chave
+        p, achou = self._posicao(i, j)
+        return self.valores[p] if achou else None
+
+    def inserir(self, chave: tuple[int, int], valor: int | float) -> None:
+        """
+        Insere ou atualiza um elemento; inserir um novo elemento desloca os
+        arranjos
+        em O(k + n)
+        """
+        self._verificar_escrita()
+        i, j = chave
+        if self.valores.typecode == "q" and not isinstance(valor, int):
+            self.valores = array("d", self.valores)
+        p, achou = self._posicao(i, j)
+        if achou:
+            self.valores[p] = valor
+            return
+        self.indices.insert(p, j)
+        self.valores.insert(p, valor)
+        for r in range(i + 1, self.n_linhas + 1):
+            self.indptr[r] += 1
+
+    def remover(self, chave: tuple[int, int]) -> None:
+        """
+        Remove um elemento, se existir
+        em O(k + n)
+        """
+        self._verificar_escrita()
+        i, j = chave
+        p, achou = self._posicao(i, j)
+        if not achou:
+            return
+        del self.indices[p]
+        del self.valores[p]
+        for r in range(i + 1, self.n_linhas + 1):
+            self.indptr[r] -= 1
+
+    def items(self):
+        indptr, indices, valores = self.indptr, self.indices, self.valores
+        for i in range(self.n_linhas):
+            for p in range(indptr[i], indptr[i + 1]):
+                yield ((i, indices[p]), valores[p])
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+
+class MatrizEsparsaCSR:
+    """
+    Estrutura 3: Usa arranjos contíguos (CSR) para armazenar elementos não-nulos.
+    Quando eh_transposta é verdadeiro, os mesmos arranjos são lidos como CSC da
+    matriz lógica.
+    Complexidades:
+    - Memória: O(k + n)
+    - Acesso A[i,j]: O(log d)
+    - Inserção: O(k + n)
+    - Transposta: O(1)
+    - Soma: O(ka + kb + n)
+    - Multiplicação escalar: O(k)
+    - Multiplicação matricial: O(ka * db + n)
+    """
+
+    def __init__(self, n: int, m: int) -> None:
+        self.n: int = n
+        self.m: int = m
+        self.data: ArranjosCSR = ArranjosCSR(n)
+        self.eh_transposta: bool = False
+
+    def _get_pos(self, i: int, j: int) -> tuple[int, int]:
+        if self.eh_transposta:
+            return (j, i)
+        else:
+            return (i, j)
+
+    def __getitem__(self, tupla_pos: tuple[int, int]) -> int | float:
+        i, j = tupla_pos
+        chave: tuple[int, int] = self._get_pos(i, j)
+        valor: int | float | None = self.data.buscar(chave)
+        return valor if valor is not None else 0
+
+    def __setitem__(self, tupla_pos: tuple[int, int], valor: int | float) -> None:
+        i, j = tupla_pos
+        chave: tuple[int, int] = self._get_pos(i, j)
+        if valor != 0:
+            self.data.inserir(chave, valor)
+        else:
+            self.data.remover(chave)
+
+    def _linhas_logicas(self) -> tuple[array, array, array]:
+        """
+        Retorna os arranjos CSR da matriz lógica; se ela estiver transposta,
+        o CSC físico é convertido para CSR
+        em O(1) ou O(k + n + m)
+        """
+        if not self.eh_transposta:
+            return self.data.indptr, self.data.indices, self.data.valores
+        return _transpor_arranjos(
+            self.data.indptr, self.data.indices, self.data.valores, self.n
+        )
+
+    @classmethod
+    def _de_arranjos(
+        cls, n: int, m: int, indptr: array, indices: array, valores: list
+    ) -> "MatrizEsparsaCSR":
+        C: MatrizEsparsaCSR = cls(n, m)
+        C.data = ArranjosCSR(0)
+        C.data.n_linhas = len(indptr) - 1
+        C.data.indptr = indptr
+        C.data.indices = indices
+        C.data.valores = _novo_arranjo_valores(valores)
+        return C
+
+    def __add__(self, B: "MatrizEsparsaCSR") -> "MatrizEsparsaCSR":
+        """
+        Retorna C = A + B intercalando as linhas ordenadas de A e B
+        em O(ka + kb + n)
+        """
+        if self.n != B.n or self.m != B.m:
+            raise ValueError("Matrizes devem ter mesmas dimensões")
+
+        ia, ja, va = self._linhas_logicas()
+        ib, jb, vb = B._linhas_logicas()
+
+        indptr = array("q", [0]) * (self.n + 1)
+        indices = array("q")
+        valores = []
+        for i in range(self.n):
+            pa, fa = ia[i], ia[i + 1]
+            pb, fb = ib[i], ib[i + 1]
+            while pa < fa or pb < fb:
+                if pb >= fb or (pa < fa and ja[pa] < jb[pb]):
+                    j, valor = ja[pa], va[pa]
+                    pa += 1
+                elif pa >= fa or jb[pb] < ja[pa]:
+                    j, valor = jb[pb], vb[pb]
+                    pb += 1
+                else:
+                    j, valor = ja[pa], va[pa] + vb[pb]
+                    pa += 1
+                    pb += 1
+                if valor != 0:
+                    indices.append(j)
+                    valores.append(valor)
+            indptr[i + 1] = len(indices)
+
+        return MatrizEsparsaCSR._de_arranjos(self.n, self.m, indptr, indices, valores)
+
+    def __mul__(self, escalar: int | float) -> "MatrizEsparsaCSR":
+        """
+        Retorna C = A * b, sendo b um escalar
+        em O(k)
+        """
+        C: MatrizEsparsaCSR = MatrizEsparsaCSR._de_arranjos(
+            self.n,
+            self.m,
+            array("q", self.data.indptr),
+            array("q", self.data.indices),
+            [valor * escalar for valor in self.data.valores],
+        )
+        C.eh_transposta = self.eh_transposta
+        return C
+
+    def __rmul__(self, escalar: int | float) -> "MatrizEsparsaCSR":
+        return self.__mul__(escalar)
+
+    def __matmul__(self, B: "MatrizEsparsaCSR") -> "MatrizEsparsaCSR":
+        """
+        Retorna C = A @ B linha a linha (Gustavson)
+        em O(ka * db + n)
+        """
+        if self.m != B.n:
+            raise ValueError("Dimensões incompatíveis para multiplicação")
+
+        ia, ja, va = self._linhas_logicas()
+        ib, jb, vb = B._linhas_logicas()
+
+        indptr = array("q", [0]) * (self.n + 1)
+        indices = array("q")
+        valores = []
+        acumulador: dict = {}
+        for i in range(self.n):
+            for pa in range(ia[i], ia[i + 1]):
+                k, valor_a = ja[pa], va[pa]
+                for pb in range(ib[k], ib[k + 1]):
+                    j = jb[pb]
+                    acumulador[j] = acumulador.get(j, 0) + valor_a * vb[pb]
+            for j in sorted(acumulador):
+                valor = acumulador[j]
+                if valor != 0:
+                    indices.append(j)
+                    valores.append(valor)
+            acumulador.clear()
+            indptr[i + 1] = len(indices)
+
+        return MatrizEsparsaCSR._de_arranjos(self.n, B.m, indptr, indices, valores)
+
+    def transpor(self) -> "MatrizEsparsaCSR":
+        transposta: MatrizEsparsaCSR = MatrizEsparsaCSR(self.m, self.n)
+        transposta.data = self.data
+        transposta.eh_transposta = not self.eh_transposta
+        return transposta
+
+    def k(self) -> int:
+        return len(self.data)
+
+    def save(self, path: str) -> None:
+        """
+        Grava a matriz no formato binário de persistencia
+        em O(k + n)
+        """
+        from persistencia import salvar
+
+        salvar(self, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "MatrizEsparsaCSR":
+        """
+        Abre uma matriz gravada com save(); com mmap=True os arranjos são
+        views somente leitura do arquivo mapeado, sem cópia
+        """
+        from persistencia import carregar
+
+        return carregar(path, mmap, cls)
+
+    @classmethod
+    def _de_itens_fisicos(
+        cls, n: int, m: int, eh_transposta: bool, itens
+    ) -> "MatrizEsparsaCSR":
+        C: MatrizEsparsaCSR = cls(n, m)
+        n_linhas = m if eh_transposta else n
+        C.data = ArranjosCSR.de_itens_ordenados(n_linhas, itens)
+        C.eh_transposta = eh_transposta
+        return C
+
+    @classmethod
+    def de_hash(cls, A: MatrizEsparsaHash) -> "MatrizEsparsaCSR":
+        """
+        Converte uma MatrizEsparsaHash mantendo a orientação física
+        em O(k log k + n)
+        """
+        return cls._de_itens_fisicos(
+            A.n, A.m, A.eh_transposta, sorted(A.data.items())
+        )
+
+    @classmethod
+    def de_arvore(cls, A: MatrizEsparsaArvore) -> "MatrizEsparsaCSR":
+        """
+        Converte uma MatrizEsparsaArvore mantendo a orientação física; as
+        chaves da árvore já saem ordenadas
+        em O(k + n)
+        """
+        return cls._de_itens_fisicos(A.n, A.m, A.eh_transposta, A.data.items())
+
+    def para_hash(self) -> MatrizEsparsaHash:
+        """
+        Converte para MatrizEsparsaHash mantendo a orientação física
+        em O(k + n)
+        """
+        C = MatrizEsparsaHash(self.n, self.m)
+        C.data = dict(self.data.items())
+        C.eh_transposta = self.eh_transposta
+        return C
+
+    def para_arvore(self) -> MatrizEsparsaArvore:
+        """
+        Converte para MatrizEsparsaArvore mantendo a orientação física; os
+        itens já saem ordenados, então a árvore é montada sem rotações
+        em O(k + n)
+        """
+        C = MatrizEsparsaArvore(self.n, self.m)
+        C.data = Arvore.de_itens_ordenados(list(self.data.items()))
+        C.eh_transposta = self.eh_transposta
+        return C
@@ -0,0 +1,325 @@
+import math
+from numbers import Number
+
+from estimativa_produto import estimate_matmul_nnz
+from estrutura1 import DicionarioCompacto, MatrizEsparsaHash
+from estrutura2 import MatrizEsparsaArvore
+from estrutura3 import MatrizEsparsaCSR
+
+_MATRIZES = (MatrizEsparsaHash, MatrizEsparsaArvore, MatrizEsparsaCSR)
+
+
+class Expressao:
+    """
+    Nó de um grafo de expressão sobre matrizes esparsas: os operadores só
+    montam o grafo (em O(1) cada) e nada é calculado até compute(). Nós podem
+    ser reaproveitados em várias expressões; um mesmo nó é avaliado uma vez
+    por compute()
+    Operações ("op"):
+    - "matriz": folha com uma MatrizEsparsaHash, MatrizEsparsaArvore ou
+      MatrizEsparsaCSR
+    - "@": produto matricial dos dois filhos
+    - "+": soma dos filhos
+    - "*": filho multiplicado pelo escalar
+    - "T": transposta do filho
+    """
+
+    __slots__ = ("op", "filhos", "escalar", "matriz", "n", "m")
+
+    def __init__(
+        self,
+        op: str,
+        filhos: tuple = (),
+        n: int = 0,
+        m: int = 0,
+        escalar: int | float = 1,
+        matriz=None,
+    ) -> None:
+        self.op: str = op
+        self.filhos: tuple = filhos
+        self.n: int = n
+        self.m: int = m
+        self.escalar: int | float = escalar
+        self.matriz = matriz
+
+    def __matmul__(self, B) -> "Expressao":
+        B = _como_expressao(B)
+        if self.m != B.n:
+            raise ValueError("Dimensões incompatíveis para multiplicação")
+        return Expressao("@", (self, B), self.n, B.m)
+
+    def __rmatmul__(self, A) -> "Expressao":
+        return _como_expressao(A) @ self
+
+    def __add__(self, B) -> "Expressao":
+        B = _como_expressao(B)
+        if self.n != B.n or self.m != B.m:
+            raise ValueError("Dimensões incompatíveis para soma")
+        return Expressao("+", (self, B), self.n, self.m)
+
+    def __radd__(self, A) -> "Expressao":
+        return _como_expressao(A) + self
+
+    def __sub__(self, B) -> "Expressao":
+        return self + _como_expressao(B) * -1
+
+    def __rsub__(self, A) -> "Expressao":
+        return _como_expressao(A) + self * -1
+
+    def __neg__(self) -> "Expressao":
+        return self * -1
+
+    def __mul__(self, escalar: int | float) -> "Expressao":
+        if not isinstance(escalar, Number):
+            raise TypeError("Expressões só podem ser multiplicadas por escalares (use @)")
+        return Expressao("*", (self,), self.n, self.m, escalar=escalar)
+
+    def __rmul__(self, escalar: int | float) -> "Expressao":
+        return self * escalar
+
+    def transpor(self) -> "Expressao":
+        return Expressao("T", (self,), self.m, self.n)
+
+    def compute(self):
+        """
+        Avalia a expressão e retorna uma matriz da estrutura da primeira folha
+        de cada soma (ou da que o produto escolhido devolver). Antes de
+        calcular, o grafo é normalizado: transpostas descem até as folhas (onde
+        custam O(1)) e pares que se anulam somem; escalares saem dos produtos e
+        viram coeficientes; somas e produtos aninhados são achatados. Cada
+        cadeia de produtos é calculada na ordem de menor custo estimado pelo
+        nnz dos operandos, e cada soma com seus coeficientes é feita numa única
+        passada sobre os operandos, sem matrizes escaladas intermediárias
+        em O(custo dos produtos na ordem escolhida + soma dos k das parcelas)
+        """
+        return _avaliar(self, False, {})
+
+    def __repr__(self) -> str:
+        if self.op == "matriz":
+            return f"{type(self.matriz).__name__}({self.n}x{self.m})"
+        if self.op == "T":
+            return f"{self.filhos[0]!r}.T"
+        if self.op == "*":
+            return f"({self.filhos[0]!r} * {self.escalar!r})"
+        return "(" + f" {self.op} ".join(repr(filho) for filho in self.filhos) + ")"
+
+
+def preguicosa(A) -> Expressao:
+    """
+    Folha de expressão para a matriz A: operações sobre ela montam um grafo
+    que só é avaliado em compute(). A não é copiada; alterá-la antes de
+    compute() altera o resultado
+    em O(1)
+    """
+    if not isinstance(A, _MATRIZES):
+        raise TypeError(f"Matriz não suportada em expressões: {type(A).__name__}")
+    return Expressao("matriz", (), A.n, A.m, matriz=A)
+
+
+def _como_expressao(A) -> Expressao:
+    if isinstance(A, Expressao):
+        return A
+    return preguicosa(A)
+
+
+def _folha(A, transposta: bool):
+    return A.transpor() if transposta else A
+
+
+def _parcelas(
+    no: Expressao, coeficiente, transposta: bool, parcelas: list, memo: dict
+) -> None:
+    """
+    Acrescenta a 'parcelas' os pares (coeficiente, matriz, própria) cuja soma
+    é coeficiente * no (transposto se pedido). 'própria' diz se a matriz foi
+    criada pela avaliação e pode ser alterada no lugar
+    """
+    while no.op in ("*", "T"):
+        if no.op == "*":
+            coeficiente = coeficiente * no.escalar
+        else:
+            transposta = not transposta
+        no = no.filhos[0]
+
+    if no.op == "+":
+        for filho in no.filhos:
+            _parcelas(filho, coeficiente, transposta, parcelas, memo)
+    elif no.op == "@":
+        fator, produto, propria = _avaliar_produto(no, transposta, memo)
+        parcelas.append((coeficiente * fator, produto, propria))
+    else:
+        parcelas.append((coeficiente, _folha(no.matriz, transposta), False))
+
+
+def _cadeia(no: Expressao, transposta: bool, fatores: list, memo: dict):
+    """
+    Achata produtos aninhados em 'fatores' (matrizes, na ordem do produto) e
+    retorna o escalar que sai deles. Transpor um produto inverte a ordem dos
+    fatores; somas dentro do produto são avaliadas à parte
+    """
+    if no.op == "@":
+        A, B = no.filhos
+        if transposta:
+            A, B = B, A
+        return _cadeia(A, transposta, fatores, memo) * _cadeia(B, transposta, fatores, memo)
+    if no.op == "*":
+        return no.escalar * _cadeia(no.filhos[0], transposta, fatores, memo)
+    if no.op == "T":
+        return _cadeia(no.filhos[0], not transposta, fatores, memo)
+    if no.op == "matriz":
+        fatores.append(_folha(no.matriz, transposta))
+    else:
+        fatores.append(_avaliar(no, transposta, memo))
+    return 1
+
+
+def _avaliar_produto(no: Expressao, transposta: bool, memo: dict) -> tuple:
+    """
+    (escalar, produto, própria) da cadeia de produtos com raiz em no; se a
+    transposta do mesmo nó já foi calculada, reaproveita-a transposta
+    """
+    chave = ("@", id(no), transposta)
+    if chave not in memo:
+        oposta = memo.get(("@", id(no), not transposta))
+        if oposta is not None:
+            fator, produto, _ = oposta
+            # A visão transposta compartilha o armazenamento: não é própria
+            memo[chave] = (fator, produto.transpor(), False)
+        else:
+            fatores: list = []
+            fator = _cadeia(no, transposta, fatores, memo)
+            memo[chave] = (fator, _multiplicar_cadeia(fatores), True)
+    fator, produto, propria = memo[chave]
+    if propria:
+        # Outro uso do mesmo nó não pode ver alterações no lugar
+        memo[chave] = (fator, produto, False)
+    return fator, produto, propria
+
+
+def _avaliar(no: Expressao, transposta: bool, memo: dict):
+    chave = ("+", id(no), transposta)
+    if chave not in memo:
+        parcelas: list = []
+        _parcelas(no, 1, transposta, parcelas, memo)
+        n, m = (no.m, no.n) if transposta else (no.n, no.m)
+        memo[chave] = _combinar(parcelas, n, m)
+    return memo[chave]
+
+
+def _nnz(A) -> int:
+    return len(A.data)
+
+
+def _ordem_cadeia(fatores: list) -> list:
+    """
+    Tabela divisao[i][j] com o ponto de corte de menor custo para o produto
+    fatores[i] @ ... @ fatores[j] (programação dinâmica da ordem de cadeias de
+    matrizes). O custo de um produto é o número de produtos parciais mais o
+    nnz do resultado, que fica em memória. Para dois fatores o nnz vem de
+    estimate_matmul_nnz; acima disso, os elementos são supostos espalhados ao
+    acaso: 'p' produtos parciais em 'c' posições ocupam c * (1 - e^(-p / c))
+    em O(L³ + soma dos k dos fatores), com L fatores
+    """
+    L = len(fatores)
+    nnz = [[0] * L for _ in range(L)]
+    custo = [[0.0] * L for _ in range(L)]
+    divisao = [[0] * L for _ in range(L)]
+    for i, A in enumerate(fatores):
+        nnz[i][i] = _nnz(A)
+
+    for comprimento in range(2, L + 1):
+        for i in range(L - comprimento + 1):
+            j = i + comprimento - 1
+            celulas = fatores[i].n * fatores[j].m
+            melhor = None
+            for s in range(i, j):
+                produtos = nnz[i][s] * nnz[s + 1][j] / max(fatores[s].m, 1)
+                if comprimento == 2:
+                    estimativa = estimate_matmul_nnz(fatores[i], fatores[j])
+                elif celulas:
+                    estimativa = celulas * -math.expm1(-produtos / celulas)
+                else:
+                    estimativa = 0
+                total = custo[i][s] + custo[s + 1][j] + produtos + estimativa
+                if melhor is None or total < melhor:
+                    melhor = total
+                    nnz[i][j] = estimativa
+                    divisao[i][j] = s
+            custo[i][j] = melhor
+    return divisao
+
+
+def _multiplicar_cadeia(fatores: list):
+    """
+    Produto dos fatores na ordem escolhida por _ordem_cadeia, usando o @ de
+    cada estrutura
+    """
+    if len(fatores) == 1:
+        return fatores[0]
+    divisao = _ordem_cadeia(fatores)
+
+    def produto(i: int, j: int):
+        if i == j:
+            return fatores[i]
+        s = divisao[i][j]
+        return produto(i, s) @ produto(s + 1, j)
+
+    return produto(0, len(fatores) - 1)
+
+
+def _itens_logicos(A):
+    if not A.eh_transposta:
+        return A.data.items()
+    return (((j, i), valor) for (i, j), valor in A.data.items())
+
+
+def _triplas(parcelas: list):
+    for coeficiente, A, _ in parcelas:
+        if coeficiente == 1:
+            for (i, j), valor in _itens_logicos(A):
+                yield i, j, valor
+        elif coeficiente != 0:
+            for (i, j), valor in _itens_logicos(A):
+                yield i, j, coeficiente * valor
+
+
+def _combinar(parcelas: list, n: int, m: int):
+    """
+    Soma das parcelas (coeficiente, matriz, própria) numa única passada: os
+    elementos de todas as parcelas, já multiplicados pelos coeficientes, vão
+    direto para a matriz resultado, que tem a estrutura da primeira parcela.
+    Uma parcela só é reaproveitada: escalada no lugar se própria, ou por
+    snapshot se coeficiente 1
+    em O(soma dos k das parcelas) esperado, mais O(k log k) para Arvore e CSR
+    """
+    if len(parcelas) == 1:
+        coeficiente, A, propria = parcelas[0]
+        if propria:
+            if coeficiente != 1:
+                A *= coeficiente
+            return A
+        if coeficiente == 1 and hasattr(A, "snapshot"):
+            return A.snapshot()
+        return A * coeficiente
+
+    modelo = parcelas[0][1]
+    if isinstance(modelo, MatrizEsparsaHash):
+        compacto = isinstance(modelo.data, DicionarioCompacto)
+        return MatrizEsparsaHash.from_triplets(
+            n,
+            m,
+            _triplas(parcelas),
+            chaves_inteiras=compacto,
+            tipo_valores=modelo.data.tipo if compacto else None,
+        )
+
+    # Estruturas ordenadas: soma num dicionário e ordena só as posições
+    # distintas, montando o resultado de uma vez
+    acumulado: dict = {}
+    for i, j, valor in _triplas(parcelas):
+        acumulado[i, j] = acumulado.get((i, j), 0) + valor
+    itens = sorted(item for item in acumulado.items() if item[1] != 0)
+    del acumulado
+    if isinstance(modelo, MatrizEsparsaArvore):
+        return modelo._nova(n, m, itens)
+    return MatrizEsparsaCSR._de_itens_fisicos(n, m, False, itens)
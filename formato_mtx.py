@@ -0,0 +1,194 @@
+from numbers import Integral
+
+from estrutura1 import MatrizEsparsaHash
+from estrutura2 import MatrizEsparsaArvore
+
+# Quantos bytes de texto são lidos (ou escritos) por vez
+TAMANHO_BLOCO = 1 << 20
+
+
+def _blocos_de_linhas(f, tamanho_bloco: int):
+    while True:
+        linhas = f.readlines(tamanho_bloco)
+        if not linhas:
+            return
+        yield linhas
+
+
+def _converter_valor(texto: str) -> int | float:
+    try:
+        return int(texto)
+    except ValueError:
+        return float(texto)
+
+
+def _acumular(
+    acumulado: dict, chave: tuple[int, int], valor, duplicates: str
+) -> None:
+    if duplicates == "sum":
+        acumulado[chave] = acumulado.get(chave, 0) + valor
+    else:
+        acumulado[chave] = valor
+
+
+def _construir(estrutura, n: int, m: int, acumulado: dict):
+    """
+    Entrega os elementos já sem repetições ao construtor em lote da estrutura
+    """
+    if estrutura is MatrizEsparsaHash:
+        triplas = ((i, j, valor) for (i, j), valor in acumulado.items())
+        return MatrizEsparsaHash.from_triplets(n, m, triplas, duplicates="last")
+    if estrutura is MatrizEsparsaArvore:
+        triplas = sorted((i, j, valor) for (i, j), valor in acumulado.items())
+        return MatrizEsparsaArvore.from_triplets(n, m, triplas, assume_sorted=True)
+    raise TypeError("estrutura deve ser MatrizEsparsaHash ou MatrizEsparsaArvore")
+
+
+def ler_mtx(
+    caminho: str,
+    estrutura=MatrizEsparsaHash,
+    duplicates: str = "sum",
+    tamanho_bloco: int = TAMANHO_BLOCO,
+):
+    """
+    Lê um arquivo Matrix Market no formato 'coordinate' (real, integer ou
+    pattern; general, symmetric ou skew-symmetric) em blocos de texto.
+    Coordenadas repetidas são somadas (duplicates="sum") ou ficam com o último
+    valor (duplicates="last") à medida que chegam, então a memória usada é
+    proporcional ao k final, não ao tamanho do arquivo
+    em O(tamanho do texto + k) esperado, mais O(k log k) para a AVL
+    """
+    if duplicates not in ("sum", "last"):
+        raise ValueError("duplicates deve ser 'sum' ou 'last'")
+
+    with open(caminho) as f:
+        cabecalho = f.readline().split()
+        if len(cabecalho) != 5 or cabecalho[0] != "%%MatrixMarket":
+            raise ValueError(f"'{caminho}' não tem cabeçalho Matrix Market")
+        _, objeto, formato, campo, simetria = (parte.lower() for parte in cabecalho)
+        if objeto != "matrix" or formato != "coordinate":
+            raise ValueError("Apenas matrizes no formato 'coordinate' são suportadas")
+        if campo not in ("real", "integer", "pattern"):
+            raise ValueError(f"Campo '{campo}' não suportado")
+        if simetria not in ("general", "symmetric", "skew-symmetric"):
+            raise ValueError(f"Simetria '{simetria}' não suportada")
+
+        linha = f.readline()
+        while linha.startswith("%") or not linha.strip():
+            linha = f.readline()
+        n, m, declarados = (int(parte) for parte in linha.split())
+
+        converter = {"real": float, "integer": int}.get(campo)
+        sinal_espelho = -1 if simetria == "skew-symmetric" else 1
+        acumulado: dict = {}
+        lidos = 0
+        for bloco in _blocos_de_linhas(f, tamanho_bloco):
+            for linha in bloco:
+                partes = linha.split()
+                if not partes or partes[0].startswith("%"):
+                    continue
+
+                # Matrix Market usa índices começando em 1
+                i = int(partes[0]) - 1
+                j = int(partes[1]) - 1
+                valor = 1 if converter is None else converter(partes[2])
+                if not (0 <= i < n and 0 <= j < m):
+                    raise ValueError(f"Índice ({i + 1}, {j + 1}) fora dos limites")
+
+                _acumular(acumulado, (i, j), valor, duplicates)
+                if simetria != "general" and i != j:
+                    _acumular(acumulado, (j, i), sinal_espelho * valor, duplicates)
+                lidos += 1
+
+    if lidos != declarados:
+        raise ValueError(f"Esperados {declarados} elementos, lidos {lidos}")
+    return _construir(estrutura, n, m, acumulado)
+
+
+def ler_triplas(
+    caminho: str,
+    n: int,
+    m: int,
+    estrutura=MatrizEsparsaHash,
+    duplicates: str = "sum",
+    base: int = 0,
+    tamanho_bloco: int = TAMANHO_BLOCO,
+):
+    """
+    Lê um arquivo de triplas 'i j valor' (separadas por espaço ou vírgula,
+    índices começando em 'base', linhas com '#' ou '%' ignoradas) em blocos,
+    com a mesma política de repetições e memória de ler_mtx
+    """
+    if duplicates not in ("sum", "last"):
+        raise ValueError("duplicates deve ser 'sum' ou 'last'")
+
+    acumulado: dict = {}
+    with open(caminho) as f:
+        for bloco in _blocos_de_linhas(f, tamanho_bloco):
+            for linha in bloco:
+                partes = linha.replace(",", " ").split()
+                if not partes or partes[0][0] in "#%":
+                    continue
+
+                i = int(partes[0]) - base
+                j = int(partes[1]) - base
+                if not (0 <= i < n and 0 <= j < m):
+                    raise ValueError(
+                        f"Índice ({partes[0]}, {partes[1]}) fora dos limites"
+                    )
+                _acumular(acumulado, (i, j), _converter_valor(partes[2]), duplicates)
+
+    return _construir(estrutura, n, m, acumulado)
+
+
+def _itens_logicos(A):
+    for (p_i, p_j), valor in A.data.items():
+        if A.eh_transposta:
+            yield p_j, p_i, valor
+        else:
+            yield p_i, p_j, valor
+
+
+def _escrever_em_blocos(f, linhas, tamanho_bloco: int) -> None:
+    bloco: list = []
+    tamanho = 0
+    for linha in linhas:
+        bloco.append(linha)
+        tamanho += len(linha)
+        if tamanho >= tamanho_bloco:
+            f.writelines(bloco)
+            bloco.clear()
+            tamanho = 0
+    f.writelines(bloco)
+
+
+def escrever_mtx(A, caminho: str, tamanho_bloco: int = TAMANHO_BLOCO) -> None:
+    """
+    Grava A (Hash, AVL ou CSR) como Matrix Market 'coordinate general',
+    percorrendo os elementos sem copiá-los. Valores escalares do NumPy são
+    gravados como os números equivalentes em Python
+    em O(k)
+    """
+    inteiro = all(isinstance(valor, Integral) for _, valor in A.data.items())
+    with open(caminho, "w") as f:
+        campo = "integer" if inteiro else "real"
+        f.write(f"%%MatrixMarket matrix coordinate {campo} general\n")
+        f.write(f"{A.n} {A.m} {len(A.data)}\n")
+        linhas = (
+            f"{i + 1} {j + 1} {valor}\n" for i, j, valor in _itens_logicos(A)
+        )
+        _escrever_em_blocos(f, linhas, tamanho_bloco)
+
+
+def escrever_triplas(
+    A, caminho: str, base: int = 0, tamanho_bloco: int = TAMANHO_BLOCO
+) -> None:
+    """
+    Grava A como um arquivo de triplas 'i j valor', uma por linha
+    em O(k)
+    """
+    with open(caminho, "w") as f:
+        linhas = (
+            f"{i + base} {j + base} {valor}\n" for i, j, valor in _itens_logicos(A)
+        )
+        _escrever_em_blocos(f, linhas, tamanho_bloco)
@@ -1,24 +1,54 @@
+import glob
+import sys
+
 import matplotlib.pyplot as plt
 import pandas as pd
 
-def gerar_graficos_completos():
-    # 1. Carregar os dados
-    colunas = ["estrutura", "i", "n", "esparsidade", "k", 
-               "tempo_soma", "tempo_mult", "tempo_mult_escalar", "memoria"]
-    
+from benchmark import carregar_resultados
+
+
+def plotar_tempo(ax, subset, eixo_x, operacao, est, colors, markers):
+    """
+    Plota a mediana dos tempos com barras de erro do primeiro ao terceiro quartil
+    """
+    mediana = subset[f'tempo_{operacao}_mediana']
+    ax.errorbar(subset[eixo_x], mediana,
+                yerr=[mediana - subset[f'tempo_{operacao}_q1'],
+                      subset[f'tempo_{operacao}_q3'] - mediana],
+                marker=markers.get(est, 'x'), color=colors.get(est, 'gray'),
+                label=est, capsize=3)
+
+
+def gerar_graficos_completos(caminho=None):
+    # 1. Carregar os dados (por padrão, o resultado mais recente)
+    if caminho is None:
+        arquivos = sorted(
+            glob.glob('resultados_benchmark_*.csv')
+            + glob.glob('resultados_benchmark_*.json')
+        )
+        if not arquivos:
+            print("Nenhum arquivo 'resultados_benchmark_*.csv' encontrado.")
+            return
+        caminho = arquivos[-1]
+
     try:
-        df = pd.read_csv('resultados_benchmark.csv', names=colunas, header=None)
+        _, linhas = carregar_resultados(caminho)
     except FileNotFoundError:
-        print("Arquivo 'resultados_benchmark.csv' não encontrado.")
+        print(f"Arquivo '{caminho}' não encontrado.")
         return
+    df = pd.DataFrame(linhas)
 
     # 2. Configurar a área de plotagem (3 linhas x 2 colunas)
     fig, axes = plt.subplots(3, 2, figsize=(14, 16))
     plt.subplots_adjust(hspace=0.4, wspace=0.3)
 
     # Definições de estilo
-    colors = {'Hash': 'green', 'Arvore': 'blue', 'Tradicional': 'red'}
-    markers = {'Hash': 'o', 'Arvore': '^', 'Tradicional': 's'}
+    colors = {'Hash': 'green', 'HashInteira': 'olive', 'HashTipada': 'teal',
+              'Arvore': 'blue', 'ArvoreBMais': 'cyan', 'CSR': 'purple',
+              'Adaptativa': 'orange', 'NumPy': 'black', 'Tradicional': 'red'}
+    markers = {'Hash': 'o', 'HashInteira': 'h', 'HashTipada': '*', 'Arvore': '^',
+               'ArvoreBMais': '>', 'CSR': 'D', 'Adaptativa': 'v', 'NumPy': 'P',
+               'Tradicional': 's'}
     estruturas = df['estrutura'].unique()
 
     # =================================================================
@@ -31,7 +61,7 @@ def gerar_graficos_completos():
     for est in estruturas:
         subset = df_1pct[df_1pct['estrutura'] == est].sort_values('n')
         if not subset.empty:
-            ax.plot(subset['n'], subset['memoria'], marker=markers[est], 
+            ax.plot(subset['n'], subset['memoria'], marker=markers.get(est, 'x'),
                     color=colors.get(est, 'gray'), label=est)
     ax.set_title('Memória vs Dimensão N (Esparsidade 1%)')
     ax.set_xlabel('Dimensão N')
@@ -45,9 +75,8 @@ def gerar_graficos_completos():
     ax = axes[0, 1]
     for est in estruturas:
         subset = df_1pct[df_1pct['estrutura'] == est].sort_values('n')
-        if not subset.empty:
-            ax.plot(subset['n'], subset['tempo_soma'], marker=markers[est], 
-                    color=colors.get(est, 'gray'), label=est)
+        if not subset.empty and 'tempo_soma_mediana' in subset:
+            plotar_tempo(ax, subset, 'n', 'soma', est, colors, markers)
     ax.set_title('Tempo Soma vs Dimensão N (Esparsidade 1%)')
     ax.set_xlabel('Dimensão N')
     ax.set_ylabel('Tempo (s)')
@@ -64,9 +93,8 @@ def gerar_graficos_completos():
     ax = axes[1, 0]
     for est in estruturas:
         subset = df_1pct[df_1pct['estrutura'] == est].sort_values('n')
-        if not subset.empty:
-            ax.plot(subset['n'], subset['tempo_mult_escalar'], marker=markers[est], 
-                    color=colors.get(est, 'gray'), label=est)
+        if not subset.empty and 'tempo_mult_escalar_mediana' in subset:
+            plotar_tempo(ax, subset, 'n', 'mult_escalar', est, colors, markers)
     ax.set_title('Tempo Mult. Escalar vs Dimensão N (Esparsidade 1%)')
     ax.set_xlabel('Dimensão N')
     ax.set_ylabel('Tempo (s)')
@@ -79,9 +107,8 @@ def gerar_graficos_completos():
     ax = axes[1, 1]
     for est in estruturas:
         subset = df_1pct[df_1pct['estrutura'] == est].sort_values('n')
-        if not subset.empty:
-            ax.plot(subset['n'], subset['tempo_mult'], marker=markers[est], 
-                    color=colors.get(est, 'gray'), label=est)
+        if not subset.empty and 'tempo_mult_mediana' in subset:
+            plotar_tempo(ax, subset, 'n', 'mult', est, colors, markers)
     ax.set_title('Tempo Mult. Matriz vs Dimensão N (Esparsidade 1%)')
     ax.set_xlabel('Dimensão N')
     ax.set_ylabel('Tempo (s)')
@@ -98,12 +125,10 @@ def gerar_graficos_completos():
     ax = axes[2, 0]
     df_n1000 = df[df['n'] == 1000]
     
-    # CORREÇÃO AQUI: Definimos a lista diretamente no loop
-    for est in ['Hash', 'Arvore', 'Tradicional']: 
-        if est in df_n1000['estrutura'].unique():
+    for est in ['Hash', 'Arvore', 'CSR', 'Tradicional']:
+        if est in df_n1000['estrutura'].unique() and 'tempo_mult_mediana' in df_n1000:
             subset = df_n1000[df_n1000['estrutura'] == est].sort_values('esparsidade')
-            ax.plot(subset['esparsidade'], subset['tempo_mult'], marker=markers[est], 
-                    color=colors.get(est, 'gray'), label=est)
+            plotar_tempo(ax, subset, 'esparsidade', 'mult', est, colors, markers)
             
     ax.set_title('Tempo Mult. vs Esparsidade (N = 1.000)')
     ax.set_xlabel('Esparsidade (%)')
@@ -114,15 +139,14 @@ def gerar_graficos_completos():
     ax.grid(True, which="both", ls="--")
 
     # --- Gráfico 6: Tempo Mult vs Esparsidade (N = 1.000.000) ---
-    # Apenas Hash e Árvore
+    # Apenas as estruturas esparsas
     ax = axes[2, 1]
-    df_n1M = df[(df['n'] == 1000000) & (df['estrutura'].isin(['Hash', 'Arvore']))]
+    df_n1M = df[(df['n'] == 1000000) & (df['estrutura'].isin(['Hash', 'Arvore', 'CSR']))]
     
-    for est in ['Hash', 'Arvore']:
-        if est in df_n1M['estrutura'].unique():
+    for est in ['Hash', 'Arvore', 'CSR']:
+        if est in df_n1M['estrutura'].unique() and 'tempo_mult_mediana' in df_n1M:
             subset = df_n1M[df_n1M['estrutura'] == est].sort_values('esparsidade')
-            ax.plot(subset['esparsidade'], subset['tempo_mult'], marker=markers[est], 
-                    color=colors.get(est, 'gray'), label=est)
+            plotar_tempo(ax, subset, 'esparsidade', 'mult', est, colors, markers)
 
     ax.set_title('Tempo Mult. vs Esparsidade (N = 1.000.000)')
     ax.set_xlabel('Esparsidade (%)')
@@ -138,4 +162,4 @@ def gerar_graficos_completos():
     plt.show()
 
 if __name__ == "__main__":
-    gerar_graficos_completos()
\ No newline at end of file
+    gerar_graficos_completos(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,472 @@
+import math
+from collections import Counter
+
+from estrutura1 import MatrizEsparsaHash
+from estrutura2 import Arvore, MatrizEsparsaArvore
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele a fachada alterna só entre Hash e AVL
+    np = None
+
+# Custos aproximados em ns por unidade de trabalho, medidos com benchmark.py
+# (CPython 3.11). 'acesso' é por leitura/escrita de um elemento (na AVL, por
+# nível da árvore), 'soma' e 'escalar' por elemento percorrido, 'produto' por
+# produto parcial ('produto_inteiro' quando a densa é int64, que o NumPy não
+# multiplica via BLAS), 'linha' por elemento examinado ao extrair uma linha e
+# 'conversao' por elemento ao montar a estrutura a partir de outra
+CUSTOS = {
+    "Hash": {
+        "acesso": 550,
+        "soma": 2700,
+        "escalar": 450,
+        "produto": 580,
+        "linha": 100,
+        "conversao": 500,
+    },
+    "Arvore": {
+        "acesso": 300,
+        "soma": 4800,
+        "escalar": 13000,
+        "produto": 1900,
+        "linha": 300,
+        "conversao": 2500,
+    },
+    "Densa": {
+        "acesso": 1300,
+        "soma": 3,
+        "escalar": 3,
+        "produto": 0.04,
+        "produto_inteiro": 1.8,
+        "linha": 3,
+        "conversao": 60,
+    },
+}
+
+# Maior n * m guardado de forma densa (128 MB em float64)
+LIMITE_DENSO = 1 << 24
+# Inteiros maiores que isso não vão para o NumPy
+LIMITE_INTEIRO_DENSO = 1 << 20
+# Leituras e escritas acumuladas entre duas reavaliações do modelo de custo
+INTERVALO_ACESSOS = 64
+# Depois desse número de operações a memória do modelo cai pela metade, para
+# que a mistura recente pese mais que a antiga
+MEIA_VIDA = 256
+
+
+class MatrizDensa:
+    """
+    Backend denso da MatrizAdaptativa: um arranjo NumPy n x m (int64 ou
+    float64). Como nas estruturas esparsas, a transposta é uma view do mesmo
+    arranjo com cópia na escrita: o arranjo compartilhado fica somente
+    leitura, e a primeira matriz a escrever nele o copia antes. Operações
+    inteiras que poderiam estourar o int64 levantam OverflowError em vez de
+    dar um resultado errado
+    """
+
+    def __init__(self, data) -> None:
+        self.data = data
+        self.n: int = data.shape[0]
+        self.m: int = data.shape[1]
+
+    def _maximo(self) -> int:
+        return int(np.abs(self.data).max()) if self.data.size else 0
+
+    def _verificar_int64(self, limite: int) -> None:
+        if limite >= 2**63:
+            raise OverflowError("Resultado pode não caber em int64")
+
+    def __getitem__(self, tupla_pos: tuple[int, int]) -> int | float:
+        return self.data[tupla_pos].item()
+
+    def __setitem__(self, tupla_pos: tuple[int, int], valor: int | float) -> None:
+        if self.data.dtype.kind == "i" and not isinstance(valor, int):
+            self.data = self.data.astype(np.float64)
+        elif not self.data.flags.writeable:
+            # Arranjo compartilhado com uma transposta (ou mapeado do disco)
+            self.data = self.data.copy()
+        self.data[tupla_pos] = valor
+
+    def __add__(self, B: "MatrizDensa") -> "MatrizDensa":
+        if self.n != B.n or self.m != B.m:
+            raise ValueError("Matrizes devem ter mesmas dimensões")
+        if self.data.dtype.kind == "i" and B.data.dtype.kind == "i":
+            self._verificar_int64(self._maximo() + B._maximo())
+        return MatrizDensa(self.data + B.data)
+
+    def __mul__(self, escalar: int | float) -> "MatrizDensa":
+        if self.data.dtype.kind == "i":
+            if not isinstance(escalar, int):
+                return MatrizDensa(self.data.astype(np.float64) * escalar)
+            self._verificar_int64(self._maximo() * abs(escalar))
+        return MatrizDensa(self.data * escalar)
+
+    def __rmul__(self, escalar: int | float) -> "MatrizDensa":
+        return self.__mul__(escalar)
+
+    def __matmul__(self, B: "MatrizDensa") -> "MatrizDensa":
+        if self.data.dtype.kind == "i" and B.data.dtype.kind == "i":
+            self._verificar_int64(self._maximo() * B._maximo() * self.m)
+        return MatrizDensa(self.data @ B.data)
+
+    def transpor(self) -> "MatrizDensa":
+        """
+        Retorna a transposta como view do mesmo arranjo, que passa a ser
+        somente leitura: escrever numa das duas copia o arranjo antes, sem
+        alterar a outra
+        em O(1)
+        """
+        self.data.setflags(write=False)
+        return MatrizDensa(self.data.T)
+
+    def row(self, i: int) -> dict:
+        linha = self.data[i]
+        colunas = np.flatnonzero(linha)
+        return dict(zip(colunas.tolist(), linha[colunas].tolist()))
+
+    def items(self):
+        linhas, colunas = np.nonzero(self.data)
+        valores = self.data[linhas, colunas].tolist()
+        return zip(zip(linhas.tolist(), colunas.tolist()), valores)
+
+    def k(self) -> int:
+        return int(np.count_nonzero(self.data))
+
+
+def _k(A) -> int:
+    return A.k() if isinstance(A, MatrizDensa) else len(A.data)
+
+
+def _valores_inteiros(A) -> bool:
+    """
+    Se A iria para o backend denso como int64 (olhando só um elemento)
+    """
+    if isinstance(A, MatrizDensa):
+        return A.data.dtype.kind == "i"
+    for _, valor in A.data.items():
+        return isinstance(valor, int)
+    return False
+
+
+def _nome_backend(A) -> str:
+    if isinstance(A, MatrizEsparsaHash):
+        return "Hash"
+    if isinstance(A, MatrizEsparsaArvore):
+        return "Arvore"
+    return "Densa"
+
+
+def _tipo_denso(valores):
+    """
+    dtype que guarda os valores sem mudar nenhuma conta, ou None se eles não
+    podem ir para o NumPy (tipos mistos ou inteiros grandes)
+    """
+    tipos = set(map(type, valores))
+    if tipos <= {float}:
+        return np.float64
+    if tipos <= {int, float}:
+        if all(abs(valor) < LIMITE_INTEIRO_DENSO for valor in valores):
+            return np.int64 if tipos == {int} else np.float64
+    return None
+
+
+def _itens_logicos(A):
+    if isinstance(A, MatrizDensa):
+        return A.items()
+    if not A.eh_transposta:
+        return A.data.items()
+    return (((j, i), valor) for (i, j), valor in A.data.items())
+
+
+def converter(A, nome: str):
+    """
+    Retorna A no backend 'nome' ("Hash", "Arvore" ou "Densa"), mantendo a
+    orientação física das esparsas; retorna None se A não cabe no backend denso
+    em O(k) para Hash, O(k log k) para AVL e O(n * m) para a densa
+    """
+    if _nome_backend(A) == nome:
+        return A
+
+    if nome == "Densa":
+        if np is None or A.n * A.m > LIMITE_DENSO:
+            return None
+        itens = list(_itens_logicos(A))
+        tipo = _tipo_denso([valor for _, valor in itens])
+        if tipo is None:
+            return None
+        data = np.zeros((A.n, A.m), dtype=tipo)
+        if itens:
+            posicoes = np.array([chave for chave, _ in itens], dtype=np.int64)
+            data[posicoes[:, 0], posicoes[:, 1]] = [valor for _, valor in itens]
+        return MatrizDensa(data)
+
+    if isinstance(A, MatrizDensa):
+        # np.nonzero percorre em ordem de linhas: os itens já saem ordenados
+        itens = list(A.items())
+        eh_transposta = False
+    else:
+        itens = list(A.data.items())
+        eh_transposta = A.eh_transposta
+
+    if nome == "Hash":
+        C = MatrizEsparsaHash(A.n, A.m)
+        C.data = dict(itens)
+    else:
+        C = MatrizEsparsaArvore(A.n, A.m)
+        if isinstance(A, MatrizEsparsaHash):
+            itens.sort()
+        C.data = Arvore.de_itens_ordenados(itens)
+    C.eh_transposta = eh_transposta
+    return C
+
+
+class MatrizAdaptativa:
+    """
+    Fachada que guarda a matriz em Hash, AVL ou densa (NumPy) e troca de
+    backend quando o modelo de custo prevê ganho líquido. Para cada operação,
+    o modelo soma quanto ela teria custado em cada backend; antes das operações
+    caras (e a cada INTERVALO_ACESSOS leituras/escritas), a matriz é convertida
+    se o custo acumulado no backend atual menos o do melhor backend passar do
+    custo da conversão. 'uso' conta (operação, backend) de tudo que foi
+    executado e 'historico' lista as operações caras e as conversões
+    """
+
+    def __init__(
+        self, n: int, m: int, backend: str = "Hash", adaptar: bool = True
+    ) -> None:
+        A = MatrizEsparsaHash(n, m)
+        self.atual = converter(A, backend) if backend != "Hash" else A
+        if self.atual is None:
+            raise ValueError(f"Backend '{backend}' indisponível para {n} x {m}")
+        self.adaptar: bool = adaptar
+        self.uso: Counter = Counter()
+        self.historico: list = []
+        self._custos: Counter = Counter()
+        self._operacoes: int = 0
+        self._acessos: int = 0
+
+    @classmethod
+    def de_matriz(cls, A, adaptar: bool = True) -> "MatrizAdaptativa":
+        """
+        Envolve uma MatrizEsparsaHash, MatrizEsparsaArvore ou MatrizDensa já
+        existente, sem copiá-la
+        """
+        fachada = cls(0, 0, adaptar=adaptar)
+        fachada.atual = A
+        return fachada
+
+    @property
+    def n(self) -> int:
+        return self.atual.n
+
+    @property
+    def m(self) -> int:
+        return self.atual.m
+
+    @property
+    def backend(self) -> str:
+        return _nome_backend(self.atual)
+
+    def k(self) -> int:
+        return _k(self.atual)
+
+    def densidade(self) -> float:
+        return self.k() / (self.n * self.m) if self.n and self.m else 0.0
+
+    def _backends(self) -> tuple:
+        if np is None or self.n * self.m > LIMITE_DENSO:
+            return ("Hash", "Arvore")
+        return ("Hash", "Arvore", "Densa")
+
+    def _custo_conversao(self, nome: str, A=None) -> float:
+        A = self.atual if A is None else A
+        origem = _nome_backend(A)
+        if origem == nome:
+            return 0.0
+        custo = _k(A) * CUSTOS[nome]["conversao"]
+        if "Densa" in (origem, nome):
+            # Zerar ou varrer o arranjo inteiro
+            custo += A.n * A.m * CUSTOS["Densa"]["conversao"] / 20
+        return custo
+
+    def para(self, nome: str) -> "MatrizAdaptativa":
+        """
+        Converte explicitamente para o backend 'nome'
+        """
+        if nome != self.backend:
+            convertida = converter(self.atual, nome)
+            if convertida is None:
+                raise ValueError(f"A matriz não cabe no backend '{nome}'")
+            self.historico.append(("conversao", f"{self.backend}->{nome}"))
+            self.atual = convertida
+            self._custos.clear()
+        return self
+
+    def _reavaliar(self, custos_operacao: dict) -> None:
+        """
+        Acumula os custos da operação em cada backend e troca de backend se o
+        que já se gastou a mais no atual paga a conversão
+        """
+        self._operacoes += 1
+        if self._operacoes % MEIA_VIDA == 0:
+            for nome in self._custos:
+                self._custos[nome] /= 2
+        for nome, custo in custos_operacao.items():
+            self._custos[nome] += custo
+        if not self.adaptar:
+            return
+
+        atual = self.backend
+        melhor = min(custos_operacao, key=lambda nome: self._custos[nome])
+        if melhor == atual:
+            return
+        if self._custos[atual] - self._custos[melhor] > self._custo_conversao(melhor):
+            convertida = converter(self.atual, melhor)
+            if convertida is not None:
+                self.historico.append(("conversao", f"{atual}->{melhor}"))
+                self.atual = convertida
+                self._custos.clear()
+
+    def _registrar(self, operacao: str) -> None:
+        self.uso[operacao, self.backend] += 1
+        if operacao not in ("acesso", "linha"):
+            self.historico.append((operacao, self.backend))
+
+    def _custo_acesso(self) -> dict:
+        log_k = math.log2(self.k() + 2)
+        custos = {
+            "Hash": CUSTOS["Hash"]["acesso"],
+            "Arvore": CUSTOS["Arvore"]["acesso"] * log_k,
+            "Densa": CUSTOS["Densa"]["acesso"],
+        }
+        return {nome: custos[nome] for nome in self._backends()}
+
+    def __getitem__(self, tupla_pos: tuple[int, int]) -> int | float:
+        self._acesso()
+        return self.atual[tupla_pos]
+
+    def __setitem__(self, tupla_pos: tuple[int, int], valor: int | float) -> None:
+        self._acesso()
+        try:
+            self.atual[tupla_pos] = valor
+        except OverflowError:
+            # Inteiro grande demais para o backend denso
+            self.para("Hash")
+            self.atual[tupla_pos] = valor
+
+    def _acesso(self) -> None:
+        self.uso["acesso", self.backend] += 1
+        self._acessos += 1
+        if self._acessos >= INTERVALO_ACESSOS:
+            custos = self._custo_acesso()
+            self._reavaliar({nome: custo * self._acessos for nome, custo in custos.items()})
+            self._acessos = 0
+
+    def row(self, i: int) -> dict:
+        """
+        Retorna {j: A[i, j]} da linha i no backend atual
+        """
+        k = self.k()
+        custos = {
+            "Hash": CUSTOS["Hash"]["linha"] * k,
+            "Arvore": CUSTOS["Arvore"]["linha"] * (math.log2(k + 2) + k / max(self.n, 1)),
+            "Densa": CUSTOS["Densa"]["linha"] * self.m,
+        }
+        self._reavaliar({nome: custos[nome] for nome in self._backends()})
+        self._registrar("linha")
+        return self.atual.row(i)
+
+    def _operando(self, B):
+        return B.atual if isinstance(B, MatrizAdaptativa) else B
+
+    def _binaria(self, operacao: str, B, custos: dict, executar) -> "MatrizAdaptativa":
+        """
+        Escolhe o backend (contando a conversão temporária de B), converte B
+        para ele e executa
+        """
+        B = self._operando(B)
+        custos = {
+            nome: custo + self._custo_conversao(nome, B)
+            for nome, custo in custos.items()
+            if nome in self._backends()
+        }
+        self._reavaliar(custos)
+        convertido = converter(B, self.backend)
+        if convertido is not None:
+            try:
+                resultado = executar(self.atual, convertido)
+            except OverflowError:
+                convertido = None
+        if convertido is None:
+            # B não cabe no backend denso ou o resultado estouraria o int64:
+            # a operação é feita em Hash
+            self.para("Hash")
+            resultado = executar(self.atual, converter(B, "Hash"))
+        self._registrar(operacao)
+        return MatrizAdaptativa.de_matriz(resultado, self.adaptar)
+
+    def __add__(self, B) -> "MatrizAdaptativa":
+        """
+        Retorna C = A + B no backend escolhido pelo modelo de custo
+        """
+        operando = self._operando(B)
+        if self.n != operando.n or self.m != operando.m:
+            # Testado antes de escolher o backend: o denso faria broadcasting
+            raise ValueError("Matrizes devem ter mesmas dimensões")
+        k = self.k() + _k(operando)
+        custos = {
+            "Hash": CUSTOS["Hash"]["soma"] * k,
+            "Arvore": CUSTOS["Arvore"]["soma"] * k,
+            "Densa": CUSTOS["Densa"]["soma"] * self.n * self.m,
+        }
+        return self._binaria("soma", B, custos, lambda X, Y: X + Y)
+
+    def __matmul__(self, B) -> "MatrizAdaptativa":
+        """
+        Retorna C = A @ B no backend escolhido pelo modelo de custo
+        """
+        if self.m != self._operando(B).n:
+            raise ValueError("Dimensões incompatíveis para multiplicação")
+        operando = self._operando(B)
+        # Produtos parciais esperados supondo linhas de B de tamanho uniforme
+        produtos = self.k() * _k(operando) / max(operando.n, 1)
+        if _valores_inteiros(self.atual) and _valores_inteiros(operando):
+            custo_denso = CUSTOS["Densa"]["produto_inteiro"]
+        else:
+            custo_denso = CUSTOS["Densa"]["produto"]
+        custos = {
+            "Hash": CUSTOS["Hash"]["produto"] * produtos,
+            "Arvore": CUSTOS["Arvore"]["produto"] * produtos,
+            "Densa": custo_denso * self.n * self.m * operando.m,
+        }
+        return self._binaria("mult", B, custos, lambda X, Y: X @ Y)
+
+    def __mul__(self, escalar: int | float) -> "MatrizAdaptativa":
+        """
+        Retorna C = A * b, sendo b um escalar, no backend escolhido pelo modelo
+        """
+        k = self.k()
+        custos = {
+            "Hash": CUSTOS["Hash"]["escalar"] * k,
+            "Arvore": CUSTOS["Arvore"]["escalar"] * k,
+            "Densa": CUSTOS["Densa"]["escalar"] * self.n * self.m,
+        }
+        self._reavaliar({nome: custos[nome] for nome in self._backends()})
+        try:
+            resultado = self.atual * escalar
+        except OverflowError:
+            self.para("Hash")
+            resultado = self.atual * escalar
+        self._registrar("mult_escalar")
+        return MatrizAdaptativa.de_matriz(resultado, self.adaptar)
+
+    def __rmul__(self, escalar: int | float) -> "MatrizAdaptativa":
+        return self.__mul__(escalar)
+
+    def transpor(self) -> "MatrizAdaptativa":
+        """
+        Retorna a transposta no mesmo backend, compartilhando os dados até a
+        primeira escrita de uma das duas
+        em O(1)
+        """
+        return MatrizAdaptativa.de_matriz(self.atual.transpor(), self.adaptar)
@@ -0,0 +1,65 @@
+import gc
+import sys
+import tracemalloc
+from types import FunctionType, ModuleType
+
+# Objetos que pertencem ao interpretador e não à estrutura medida
+_TIPOS_IGNORADOS = (type, ModuleType, FunctionType)
+
+
+def _compartilhado(obj) -> bool:
+    if obj is None or isinstance(obj, bool):
+        return True
+    if type(obj) is int and -5 <= obj <= 256:
+        return True
+    return isinstance(obj, _TIPOS_IGNORADOS)
+
+
+def tamanho_profundo(obj) -> int:
+    """
+    Retorna os bytes retidos por obj: soma sys.getsizeof de todos os objetos
+    alcançáveis a partir dele (cada um contado uma vez), percorrendo o grafo
+    com uma pilha para não estourar a recursão em árvores profundas
+    em O(número de objetos alcançáveis)
+    """
+    vistos: set = set()
+    total = 0
+    pilha: list = [obj]
+    while pilha:
+        atual = pilha.pop()
+        if id(atual) in vistos or _compartilhado(atual):
+            continue
+        vistos.add(id(atual))
+        total += sys.getsizeof(atual)
+        pilha.extend(gc.get_referents(atual))
+    return total
+
+
+def memoria_alocada(construir, *args):
+    """
+    Executa construir(*args) com o tracemalloc ligado e retorna
+    (objeto construído, bytes que continuaram alocados ao final)
+    """
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        obj = construir(*args)
+        depois = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return obj, depois - antes
+
+
+def pico_memoria(operacao, *args) -> int:
+    """
+    Executa operacao(*args) com o tracemalloc ligado e retorna o pico de bytes
+    alocados durante a chamada (inclui o resultado e os intermediários)
+    """
+    tracemalloc.start()
+    try:
+        inicio = tracemalloc.get_traced_memory()[0]
+        operacao(*args)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return pico - inicio
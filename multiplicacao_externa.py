@@ -0,0 +1,202 @@
+import json
+import os
+import shutil
+import tempfile
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from estrutura1 import MatrizEsparsaHash
+from estrutura2 import MatrizEsparsaArvore
+from estrutura3 import MatrizEsparsaCSR
+from multiplicacao_paralela import _linhas_logicas
+from persistencia import carregar, salvar
+
+# Quantos elementos de C ficam em memória antes de o bloco ir para o disco
+ELEMENTOS_POR_BLOCO = 1 << 20
+_MANIFESTO = "manifesto.json"
+
+
+class MatrizEmDisco:
+    """
+    Resultado de matmul_out_of_core: C fica em disco como blocos de linhas
+    consecutivas, cada um gravado no formato binário de persistencia. Os blocos
+    são abertos sob demanda por mmap e os 'blocos_em_cache' usados mais
+    recentemente ficam abertos
+    Complexidades:
+    - Abertura: O(número de blocos)
+    - Acesso C[i,j]: O(log b + log d) com o bloco em cache
+    - Percurso: O(k + n)
+    """
+
+    def __init__(
+        self,
+        diretorio: str,
+        blocos_em_cache: int = 4,
+        temporario: bool = False,
+    ) -> None:
+        with open(os.path.join(diretorio, _MANIFESTO)) as f:
+            manifesto = json.load(f)
+        self.diretorio: str = diretorio
+        self.n: int = manifesto["n"]
+        self.m: int = manifesto["m"]
+        self._k: int = manifesto["k"]
+        # Blocos como (primeira linha, linha seguinte à última, arquivo)
+        self.blocos: list = [tuple(bloco) for bloco in manifesto["blocos"]]
+        self._inicios: list = [inicio for inicio, _, _ in self.blocos]
+        self.blocos_em_cache: int = max(1, blocos_em_cache)
+        self._cache: OrderedDict = OrderedDict()
+        self._temporario: bool = temporario
+
+    def _bloco(self, b: int) -> MatrizEsparsaCSR:
+        """
+        Bloco b mapeado do disco, mantendo a ordem de uso para descartar o
+        menos recente quando o cache enche
+        """
+        if b in self._cache:
+            self._cache.move_to_end(b)
+            return self._cache[b]
+
+        bloco = carregar(os.path.join(self.diretorio, self.blocos[b][2]))
+        self._cache[b] = bloco
+        if len(self._cache) > self.blocos_em_cache:
+            self._cache.popitem(last=False)
+        return bloco
+
+    def __getitem__(self, tupla_pos: tuple[int, int]) -> int | float:
+        i, j = tupla_pos
+        b = bisect_right(self._inicios, i) - 1
+        if b < 0 or i >= self.blocos[b][1]:
+            return 0
+        return self._bloco(b)[i - self.blocos[b][0], j]
+
+    def items(self):
+        """
+        Percorre ((i, j), valor) em ordem de (i, j), um bloco por vez
+        """
+        for b, (inicio, _, _) in enumerate(self.blocos):
+            for (i, j), valor in self._bloco(b).data.items():
+                yield ((inicio + i, j), valor)
+
+    def __iter__(self):
+        return self.items()
+
+    def k(self) -> int:
+        return self._k
+
+    def materializar(self, estrutura=MatrizEsparsaHash):
+        """
+        Carrega C inteira para 'estrutura' (MatrizEsparsaHash ou
+        MatrizEsparsaArvore); só faz sentido se C couber na memória
+        """
+        triplas = ((i, j, valor) for (i, j), valor in self.items())
+        return estrutura.from_triplets(self.n, self.m, triplas, assume_sorted=True)
+
+    def fechar(self) -> None:
+        """
+        Fecha os blocos abertos e, se o diretório foi criado por
+        matmul_out_of_core, apaga os arquivos
+        """
+        self._cache.clear()
+        if self._temporario:
+            shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def __enter__(self) -> "MatrizEmDisco":
+        return self
+
+    def __exit__(self, *excecao) -> None:
+        self.fechar()
+
+
+def _gravar_bloco(
+    diretorio: str, numero: int, m: int, inicio: int, fim: int, linhas: list
+) -> tuple[int, int, str]:
+    """
+    Grava as linhas [inicio, fim) de C, dadas como (i, colunas, valores) em
+    ordem, como uma matriz CSR de fim - inicio linhas
+    em O(nnz do bloco + fim - inicio)
+    """
+    indptr = array("q", [0]) * (fim - inicio + 1)
+    indices = array("q")
+    valores: list = []
+    for i, colunas, valores_linha in linhas:
+        indptr[i - inicio + 1] = len(colunas)
+        indices.extend(colunas)
+        valores.extend(valores_linha)
+    for r in range(fim - inicio):
+        indptr[r + 1] += indptr[r]
+
+    arquivo = f"bloco_{numero:06d}.bin"
+    bloco = MatrizEsparsaCSR._de_arranjos(fim - inicio, m, indptr, indices, valores)
+    salvar(bloco, os.path.join(diretorio, arquivo))
+    return (inicio, fim, arquivo)
+
+
+def matmul_out_of_core(
+    A,
+    B,
+    diretorio: str | None = None,
+    elementos_por_bloco: int = ELEMENTOS_POR_BLOCO,
+    blocos_em_cache: int = 4,
+) -> MatrizEmDisco:
+    """
+    Retorna C = A @ B sem montar C na memória: as linhas de A são processadas
+    em ordem (Gustavson) e, sempre que as linhas prontas de C somam
+    'elementos_por_bloco' elementos, elas vão para um arquivo em 'diretorio'
+    (por padrão, um diretório temporário apagado por MatrizEmDisco.fechar).
+    Só A agrupada por linhas, B agrupada por linhas e um bloco de C ficam em
+    memória. Os valores são acumulados na mesma ordem do __matmul__ serial
+    em O(ka * db + kc log dc + n)
+    """
+    if A.m != B.n:
+        raise ValueError("Dimensões incompatíveis para multiplicação")
+    if not isinstance(A, (MatrizEsparsaHash, MatrizEsparsaArvore, MatrizEsparsaCSR)):
+        raise TypeError("A deve ser uma matriz esparsa Hash, AVL ou CSR")
+
+    temporario = diretorio is None
+    if temporario:
+        diretorio = tempfile.mkdtemp(prefix="matmul_")
+    else:
+        os.makedirs(diretorio, exist_ok=True)
+
+    linhas_A = _linhas_logicas(A)
+    linhas_B = _linhas_logicas(B)
+
+    blocos: list = []
+    pendentes: list = []
+    elementos = 0
+    inicio = 0
+    total = 0
+    acumulador: dict = {}
+    for i in sorted(linhas_A):
+        for k, valor_a in linhas_A[i]:
+            for j, valor_b in linhas_B.get(k, ()):
+                acumulador[j] = acumulador.get(j, 0) + valor_a * valor_b
+
+        colunas = [j for j in sorted(acumulador) if acumulador[j] != 0]
+        valores = [acumulador[j] for j in colunas]
+        acumulador.clear()
+        if not colunas:
+            continue
+
+        if elementos >= elementos_por_bloco:
+            # O bloco anterior termina onde começa esta linha
+            blocos.append(
+                _gravar_bloco(diretorio, len(blocos), B.m, inicio, i, pendentes)
+            )
+            pendentes = []
+            elementos = 0
+            inicio = i
+
+        pendentes.append((i, colunas, valores))
+        elementos += len(colunas)
+        total += len(colunas)
+
+    if pendentes:
+        blocos.append(
+            _gravar_bloco(diretorio, len(blocos), B.m, inicio, A.n, pendentes)
+        )
+
+    with open(os.path.join(diretorio, _MANIFESTO), "w") as f:
+        json.dump({"n": A.n, "m": B.m, "k": total, "blocos": blocos}, f)
+    return MatrizEmDisco(diretorio, blocos_em_cache, temporario)
@@ -0,0 +1,185 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from estrutura1 import MatrizEsparsaHash
+from estrutura2 import MatrizEsparsaArvore
+
+
+def _linhas_logicas(A) -> dict:
+    """
+    Agrupa os elementos de A por linha lógica, preservando a ordem de iteração
+    de A.data dentro de cada linha (a mesma ordem usada pelo __matmul__ serial)
+    em O(k) esperado
+    """
+    linhas: dict = {}
+    for (p_i, p_j), valor in A.data.items():
+        if A.eh_transposta:
+            i, j = (p_j, p_i)
+        else:
+            i, j = (p_i, p_j)
+
+        if i not in linhas:
+            linhas[i] = []
+        linhas[i].append((j, valor))
+    return linhas
+
+
+def _arranjo_tipado(valores: list) -> array | None:
+    """
+    Empacota os valores num arranjo 'q' ou 'd' sem perder informação; retorna
+    None para tipos mistos ou inteiros que não cabem em 64 bits
+    """
+    tipos = set(map(type, valores))
+    try:
+        if tipos <= {int}:
+            return array("q", valores)
+        if tipos == {float}:
+            return array("d", valores)
+    except OverflowError:
+        pass
+    return None
+
+
+def _csr_de_B(B) -> tuple[array, array, array] | None:
+    """
+    Monta o índice de linhas de B em arranjos CSR (indptr, indices, valores),
+    mantendo dentro de cada linha a ordem de iteração de B.data
+    em O(kb + n)
+    """
+    linhas = _linhas_logicas(B)
+    indptr = array("q", [0]) * (B.n + 1)
+    indices = array("q")
+    valores: list = []
+    for k in range(B.n):
+        for j, valor in linhas.get(k, ()):
+            indices.append(j)
+            valores.append(valor)
+        indptr[k + 1] = len(indices)
+
+    arranjo_valores = _arranjo_tipado(valores)
+    if arranjo_valores is None:
+        return None
+    return indptr, indices, arranjo_valores
+
+
+def _particionar(linhas_A: dict, indptr_B: array, partes: int) -> list:
+    """
+    Divide as linhas de A (em ordem crescente) em blocos contíguos com
+    aproximadamente o mesmo número de produtos parciais
+    em O(ka + r log r)
+    """
+    ordem = sorted(linhas_A)
+    pesos = [
+        1 + sum(indptr_B[k + 1] - indptr_B[k] for k, _ in linhas_A[i]) for i in ordem
+    ]
+    alvo = sum(pesos) / partes
+
+    blocos: list = []
+    atual: list = []
+    acumulado = 0
+    for i, peso in zip(ordem, pesos):
+        atual.append((i, linhas_A[i]))
+        acumulado += peso
+        if acumulado >= alvo * (len(blocos) + 1) and len(blocos) < partes - 1:
+            blocos.append(atual)
+            atual = []
+    if atual:
+        blocos.append(atual)
+    return blocos
+
+
+def _multiplicar_bloco(nomes: list, tamanhos: list, tipo_valores: str, bloco: list) -> list:
+    """
+    Executado em cada processo: lê o índice de B direto da memória
+    compartilhada e calcula as linhas de C do bloco (Gustavson)
+    """
+    memorias = [shared_memory.SharedMemory(name=nome) for nome in nomes]
+    indptr = memorias[0].buf[: tamanhos[0] * 8].cast("q")
+    indices = memorias[1].buf[: tamanhos[1] * 8].cast("q")
+    valores = memorias[2].buf[: tamanhos[2] * 8].cast(tipo_valores)
+    try:
+        resultado: list = []
+        acumulador: dict = {}
+        for i, linha in bloco:
+            for k, valor_a in linha:
+                for p in range(indptr[k], indptr[k + 1]):
+                    j = indices[p]
+                    acumulador[j] = acumulador.get(j, 0) + valor_a * valores[p]
+
+            resultado.append(
+                (i, [(j, acumulador[j]) for j in sorted(acumulador) if acumulador[j] != 0])
+            )
+            acumulador.clear()
+        return resultado
+    finally:
+        # As views precisam ser liberadas antes de fechar a memória
+        indptr.release()
+        indices.release()
+        valores.release()
+        for memoria in memorias:
+            memoria.close()
+
+
+def matmul_parallel(A, B, workers: int | None = None, estrutura=None):
+    """
+    Retorna C = A @ B dividindo as linhas de A entre 'workers' processos.
+    O índice de linhas de B é enviado uma única vez via memória compartilhada e
+    os blocos de C são reunidos em 'estrutura' (MatrizEsparsaHash ou
+    MatrizEsparsaArvore; por padrão, a mesma classe de A). Os valores são
+    acumulados na mesma ordem do __matmul__ serial, então o resultado é idêntico
+    """
+    if A.m != B.n:
+        raise ValueError("Dimensões incompatíveis para multiplicação")
+
+    if estrutura is None:
+        estrutura = type(A)
+    if estrutura not in (MatrizEsparsaHash, MatrizEsparsaArvore):
+        raise TypeError("estrutura deve ser MatrizEsparsaHash ou MatrizEsparsaArvore")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    csr_B = _csr_de_B(B) if workers > 1 else None
+    if csr_B is None:
+        # Um processo só, ou valores de B que não cabem num arranjo tipado
+        C = A @ B
+        if type(C) is estrutura:
+            return C
+        triplas = [(i, j, valor) for (i, j), valor in C.data.items()]
+        return estrutura.from_triplets(C.n, C.m, triplas)
+
+    linhas_A = _linhas_logicas(A)
+    blocos = _particionar(linhas_A, csr_B[0], workers)
+
+    memorias: list = []
+    try:
+        for arranjo in csr_B:
+            memoria = shared_memory.SharedMemory(
+                create=True, size=max(1, len(arranjo) * arranjo.itemsize)
+            )
+            memoria.buf[: len(arranjo) * arranjo.itemsize] = arranjo.tobytes()
+            memorias.append(memoria)
+
+        nomes = [memoria.name for memoria in memorias]
+        tamanhos = [len(arranjo) for arranjo in csr_B]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [
+                executor.submit(
+                    _multiplicar_bloco, nomes, tamanhos, csr_B[2].typecode, bloco
+                )
+                for bloco in blocos
+            ]
+            # Os blocos são contíguos e crescentes, então as triplas saem ordenadas
+            triplas = [
+                (i, j, valor)
+                for futuro in futuros
+                for i, linha in futuro.result()
+                for j, valor in linha
+            ]
+    finally:
+        for memoria in memorias:
+            memoria.close()
+            memoria.unlink()
+
+    return estrutura.from_triplets(A.n, B.m, triplas, assume_sorted=True)
@@ -0,0 +1,122 @@
+import mmap as modulo_mmap
+import struct
+import sys
+from array import array
+
+from estrutura1 import MatrizEsparsaHash
+from estrutura2 import MatrizEsparsaArvore
+from estrutura3 import ArranjosCSR, MatrizEsparsaCSR
+
+# Cabeçalho (little-endian, 32 bytes, mantém os arranjos alinhados em 8):
+# assinatura, versão, tipo dos valores ('q' ou 'd'), eh_transposta, n, m, k
+# Depois vêm os arranjos CSR físicos em int64/float64:
+# indptr (n_linhas + 1), indices (k) e valores (k)
+_CABECALHO = struct.Struct("<4sBcBxqqq")
+_ASSINATURA = b"MEsp"
+_VERSAO = 1
+
+
+def _arranjos_fisicos(A) -> ArranjosCSR:
+    """
+    Arranjos CSR da orientação física de A, com as chaves ordenadas
+    em O(k) para CSR e AVL, O(k log k) para Hash
+    """
+    if isinstance(A, MatrizEsparsaCSR):
+        return A.data
+    n_linhas = A.m if A.eh_transposta else A.n
+    if isinstance(A, MatrizEsparsaHash):
+        return ArranjosCSR.de_itens_ordenados(n_linhas, sorted(A.data.items()))
+    return ArranjosCSR.de_itens_ordenados(n_linhas, A.data.items())
+
+
+def _bytes_le(arranjo) -> bytes:
+    if not isinstance(arranjo, array):
+        arranjo = array(arranjo.format, arranjo)
+    if sys.byteorder == "big":
+        arranjo = array(arranjo.typecode, arranjo)
+        arranjo.byteswap()
+    return arranjo.tobytes()
+
+
+def salvar(A, caminho: str) -> None:
+    """
+    Grava A (Hash, AVL ou CSR) no formato binário, preservando a orientação
+    física para não precisar reordenar nada
+    em O(k + n), ou O(k log k + n) para Hash
+    """
+    arranjos = _arranjos_fisicos(A)
+    valores = arranjos.valores
+    tipo = getattr(valores, "typecode", None) or valores.format
+
+    with open(caminho, "wb") as f:
+        f.write(
+            _CABECALHO.pack(
+                _ASSINATURA,
+                _VERSAO,
+                tipo.encode(),
+                A.eh_transposta,
+                A.n,
+                A.m,
+                len(arranjos.indices),
+            )
+        )
+        f.write(_bytes_le(arranjos.indptr))
+        f.write(_bytes_le(arranjos.indices))
+        f.write(_bytes_le(valores))
+
+
+def carregar(caminho: str, mmap: bool = True, estrutura=MatrizEsparsaCSR):
+    """
+    Lê uma matriz gravada por salvar.
+    Com mmap=True o arquivo é mapeado em memória e devolvido como uma
+    MatrizEsparsaCSR somente leitura cujos arranjos são views do mapa: nada é
+    copiado e a abertura é O(1). Com mmap=False os arranjos são lidos para a
+    memória e convertidos para 'estrutura' (CSR, Hash ou AVL)
+    """
+    with open(caminho, "rb") as f:
+        if mmap and sys.byteorder == "little":
+            buffer = modulo_mmap.mmap(f.fileno(), 0, access=modulo_mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+
+    assinatura, versao, tipo, eh_transposta, n, m, k = _CABECALHO.unpack_from(buffer)
+    if assinatura != _ASSINATURA or versao != _VERSAO:
+        raise ValueError(f"'{caminho}' não é uma matriz esparsa salva nesse formato")
+    tipo = tipo.decode()
+    n_linhas = m if eh_transposta else n
+
+    inicio = _CABECALHO.size
+    limites = []
+    for tamanho in (n_linhas + 1, k, k):
+        limites.append((inicio, inicio + 8 * tamanho))
+        inicio += 8 * tamanho
+
+    A = MatrizEsparsaCSR(n, m)
+    A.eh_transposta = bool(eh_transposta)
+    A.data = ArranjosCSR(0)
+    A.data.n_linhas = n_linhas
+
+    if isinstance(buffer, modulo_mmap.mmap):
+        visao = memoryview(buffer)
+        A.data.indptr, A.data.indices, A.data.valores = (
+            visao[a:b].cast(formato)
+            for (a, b), formato in zip(limites, ("q", "q", tipo))
+        )
+        # Mantém o mapa aberto enquanto a matriz existir
+        A.data.mapa = buffer
+        return A
+
+    arranjos = []
+    for (a, b), formato in zip(limites, ("q", "q", tipo)):
+        arranjo = array(formato)
+        arranjo.frombytes(buffer[a:b])
+        if sys.byteorder == "big":
+            arranjo.byteswap()
+        arranjos.append(arranjo)
+    A.data.indptr, A.data.indices, A.data.valores = arranjos
+
+    if estrutura is MatrizEsparsaHash:
+        return A.para_hash()
+    if estrutura is MatrizEsparsaArvore:
+        return A.para_arvore()
+    return A
@@ -0,0 +1,113 @@
+import operator
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele usamos só o caminho em Python puro
+    np = None
+
+
+class VisaoLinhas:
+    """
+    Visão comprimida por linhas (lógicas) de uma matriz esparsa, usada pelos
+    produtos com vetores e blocos densos. 'linhas' guarda, em ordem crescente
+    de i, apenas as linhas não vazias como (i, colunas, valores)
+    """
+
+    def __init__(self, linhas: list) -> None:
+        self.linhas: list = linhas
+        self._arranjos = None
+
+    @classmethod
+    def de_itens(cls, itens, eh_transposta: bool) -> "VisaoLinhas":
+        """
+        Agrupa os itens físicos ((i, j), valor) por linha lógica
+        em O(k + r log r), sendo r o número de linhas não vazias
+        """
+        por_linha: dict = {}
+        for (p_i, p_j), valor in itens:
+            if eh_transposta:
+                i, j = (p_j, p_i)
+            else:
+                i, j = (p_i, p_j)
+
+            if i not in por_linha:
+                por_linha[i] = ([], [])
+            colunas, valores = por_linha[i]
+            colunas.append(j)
+            valores.append(valor)
+
+        return cls([(i, *por_linha[i]) for i in sorted(por_linha)])
+
+    def arranjos(self):
+        """
+        A mesma visão em arranjos NumPy (linhas não vazias, início de cada
+        linha, colunas, valores), montados uma única vez
+        """
+        if self._arranjos is None:
+            linhas = np.array([i for i, _, _ in self.linhas], dtype=np.int64)
+            tamanhos = np.array(
+                [len(colunas) for _, colunas, _ in self.linhas], dtype=np.int64
+            )
+            inicios = np.cumsum(tamanhos) - tamanhos
+            colunas = np.array(
+                [j for _, colunas, _ in self.linhas for j in colunas], dtype=np.int64
+            )
+            valores = np.array([v for _, _, valores in self.linhas for v in valores])
+            self._arranjos = (linhas, inicios, colunas, valores)
+        return self._arranjos
+
+
+def _eh_bloco(X) -> bool:
+    if np is not None and isinstance(X, np.ndarray):
+        return X.ndim == 2
+    return len(X) > 0 and not isinstance(X[0], (int, float))
+
+
+def _multiplicar_numpy(visao: VisaoLinhas, n: int, X):
+    linhas, inicios, colunas, valores = visao.arranjos()
+    Y = np.zeros((n,) + X.shape[1:], dtype=np.result_type(valores, X))
+    if len(linhas) == 0:
+        return Y
+
+    if X.ndim == 2:
+        produtos = valores[:, None] * X[colunas]
+    else:
+        produtos = valores * X[colunas]
+    Y[linhas] = np.add.reduceat(produtos, inicios, axis=0)
+    return Y
+
+
+def multiplicar_denso(visao: VisaoLinhas, n: int, m: int, X):
+    """
+    Retorna Y = A @ X, sendo A a matriz n x m descrita por 'visao' e X um vetor
+    denso de tamanho m (lista, array ou NumPy 1-D) ou um bloco denso m x r
+    (lista de linhas ou NumPy 2-D). Y volta no mesmo formato de X
+    em O(k) para vetores e O(k * r) para blocos
+    """
+    if len(X) != m:
+        raise ValueError("Dimensões incompatíveis para multiplicação")
+
+    if np is not None and isinstance(X, np.ndarray):
+        return _multiplicar_numpy(visao, n, X)
+
+    if _eh_bloco(X):
+        r = len(X[0])
+        Y = [[0] * r for _ in range(n)]
+        for i, colunas, valores in visao.linhas:
+            acumulado = Y[i]
+            for j, valor in zip(colunas, valores):
+                acumulado = [a + valor * b for a, b in zip(acumulado, X[j])]
+            Y[i] = acumulado
+        return Y
+
+    y = [0] * n
+    for i, colunas, valores in visao.linhas:
+        y[i] = sum(map(operator.mul, valores, map(X.__getitem__, colunas)))
+
+    if isinstance(X, array):
+        try:
+            return array(X.typecode, y)
+        except (TypeError, OverflowError):
+            return array("d", y)
+    return y
@@ -0,0 +1,170 @@
+
+import random
+
+import pytest
+
+from estrutura1 import DicionarioCompacto, MatrizEsparsaHash
+
+MODOS = [
+    {},
+    {"chaves_inteiras": True},
+    {"tipo_valores": "q"},
+    {"tipo_valores": "d"},
+]
+
+
+def _densa(A) -> dict:
+    return {
+        (i, j): A[i, j] for i in range(A.n) for j in range(A.m) if A[i, j] != 0
+    }
+
+
+def _produto_referencia(A, B) -> dict:
+    C: dict = {}
+    for (i, k), a in _densa(A).items():
+        for j in range(B.m):
+            b = B[k, j]
+            if b:
+                C[i, j] = C.get((i, j), 0) + a * b
+    return {chave: valor for chave, valor in C.items() if valor != 0}
+
+
+def test_matmul_com_inteiros_grandes_usa_caminho_em_python():
+    A = MatrizEsparsaHash(2, 2)
+    A[0, 0] = 2**70
+    A[0, 1] = 3
+    A[1, 1] = -(2**64)
+
+    C = A @ A
+    assert _densa(C) == _produto_referencia(A, A)
+    assert C[0, 0] == 2**140
+    assert _densa(A.transpor() @ A) == _produto_referencia(A.transpor(), A)
+
+
+def test_remover_indices_nao_afeta_quem_compartilha():
+    A = MatrizEsparsaHash.from_triplets(3, 3, [(0, 1, 5), (1, 1, 7), (2, 0, 4)])
+    A.criar_indices()
+    T = A.transpor()
+    S = A.snapshot()
+
+    T.remover_indices()
+    assert A._indices and S._indices and not T._indices
+    assert A.row_nnz(1) == 1 and S.col_nnz(1) == 2
+    assert _densa(T[:, 1]) == {(1, 0): 7}
+
+
+def test_dicionario_compacto_se_comporta_como_dicionario():
+    sorteio = random.Random(0)
+    for tipo in (None, "q", "d"):
+        compacto = DicionarioCompacto(7, tipo)
+        referencia: dict = {}
+        for _ in range(500):
+            chave = (sorteio.randrange(6), sorteio.randrange(7))
+            if sorteio.random() < 0.6:
+                valor = sorteio.randint(1, 9) if tipo != "d" else sorteio.random()
+                compacto[chave] = valor
+                referencia[chave] = valor
+            elif chave in referencia:
+                del compacto[chave]
+                del referencia[chave]
+            assert len(compacto) == len(referencia)
+        assert dict(compacto.items()) == referencia
+        assert set(compacto) == set(referencia)
+        assert all(compacto.obter(i * 7 + j) == v for (i, j), v in referencia.items())
+        copia = compacto.copia()
+        copia[0, 0] = 42
+        assert compacto.get((0, 0)) == referencia.get((0, 0))
+
+    compacto = DicionarioCompacto(3, "q")
+    compacto[0, 1] = 2
+    compacto[1, 2] = 0.5
+    assert compacto.tipo == "d" and dict(compacto.items()) == {(0, 1): 2, (1, 2): 0.5}
+
+
+@pytest.mark.parametrize("modo", MODOS)
+@pytest.mark.parametrize("inteiros", [True, False])
+def test_produto_igual_a_referencia(modo, inteiros):
+    sorteio = random.Random(int(inteiros))
+    if modo.get("tipo_valores") == "q":
+        inteiros = True
+
+    def valor():
+        return sorteio.randint(-5, 5) or 1 if inteiros else sorteio.uniform(-1, 1)
+
+    triplas_a = [
+        (sorteio.randrange(30), sorteio.randrange(20), valor()) for _ in range(150)
+    ]
+    triplas_b = [
+        (sorteio.randrange(20), sorteio.randrange(25), valor()) for _ in range(150)
+    ]
+    A = MatrizEsparsaHash.from_triplets(30, 20, triplas_a, **modo)
+    B = MatrizEsparsaHash.from_triplets(20, 25, triplas_b, **modo)
+
+    for X, Y in [(A, B), (B.transpor(), A.transpor())]:
+        C = X @ Y
+        referencia = _produto_referencia(X, Y)
+        obtido = _densa(C)
+        assert set(obtido) == set(referencia)
+        assert all(obtido[c] == pytest.approx(referencia[c]) for c in referencia)
+        assert isinstance(C.data, DicionarioCompacto) == bool(modo)
+
+
+@pytest.mark.parametrize("modo", MODOS)
+def test_set_many_e_delete_many_iguais_a_escritas_uma_a_uma(modo):
+    sorteio = random.Random(2)
+    triplas = [(sorteio.randrange(15), sorteio.randrange(12), 1) for _ in range(60)]
+    A = MatrizEsparsaHash.from_triplets(15, 12, triplas, **modo)
+    B = MatrizEsparsaHash.from_triplets(15, 12, triplas, **modo)
+    A.criar_indices()
+
+    for matriz_a, matriz_b in [(A, B), (A.transpor(), B.transpor())]:
+        rows = [sorteio.randrange(matriz_a.n) for _ in range(80)]
+        cols = [sorteio.randrange(matriz_a.m) for _ in range(80)]
+        vals = [sorteio.randint(0, 3) for _ in range(80)]
+
+        antes = _densa(matriz_b)
+        ultimo = dict(zip(zip(rows, cols), vals))
+        esperado = (
+            sum(1 for c, v in ultimo.items() if v and c not in antes),
+            sum(1 for c, v in ultimo.items() if v and c in antes),
+            sum(1 for c, v in ultimo.items() if not v and c in antes),
+        )
+        assert matriz_a.set_many(rows, cols, vals) == esperado
+        for i, j, valor in zip(rows, cols, vals):
+            matriz_b[i, j] = valor
+        assert _densa(matriz_a) == _densa(matriz_b)
+
+        apagar = sorted(ultimo)[:40]
+        removidos = sum(1 for c in set(apagar) if matriz_b[c] != 0)
+        resultado = matriz_a.delete_many([i for i, _ in apagar], [j for _, j in apagar])
+        assert resultado == (0, 0, removidos)
+        for chave in apagar:
+            matriz_b[chave] = 0
+        assert _densa(matriz_a) == _densa(matriz_b)
+        for i in range(matriz_a.n):
+            assert matriz_a.row(i) == matriz_b.row(i)
+
+
+@pytest.mark.parametrize("modo", MODOS)
+def test_snapshot_e_transposta_com_copia_na_escrita(modo):
+    A = MatrizEsparsaHash.from_triplets(4, 5, [(0, 1, 2), (2, 3, 4), (3, 0, 6)], **modo)
+    A.criar_indices()
+    original = _densa(A)
+    S = A.snapshot()
+    T = A.transpor()
+    assert A._cache.usuarios == 3
+
+    S[0, 1] = 9
+    T[3, 2] = 0
+    A.set_many([1], [1], [5])
+    assert _densa(S) == {**original, (0, 1): 9}
+    assert _densa(T) == {(1, 0): 2, (0, 3): 6}
+    assert _densa(A) == {**original, (1, 1): 5}
+    assert A._cache.usuarios == S._cache.usuarios == T._cache.usuarios == 1
+    assert S.row(0) == {1: 9} and T.row(3) == {} and A.col(1) == {0: 2, 1: 5}
+
+    B = A.copy()
+    A *= 2
+    assert _densa(B) == {**original, (1, 1): 5}
+    del B
+    assert A._cache.usuarios == 1
@@ -0,0 +1,250 @@
+import random
+
+import pytest
+
+import arvore_referencia
+from estrutura2 import (
+    ORDEM_B_MAIS,
+    Arvore,
+    ArvoreBMais,
+    FolhaBMais,
+    MatrizEsparsaArvore,
+    _codificar,
+)
+
+
+def _verificar_avl(no) -> int:
+    """
+    Altura da subárvore, conferindo as alturas guardadas, o balanceamento e a
+    ordem das chaves
+    """
+    if no is None:
+        return 0
+    esquerda = _verificar_avl(no.esquerda)
+    direita = _verificar_avl(no.direita)
+    assert abs(esquerda - direita) <= 1
+    assert no.altura == 1 + max(esquerda, direita)
+    if no.esquerda is not None:
+        assert no.esquerda.chave < no.chave
+    if no.direita is not None:
+        assert no.direita.chave > no.chave
+    return no.altura
+
+
+def _clonar_referencia(referencia):
+    clone = arvore_referencia.Arvore()
+    for chave, valor in referencia.items():
+        clone.inserir(chave, valor)
+    return clone
+
+
+def _conferir(arvore, referencia, chaves_sorteadas) -> None:
+    assert list(arvore.items()) == list(referencia.items())
+    assert len(arvore) == len(referencia)
+    for chave in chaves_sorteadas:
+        assert arvore.buscar(chave) == referencia.buscar(chave)
+        assert arvore.contem(chave) == referencia.contem(chave)
+    _verificar_avl(arvore.raiz)
+
+
+def _operar(arvore, referencia, sorteio, operacoes: int) -> None:
+    for _ in range(operacoes):
+        chave = (sorteio.randrange(30), sorteio.randrange(30))
+        if sorteio.random() < 0.6:
+            valor = sorteio.randint(1, 100)
+            novo = not referencia.contem(chave)
+            assert arvore.inserir(chave, valor) == novo
+            referencia.inserir(chave, valor)
+        else:
+            existia = referencia.contem(chave)
+            assert arvore.remover(chave) == existia
+            referencia.remover(chave)
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_arvore_iterativa_igual_a_referencia_recursiva(semente):
+    sorteio = random.Random(semente)
+    arvore = Arvore()
+    referencia = arvore_referencia.Arvore()
+    chaves = [(i, j) for i in range(30) for j in range(30)]
+
+    for _ in range(10):
+        _operar(arvore, referencia, sorteio, 150)
+        _conferir(arvore, referencia, sorteio.sample(chaves, 50))
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_copias_por_caminho_ficam_independentes(semente):
+    sorteio = random.Random(semente)
+    arvore = Arvore()
+    referencia = arvore_referencia.Arvore()
+    _operar(arvore, referencia, sorteio, 400)
+    chaves = [(i, j) for i in range(30) for j in range(30)]
+
+    # Cópias tiradas em momentos diferentes; cada uma e o original seguem
+    # recebendo escritas próprias, comparadas com referências separadas
+    pares = [(arvore, referencia)]
+    for _ in range(4):
+        origem, origem_ref = pares[sorteio.randrange(len(pares))]
+        pares.append((origem.copiar(), _clonar_referencia(origem_ref)))
+        for copia, copia_ref in pares:
+            _operar(copia, copia_ref, sorteio, 60)
+
+    for copia, copia_ref in pares:
+        _conferir(copia, copia_ref, sorteio.sample(chaves, 50))
+
+
+def _verificar_b_mais(arvore) -> None:
+    """
+    Folhas todas na mesma profundidade, nós com até ORDEM_B_MAIS chaves em
+    ordem, separadores coerentes com as subárvores e folhas encadeadas na
+    ordem das chaves
+    """
+    folhas: list = []
+
+    def visitar(no, profundidade, minimo, maximo) -> None:
+        chaves = list(no.chaves)
+        assert chaves == sorted(set(chaves))
+        assert len(chaves) <= ORDEM_B_MAIS
+        assert all(
+            (minimo is None or minimo <= c) and (maximo is None or c < maximo)
+            for c in chaves
+        )
+        if type(no) is FolhaBMais:
+            assert len(no.valores) == len(chaves)
+            folhas.append((profundidade, no))
+            return
+        assert len(no.filhos) == len(chaves) + 1
+        limites = [minimo] + chaves + [maximo]
+        for indice, filho in enumerate(no.filhos):
+            visitar(filho, profundidade + 1, limites[indice], limites[indice + 1])
+
+    visitar(arvore.raiz, 0, None, None)
+    assert len({profundidade for profundidade, _ in folhas}) == 1
+    for (_, folha), (_, seguinte) in zip(folhas, folhas[1:]):
+        assert folha.proxima is seguinte
+    assert folhas[-1][1].proxima is None
+
+
+@pytest.mark.parametrize("semente", range(4))
+def test_arvore_b_mais_igual_a_dicionario(semente):
+    sorteio = random.Random(semente)
+    arvore = ArvoreBMais()
+    referencia: dict = {}
+
+    for rodada in range(6):
+        for _ in range(800):
+            chave = (sorteio.randrange(60), sorteio.randrange(60))
+            operacao = sorteio.random()
+            if operacao < 0.5:
+                valor = sorteio.randint(1, 100)
+                assert arvore.inserir(chave, valor) == (chave not in referencia)
+                referencia[chave] = valor
+            elif operacao < 0.6:
+                arvore.somar(chave, 3)
+                referencia[chave] = referencia.get(chave, 0) + 3
+            else:
+                assert arvore.remover(chave) == (chave in referencia)
+                referencia.pop(chave, None)
+
+        lote = sorted(
+            {
+                (sorteio.randrange(60), sorteio.randrange(60)): sorteio.randint(0, 5)
+                for _ in range(200)
+            }.items()
+        )
+        inseridos = sum(1 for c, v in lote if v != 0 and c not in referencia)
+        atualizados = sum(1 for c, v in lote if v != 0 and c in referencia)
+        removidos = sum(1 for c, v in lote if v == 0 and c in referencia)
+        assert arvore.aplicar_lote(lote) == (inseridos, atualizados, removidos)
+        for chave, valor in lote:
+            if valor:
+                referencia[chave] = valor
+            else:
+                referencia.pop(chave, None)
+
+        assert list(arvore.items()) == sorted(referencia.items())
+        assert len(arvore) == len(referencia)
+        assert all(arvore.buscar(c) == v for c, v in referencia.items())
+        _verificar_b_mais(arvore)
+
+        inicio, fim = sorted([(sorteio.randrange(60), 0), (sorteio.randrange(60), 0)])
+        assert list(arvore.intervalo(inicio, fim)) == [
+            item for item in sorted(referencia.items()) if inicio <= item[0] < fim
+        ]
+
+        copia = arvore.copiar()
+        copia.inserir((99, 99), 1)
+        assert not arvore.contem((99, 99))
+        _verificar_b_mais(copia)
+
+
+def test_arvore_b_mais_montada_em_lote():
+    itens = [((i, j), i * 100 + j + 1) for i in range(50) for j in range(0, 50, 3)]
+    arvore = ArvoreBMais.de_itens_ordenados(itens)
+    _verificar_b_mais(arvore)
+    assert list(arvore.items()) == itens
+    assert sorted(itens, key=lambda item: _codificar(item[0])) == itens
+
+
+def _elementos(A) -> dict:
+    return {(i, j): A[i, j] for i in range(A.n) for j in range(A.m) if A[i, j] != 0}
+
+
+@pytest.mark.parametrize("tipo_arvore", ["avl", "bmais"])
+@pytest.mark.parametrize("tamanho_lote", [5, 400])
+def test_set_many_e_delete_many_iguais_a_escritas_uma_a_uma(tipo_arvore, tamanho_lote):
+    sorteio = random.Random(tamanho_lote)
+    triplas = [(sorteio.randrange(20), sorteio.randrange(25), 1) for _ in range(150)]
+    A = MatrizEsparsaArvore.from_triplets(20, 25, triplas, arvore=tipo_arvore)
+    B = MatrizEsparsaArvore.from_triplets(20, 25, triplas, arvore=tipo_arvore)
+
+    for matriz_a, matriz_b in [(A, B), (A.transpor(), B.transpor())]:
+        rows = [sorteio.randrange(matriz_a.n) for _ in range(tamanho_lote)]
+        cols = [sorteio.randrange(matriz_a.m) for _ in range(tamanho_lote)]
+        vals = [sorteio.randint(0, 3) for _ in range(tamanho_lote)]
+
+        antes = _elementos(matriz_b)
+        ultimo = dict(zip(zip(rows, cols), vals))
+        esperado = (
+            sum(1 for c, v in ultimo.items() if v and c not in antes),
+            sum(1 for c, v in ultimo.items() if v and c in antes),
+            sum(1 for c, v in ultimo.items() if not v and c in antes),
+        )
+        assert matriz_a.set_many(rows, cols, vals) == esperado
+        for i, j, valor in zip(rows, cols, vals):
+            matriz_b[i, j] = valor
+        assert _elementos(matriz_a) == _elementos(matriz_b)
+
+        apagar = sorted(ultimo)[: tamanho_lote // 2]
+        removidos = sum(1 for c in set(apagar) if matriz_b[c] != 0)
+        assert matriz_a.delete_many(
+            [i for i, _ in apagar], [j for _, j in apagar]
+        ) == (0, 0, removidos)
+        for chave in apagar:
+            matriz_b[chave] = 0
+        assert _elementos(matriz_a) == _elementos(matriz_b)
+        assert list(matriz_a.data.items()) == sorted(matriz_a.data.items())
+
+
+@pytest.mark.parametrize("tipo_arvore", ["avl", "bmais"])
+def test_snapshot_e_transposta_com_copia_na_escrita(tipo_arvore):
+    A = MatrizEsparsaArvore.from_triplets(
+        4, 5, [(0, 1, 2), (2, 3, 4), (3, 0, 6)], arvore=tipo_arvore
+    )
+    original = _elementos(A)
+    S = A.snapshot()
+    T = A.transpor()
+    assert A._cache.usuarios == 3
+
+    S[0, 1] = 9
+    T[3, 2] = 0
+    A[1, 1] = 5
+    assert _elementos(S) == {**original, (0, 1): 9}
+    assert _elementos(T) == {(1, 0): 2, (0, 3): 6}
+    assert _elementos(A) == {**original, (1, 1): 5}
+    assert A._cache.usuarios == S._cache.usuarios == T._cache.usuarios == 1
+
+    C = A.copy()
+    del C
+    assert A._cache.usuarios == 1
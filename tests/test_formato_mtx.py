@@ -0,0 +1,30 @@
+import pytest
+
+from estrutura1 import MatrizEsparsaHash
+from formato_mtx import escrever_mtx, escrever_triplas, ler_mtx, ler_triplas
+
+np = pytest.importorskip("numpy")
+
+
+def _elementos(A) -> dict:
+    return {(i, j): A[i, j] for i in range(A.n) for j in range(A.m) if A[i, j] != 0}
+
+
+@pytest.mark.parametrize(
+    "valores", [[2.5, -1.0, 1e-300, 0.1], [3, -7, 2**40, 1]], ids=["float", "int"]
+)
+def test_ida_e_volta_com_valores_numpy(tmp_path, valores):
+    A = MatrizEsparsaHash(5, 4)
+    A.set_many(np.array([0, 1, 4, 2]), np.array([3, 0, 2, 2]), np.array(valores))
+    assert any(isinstance(valor, np.generic) for valor in A.data.values())
+    esperado = {chave: valor.item() for chave, valor in _elementos(A).items()}
+
+    escrever_mtx(A, tmp_path / "a.mtx")
+    B = ler_mtx(tmp_path / "a.mtx")
+    assert (B.n, B.m) == (5, 4)
+    assert _elementos(B) == esperado
+    assert all(type(valor) is type(valores[0]) for valor in _elementos(B).values())
+
+    escrever_triplas(A.transpor(), tmp_path / "a.txt", base=1)
+    C = ler_triplas(tmp_path / "a.txt", 4, 5, base=1)
+    assert _elementos(C) == {(j, i): valor for (i, j), valor in esperado.items()}
@@ -0,0 +1,35 @@
+import pytest
+
+from estrutura1 import MatrizEsparsaHash
+from matriz_adaptativa import MatrizAdaptativa
+
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("backend", ["Hash", "Arvore", "Densa"])
+def test_soma_com_dimensoes_diferentes_levanta_erro(backend):
+    A = MatrizAdaptativa.de_matriz(
+        MatrizEsparsaHash.from_triplets(
+            3, 4, [(i, j, 1) for i in range(3) for j in range(4)]
+        ),
+        adaptar=False,
+    ).para(backend)
+    linha = MatrizAdaptativa.de_matriz(
+        MatrizEsparsaHash.from_triplets(1, 4, [(0, j, 2) for j in range(4)]),
+        adaptar=False,
+    ).para(backend)
+
+    with pytest.raises(ValueError):
+        A + linha
+
+
+def test_soma_densa_nao_faz_broadcasting():
+    A = MatrizAdaptativa.de_matriz(
+        MatrizEsparsaHash.from_triplets(2, 3, [(0, 0, 1)]), adaptar=False
+    ).para("Densa")
+    linha = MatrizAdaptativa.de_matriz(
+        MatrizEsparsaHash.from_triplets(1, 3, [(0, 2, 1)]), adaptar=False
+    ).para("Densa")
+
+    with pytest.raises(ValueError):
+        A.atual + linha.atual